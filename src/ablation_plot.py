@@ -1,4 +1,29 @@
+"""
+Feature ablation study (Random Forest).
+
+The dataset is loaded and split once; every feature subset is then trained
+and scored as an independent job in a process pool, within a global core
+budget (see parallel.py).
+
+Modes:
+- leave-one-out: all features, then drop one feature at a time (default)
+- add-one-in:    each feature on its own (on top of --base features, if any)
+- groups:        drop one feature group at a time (sensors, time, or
+                 custom groups given with --group name=f1,f2)
+
+Outputs:
+results/ablation_test.png
+results/ablation_test.csv
+"""
+
+from __future__ import annotations
+
+import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
@@ -6,64 +31,162 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score
 
+from preprocess import load_data, FEATURES, TARGET
+from clean_data import add_time_features, TIME_FEATURES
+from parallel import split_core_budget
+
 
 DATA_PATH = "data/occupancy.csv"
 OUTPUT_PATH = "results/ablation_test.png"
+CSV_PATH = "results/ablation_test.csv"
 RANDOM_STATE = 42
 
+FEATURE_GROUPS = {
+    "sensors": FEATURES,
+    "time": TIME_FEATURES,
+}
 
-def train_and_eval(df: pd.DataFrame, features: list[str], target: str = "Occupancy") -> float:
-    X = df[features]
-    y = df[target]
+# Worker-side split, set once per process by _init_worker.
+_SPLIT: Dict[str, pd.DataFrame | pd.Series] = {}
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=RANDOM_STATE, stratify=y
-    )
 
+def _init_worker(X_train, X_test, y_train, y_test) -> None:
+    _SPLIT.update(X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+
+
+def train_and_eval(features: list[str], n_jobs: int = -1) -> float:
+    """
+    Fit the ablation model on the shared split using only `features`.
+    """
     model = RandomForestClassifier(
         n_estimators=300,
         random_state=RANDOM_STATE,
-        n_jobs=-1
+        n_jobs=n_jobs,
     )
-    model.fit(X_train, y_train)
+    model.fit(_SPLIT["X_train"][features], _SPLIT["y_train"])
 
-    y_pred = model.predict(X_test)
-    return accuracy_score(y_test, y_pred)
+    y_pred = model.predict(_SPLIT["X_test"][features])
+    return accuracy_score(_SPLIT["y_test"], y_pred)
 
 
-def main() -> None:
-    df = pd.read_csv(DATA_PATH)
+def leave_one_out(features: List[str]) -> List[tuple[str, List[str]]]:
+    subsets = [("All", list(features))]
+    for drop_feature in features:
+        subsets.append((f"-{drop_feature}", [f for f in features if f != drop_feature]))
+    return subsets
+
+
+def add_one_in(features: List[str], base: List[str]) -> List[tuple[str, List[str]]]:
+    subsets = []
+    if base:
+        subsets.append(("Base", list(base)))
+    for add_feature in features:
+        if add_feature not in base:
+            subsets.append((f"+{add_feature}", list(base) + [add_feature]))
+    return subsets
+
+
+def leave_group_out(features: List[str], groups: Dict[str, List[str]]) -> List[tuple[str, List[str]]]:
+    subsets = [("All", list(features))]
+    for name, members in groups.items():
+        reduced = [f for f in features if f not in members]
+        if reduced and len(reduced) < len(features):
+            subsets.append((f"-{name}", reduced))
+    return subsets
+
+
+def run_ablation(
+    subsets: List[tuple[str, List[str]]],
+    df: pd.DataFrame,
+    n_jobs: int | None = None,
+) -> pd.DataFrame:
+    """
+    Train/evaluate every subset on one shared stratified split.
+
+    Returns:
+        DataFrame with label, features, n_features, accuracy
+    """
+    used = sorted({f for _, subset in subsets for f in subset})
+    X = df[used]
+    y = df[TARGET]
+
+    train_idx, test_idx = train_test_split(
+        np.arange(len(df)), test_size=0.2, random_state=RANDOM_STATE, stratify=y
+    )
+    split = (X.iloc[train_idx], X.iloc[test_idx], y.iloc[train_idx], y.iloc[test_idx])
+
+    workers, inner = split_core_budget(n_jobs, len(subsets))
+    if workers == 1:
+        _init_worker(*split)
+        scores = [train_and_eval(subset, n_jobs=-1 if n_jobs is None else inner) for _, subset in subsets]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=split) as pool:
+            futures = [pool.submit(train_and_eval, subset, inner) for _, subset in subsets]
+            scores = [f.result() for f in futures]
+
+    return pd.DataFrame({
+        "label": [label for label, _ in subsets],
+        "features": [";".join(subset) for _, subset in subsets],
+        "n_features": [len(subset) for _, subset in subsets],
+        "accuracy": scores,
+    })
+
+
+def _parse_group(value: str) -> tuple[str, List[str]]:
+    name, _, members = value.partition("=")
+    if not name or not members:
+        raise argparse.ArgumentTypeError(f"Expected name=f1,f2,... Got: {value}")
+    return name, [m for m in members.split(",") if m]
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Feature ablation study (Random Forest)")
+    parser.add_argument("--mode", choices=["leave-one-out", "add-one-in", "groups"], default="leave-one-out")
+    parser.add_argument("--with-time", action="store_true", help="Include time features from clean_data.add_time_features")
+    parser.add_argument("--base", nargs="*", default=[], help="Base features for add-one-in")
+    parser.add_argument("--group", action="append", type=_parse_group, default=[], help="Custom group name=f1,f2 (groups mode)")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Core budget for parallel subsets (-1 = all cores)")
+    args = parser.parse_args(argv)
+
+    df = load_data(DATA_PATH)
+
+    features = list(FEATURES)
+    if args.with_time:
+        df = add_time_features(df)
+        features += TIME_FEATURES
 
     # Drop non-feature column(s)
     if "date" in df.columns:
         df = df.drop(columns=["date"])
 
-    features = ["Temperature", "Humidity", "Light", "CO2", "HumidityRatio"]
+    if args.mode == "leave-one-out":
+        subsets = leave_one_out(features)
+    elif args.mode == "add-one-in":
+        subsets = add_one_in(features, args.base)
+    else:
+        groups = dict(args.group) if args.group else {
+            name: members for name, members in FEATURE_GROUPS.items() if set(members) <= set(features)
+        }
+        subsets = leave_group_out(features, groups)
+
+    unknown = sorted({f for _, subset in subsets for f in subset} - set(df.columns))
+    if unknown:
+        raise ValueError(f"Unknown feature(s): {unknown}. Available: {features}")
 
     # Ensure output folder exists
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
-    results = []
-
-    baseline_acc = train_and_eval(df, features)
-    results.append(("All", baseline_acc))
-
-    for drop_feature in features:
-        reduced = [f for f in features if f != drop_feature]
-        acc = train_and_eval(df, reduced)
-        results.append((f"-{drop_feature}", acc))
+    results = run_ablation(subsets, df, n_jobs=args.n_jobs)
+    results.to_csv(CSV_PATH, index=False)
 
     # Print results to terminal (so it's usable in report text)
     print("Ablation test (Random Forest) - Accuracy\n")
-    for label, acc in results:
+    for label, acc in zip(results["label"], results["accuracy"]):
         print(f"{label:>12}: {acc:.6f}")
 
     # Plot
-    labels = [r[0] for r in results]
-    scores = [r[1] for r in results]
-
     plt.figure()
-    plt.bar(labels, scores)
+    plt.bar(results["label"], results["accuracy"])
     plt.ylim(0.0, 1.0)
     plt.xticks(rotation=45, ha="right")
     plt.title("Ablation Test Accuracy (Random Forest)")
@@ -71,7 +194,8 @@ def main() -> None:
     plt.savefig(OUTPUT_PATH)
 
     print(f"\nSaved: {OUTPUT_PATH}")
+    print(f"Saved: {CSV_PATH}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
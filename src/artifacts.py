@@ -0,0 +1,173 @@
+"""
+Versioned model artifacts.
+
+Layout:
+
+    models/<model_key>/
+        LATEST                         name of the newest version
+        <YYYYmmdd-HHMMSS>-<data8>/
+            model.joblib               fitted estimator (uncompressed joblib)
+            meta.json                  features, data hash, metrics, versions
+            flat_forest/               RandomForest only: FlatForest arrays
+                                       (see forest_inference.py)
+
+model.joblib is written uncompressed so joblib.load(..., mmap_mode="r") can
+memory-map the large numpy arrays inside the estimator instead of copying
+them into every process that loads the model.
+
+joblib, scikit-learn and forest_inference are imported by the functions
+that need them: resolving and reading meta.json (and scoring with the flat
+forest) stays cheap for short-lived CLI runs.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from metrics import Metrics
+    from forest_inference import FlatForest
+
+ARTIFACTS_DIR = Path("models")
+
+# Bump when the artifact layout changes.
+FORMAT_VERSION = 1
+
+FLAT_FOREST_DIRNAME = "flat_forest"
+
+
+def _model_dir(model_key: str, root: Path | str) -> Path:
+    return Path(root) / model_key
+
+
+def save_artifact(
+    model,
+    model_key: str,
+    features: Sequence[str],
+    data_sha256: str,
+    metrics: Metrics | None = None,
+    extra: Dict[str, Any] | None = None,
+    root: Path | str = ARTIFACTS_DIR,
+) -> Path:
+    """
+    Save a fitted model as a new version and mark it as LATEST.
+
+    Returns:
+        path of the version directory
+    """
+    import joblib
+    import sklearn
+
+    created = datetime.now(timezone.utc)
+    version = f"{created.strftime('%Y%m%d-%H%M%S')}-{data_sha256[:8]}"
+
+    model_dir = _model_dir(model_key, root)
+    out_dir = model_dir / version
+    suffix = 1
+    while out_dir.exists():
+        out_dir = model_dir / f"{version}.{suffix}"
+        suffix += 1
+    out_dir.mkdir(parents=True)
+
+    joblib.dump(model, out_dir / "model.joblib", compress=0)
+
+    # A RandomForest can only exist if sklearn.ensemble was imported already.
+    ensemble = sys.modules.get("sklearn.ensemble")
+    if ensemble is not None and isinstance(model, ensemble.RandomForestClassifier):
+        from forest_inference import FlatForest
+
+        FlatForest.from_sklearn(model).save(out_dir / FLAT_FOREST_DIRNAME)
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "model_key": model_key,
+        "version": out_dir.name,
+        "created_at": created.isoformat(),
+        "features": list(features),
+        "data_sha256": data_sha256,
+        "metrics": metrics.to_row(model_key) if metrics is not None else None,
+        "sklearn_version": sklearn.__version__,
+        "python_version": platform.python_version(),
+        **(extra or {}),
+    }
+    with open(out_dir / "meta.json", "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, indent=2)
+
+    # Atomic LATEST update.
+    tmp = model_dir / f"LATEST.{os.getpid()}.tmp"
+    tmp.write_text(out_dir.name, encoding="utf-8")
+    os.replace(tmp, model_dir / "LATEST")
+
+    return out_dir
+
+
+def list_versions(model_key: str, root: Path | str = ARTIFACTS_DIR) -> List[str]:
+    """
+    Saved versions of a model, oldest first.
+    """
+    model_dir = _model_dir(model_key, root)
+    if not model_dir.exists():
+        return []
+    return sorted(p.name for p in model_dir.iterdir() if (p / "meta.json").exists())
+
+
+def resolve_artifact(model_key: str, version: str = "latest", root: Path | str = ARTIFACTS_DIR) -> Path:
+    """
+    Version directory for model_key ("latest" or an explicit version name).
+    """
+    model_dir = _model_dir(model_key, root)
+    if version == "latest":
+        latest = model_dir / "LATEST"
+        if not latest.exists():
+            raise FileNotFoundError(
+                f"No saved artifact for '{model_key}' in {model_dir.as_posix()}. "
+                f"Run: python src/run.py train --model {model_key}"
+            )
+        version = latest.read_text(encoding="utf-8").strip()
+
+    path = model_dir / version
+    if not (path / "meta.json").exists():
+        raise FileNotFoundError(f"Artifact not found: {path.as_posix()}")
+    return path
+
+
+def load_meta(path: Path | str) -> Dict[str, Any]:
+    """
+    Read and validate meta.json of a version directory.
+    """
+    with open(Path(path) / "meta.json", "r", encoding="utf-8") as fh:
+        meta = json.load(fh)
+
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format: {meta.get('format_version')} (expected {FORMAT_VERSION})")
+    return meta
+
+
+def load_artifact(path: Path | str, mmap: bool = True) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Load (model, meta) from a version directory.
+    """
+    import joblib
+
+    path = Path(path)
+    meta = load_meta(path)
+    model = joblib.load(path / "model.joblib", mmap_mode="r" if mmap else None)
+    return model, meta
+
+
+def load_flat_forest(path: Path | str, mmap: bool = True) -> FlatForest:
+    """
+    Load the FlatForest export of a RandomForest artifact.
+    """
+    from forest_inference import FlatForest
+
+    flat_dir = Path(path) / FLAT_FOREST_DIRNAME
+    if not flat_dir.exists():
+        raise FileNotFoundError(f"No flat forest export in {Path(path).as_posix()} (RandomForest artifacts only).")
+    return FlatForest.load(flat_dir, mmap=mmap)
@@ -0,0 +1,469 @@
+"""
+Pipeline benchmark suite.
+
+Times every stage of the pipeline separately, at several data sizes:
+
+    load_csv        pd.read_csv of the raw file (no cache)
+    load_cached     preprocess.load_data through the warm columnar cache
+    clean           clean_data.clean_csv (streaming cleaner)
+    window_features window_features.build_window_features (default window)
+    fit:<model>     fit on the 80% holdout training split
+    predict:<model> predict on the 20% test split
+    metrics         metrics.compute_metrics on the test predictions
+    cv              cross_validation.run_cross_validation (5 splits, all models)
+    startup:help    `python src/run.py --help` in a new interpreter (CLI import cost)
+    startup:predict `python src/run.py predict --model logreg` on the whole file
+                    (a short-lived scoring job: startup + load + score + write)
+
+Sizes are multiples of data/occupancy.csv (default 1x, 10x, 100x). A scaled
+file repeats the rows with continuing ids and timestamps shifted by the span
+of the original, so time order (and TimeSeriesSplit) stays meaningful.
+
+Every (size, stage) runs in a fresh process: setup (loading, splitting,
+fitting before predict) is not timed, and the process's peak RSS belongs to
+that stage alone. Each record holds wall time (best of --repeats), rows/s,
+the process peak RSS and the peak RSS growth caused by the stage itself.
+
+Usage:
+    python src/benchmark.py run [--scales 1 10 100] [--stages ...] [--output results/benchmark.json]
+    python src/benchmark.py compare base.json new.json [--threshold 0.10]
+    python src/benchmark.py models [--models rf hgb] [--scales 1 10] [--output results/benchmark_models.json]
+
+compare flags every (stage, scale) whose wall time grew by more than
+--threshold (and by more than --min-seconds, to ignore timer noise) and
+exits with status 1 if there is any regression.
+
+models is a head-to-head of model families: per (scale, model), in a fresh
+process, fit time, predict time, holdout accuracy / F1 (class 1), the
+pickled model size and peak RSS. The holdout is the time-ordered last 20%
+of the rows. Scaled files repeat the shipped rows, so accuracy above 1x
+is a sanity check only; pass --data with an independent file (e.g. from
+synthetic_data.py) to compare accuracy at size.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context as mp_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from preprocess import DATA_PATH, FEATURES, load_data
+from clean_data import load_raw, clean_csv, DATE_FORMAT
+from window_features import build_window_features
+from dataset_context import DatasetContext
+from cross_validation import MODEL_BUILDERS, run_cross_validation
+from parallel import build_with_n_jobs
+from metrics import compute_metrics
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_OUTPUT = Path("results") / "benchmark.json"
+DEFAULT_MODELS_OUTPUT = Path("results") / "benchmark_models.json"
+DEFAULT_COMPARE_MODELS = ("rf", "hgb")
+DEFAULT_COMPARE_SCALES = (1, 10)
+
+BASE_STAGES = ["load_csv", "load_cached", "clean", "window_features"]
+MODEL_STAGES = [f"{kind}:{key}" for key in MODEL_BUILDERS for kind in ("fit", "predict")]
+STARTUP_STAGES = ["startup:help", "startup:predict"]
+ALL_STAGES = BASE_STAGES + MODEL_STAGES + ["metrics", "cv"] + STARTUP_STAGES
+
+RUN_PY = Path(__file__).resolve().with_name("run.py")
+
+# Relative slowdown that counts as a regression in compare mode.
+DEFAULT_THRESHOLD = 0.10
+# Slowdowns smaller than this (seconds) are treated as noise.
+DEFAULT_MIN_SECONDS = 0.02
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def write_scaled_csv(src: Path | str, dst: Path | str, scale: int) -> int:
+    """
+    Write `scale` back-to-back copies of a raw CSV, with continuing ids and
+    shifted timestamps, one copy at a time.
+
+    Returns:
+        number of data rows written
+    """
+    df = load_raw(str(src))
+    stamps = pd.to_datetime(df["date"], format=DATE_FORMAT)
+    ids = pd.to_numeric(df["id"])
+
+    # Next copy starts one sampling step after the previous one ends.
+    step = stamps.iloc[1] - stamps.iloc[0] if len(stamps) > 1 else pd.Timedelta(minutes=1)
+    span = stamps.iloc[-1] - stamps.iloc[0] + step
+
+    columns = [c for c in df.columns if c != "id"]
+    with open(dst, "w", newline="", encoding="utf-8") as fh:
+        # Same layout as data/occupancy.csv: header without the id column.
+        fh.write(",".join(f'"{c}"' for c in columns) + "\n")
+        for k in range(scale):
+            copy = df.copy()
+            copy["id"] = ids + k * len(df)
+            copy["date"] = (stamps + k * span).dt.strftime(DATE_FORMAT)
+            copy[["id"] + columns].to_csv(fh, header=False, index=False)
+
+    return len(df) * scale
+
+
+# --------------------------------------------------
+# Stages (run inside a fresh worker process)
+# --------------------------------------------------
+
+
+def _model_split(path: Path, seed: int = 42):
+    return DatasetContext(path).train_test(test_size=0.2, seed=seed)
+
+
+def _stage_setup(stage: str, path: Path, work_dir: Path, n_jobs: int | None) -> tuple[Callable[[], Any], int]:
+    """
+    Prepare a stage (untimed). Returns (timed callable, rows processed).
+    """
+    if stage == "load_csv":
+        with open(path, "rb") as fh:
+            rows = sum(1 for _ in fh) - 1
+        return (lambda: pd.read_csv(path)), rows
+
+    if stage == "load_cached":
+        df = load_data(path)  # builds the cache if needed
+        return (lambda: load_data(path)), len(df)
+
+    if stage == "clean":
+        out = work_dir / f"clean-{os.getpid()}.csv"
+        rows = len(load_data(path))
+        return (lambda: clean_csv(path, out)), rows
+
+    if stage == "window_features":
+        df = load_data(path)
+        return (lambda: build_window_features(df, FEATURES)), len(df)
+
+    if stage.startswith(("fit:", "predict:")):
+        kind, model_key = stage.split(":", 1)
+        X_train, X_test, y_train, y_test = _model_split(path)
+        model = build_with_n_jobs(MODEL_BUILDERS[model_key], n_jobs, random_state=42)
+        if kind == "fit":
+            return (lambda: model.fit(X_train, y_train)), len(X_train)
+        model.fit(X_train, y_train)
+        return (lambda: model.predict(X_test)), len(X_test)
+
+    if stage == "metrics":
+        X_train, X_test, y_train, y_test = _model_split(path)
+        y_pred = build_with_n_jobs(MODEL_BUILDERS["logreg"], n_jobs, random_state=42).fit(X_train, y_train).predict(X_test)
+        return (lambda: compute_metrics(y_test, y_pred)), len(y_test)
+
+    if stage == "cv":
+        ctx = DatasetContext(path)
+        rows = len(ctx.y)
+        return (lambda: run_cross_validation(
+            models=list(MODEL_BUILDERS),
+            context=ctx,
+            n_jobs=n_jobs,
+            out_folds_path=str(work_dir / "cv_folds.csv"),
+            out_summary_path=str(work_dir / "cv_summary.csv"),
+        )), rows
+
+    if stage == "startup:help":
+        return (lambda: _run_cli("--help")), 0
+
+    if stage == "startup:predict":
+        artifacts_dir = work_dir / f"models-{os.getpid()}"
+        _run_cli("train", "--model", "logreg", "--artifacts-dir", str(artifacts_dir))
+        rows = len(load_data(path))
+        out = work_dir / f"predictions-{os.getpid()}.csv"
+        return (lambda: _run_cli(
+            "predict", "--model", "logreg", "--input", str(path), "--output", str(out),
+            "--artifacts-dir", str(artifacts_dir),
+        )), rows
+
+    raise ValueError(f"Unknown stage: {stage}. Available: {ALL_STAGES}")
+
+
+def _run_cli(*args: str) -> None:
+    # A new interpreter per call: import time is part of what is measured.
+    subprocess.run([sys.executable, str(RUN_PY), *args], check=True, stdout=subprocess.DEVNULL)
+
+
+def _run_stage(stage: str, path: str, work_dir: str, repeats: int, n_jobs: int | None) -> Dict[str, Any]:
+    # Stages print progress/reports; keep the benchmark output readable.
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn, rows = _stage_setup(stage, Path(path), Path(work_dir), n_jobs)
+        rss_before = _peak_rss_mb()
+
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+    wall = min(times)
+    peak = _peak_rss_mb()
+    return {
+        "stage": stage,
+        "rows": int(rows),
+        "wall_s": wall,
+        "rows_per_s": rows / wall if wall > 0 else float("inf"),
+        "peak_rss_mb": peak,
+        "rss_growth_mb": peak - rss_before,
+    }
+
+
+def _in_fresh_process(fn, *args) -> Dict[str, Any]:
+    # A new process per stage, so ru_maxrss is not inherited from earlier stages.
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def _run_model_comparison(model_key: str, path: str, n_jobs: int | None, test_size: float) -> Dict[str, Any]:
+    import joblib
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx = DatasetContext(path)
+        X, y = ctx.X, ctx.y
+        n_train = len(y) - int(np.ceil(len(y) * test_size))
+        X_train, X_test, y_train, y_test = X.iloc[:n_train], X.iloc[n_train:], y.iloc[:n_train], y.iloc[n_train:]
+        model = build_with_n_jobs(MODEL_BUILDERS[model_key], n_jobs, random_state=42)
+        rss_before = _peak_rss_mb()
+
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = model.predict(X_test)
+        predict_s = time.perf_counter() - start
+
+        m = compute_metrics(y_test, pd.Series(y_pred, index=y_test.index))
+        buf = io.BytesIO()
+        joblib.dump(model, buf)
+
+    peak = _peak_rss_mb()
+    return {
+        "model": model_key,
+        "train_rows": len(y_train),
+        "test_rows": len(y_test),
+        "fit_s": fit_s,
+        "predict_s": predict_s,
+        "predict_rows_per_s": len(y_test) / predict_s if predict_s > 0 else float("inf"),
+        "accuracy": m.accuracy,
+        "f1_1": m.f1_1,
+        "model_mb": buf.getbuffer().nbytes / 1e6,
+        "peak_rss_mb": peak,
+        "rss_growth_mb": peak - rss_before,
+    }
+
+
+def compare_models(
+    models: List[str],
+    scales: List[int],
+    data_path: Path | str = DATA_PATH,
+    test_size: float = 0.2,
+    n_jobs: int | None = None,
+    work_dir: Path | str | None = None,
+) -> Dict[str, Any]:
+    """
+    Fit/predict time, holdout accuracy and model size of each model at each scale.
+
+    Returns:
+        {"meta": environment info, "results": [one record per (scale, model)]}
+    """
+    unknown = [m for m in models if m not in MODEL_BUILDERS]
+    if unknown:
+        raise ValueError(f"Unknown model(s): {unknown}. Available: {list(MODEL_BUILDERS)}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="occupancy-bench-", dir=work_dir) as tmp:
+        tmp = Path(tmp)
+        for scale in scales:
+            path = tmp / f"occupancy_x{scale}.csv"
+            n_rows = write_scaled_csv(data_path, path, scale)
+            print(f"\n== scale {scale}x ({n_rows} rows) ==")
+
+            for model_key in models:
+                record = _in_fresh_process(_run_model_comparison, model_key, str(path), n_jobs, test_size)
+                record.update(scale=scale, dataset_rows=n_rows)
+                results.append(record)
+                print(
+                    f"{model_key:>8}: fit {record['fit_s']:8.3f} s  predict {record['predict_s']:7.4f} s  "
+                    f"acc {record['accuracy']:.4f}  f1_1 {record['f1_1']:.4f}  "
+                    f"model {record['model_mb']:7.2f} MB  peak RSS {record['peak_rss_mb']:7.1f} MB"
+                )
+
+    return {"meta": _environment(n_jobs=n_jobs, data=Path(data_path).as_posix(), test_size=test_size), "results": results}
+
+
+def _environment(**extra: Any) -> Dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        **extra,
+    }
+
+
+def _write_report(report: Dict[str, Any], output: Path | str) -> None:
+    out = Path(output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\nSaved: {out.as_posix()}")
+
+
+def run_benchmarks(
+    scales: List[int],
+    stages: List[str],
+    data_path: Path | str = DATA_PATH,
+    repeats: int = 1,
+    n_jobs: int | None = None,
+    work_dir: Path | str | None = None,
+) -> Dict[str, Any]:
+    """
+    Run every stage at every scale.
+
+    Returns:
+        {"meta": environment info, "results": [one record per (scale, stage)]}
+    """
+    unknown = [s for s in stages if s not in ALL_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {unknown}. Available: {ALL_STAGES}")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="occupancy-bench-", dir=work_dir) as tmp:
+        tmp = Path(tmp)
+        for scale in scales:
+            path = tmp / f"occupancy_x{scale}.csv"
+            n_rows = write_scaled_csv(data_path, path, scale)
+            print(f"\n== scale {scale}x ({n_rows} rows) ==")
+
+            for stage in stages:
+                record = _in_fresh_process(_run_stage, stage, str(path), str(tmp), repeats, n_jobs)
+                record.update(scale=scale, dataset_rows=n_rows)
+                results.append(record)
+                print(
+                    f"{stage:>18}: {record['wall_s']:9.4f} s  {record['rows_per_s']:12.0f} rows/s  "
+                    f"peak RSS {record['peak_rss_mb']:7.1f} MB (+{record['rss_growth_mb']:.1f})"
+                )
+
+    meta = _environment(repeats=repeats, n_jobs=n_jobs, data=Path(data_path).as_posix())
+    return {"meta": meta, "results": results}
+
+
+def compare_runs(
+    base: Dict[str, Any],
+    new: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> pd.DataFrame:
+    """
+    Join two benchmark runs on (stage, scale) and flag regressions.
+
+    Returns:
+        DataFrame with stage, scale, base_s, new_s, ratio, rss ratio, regression
+    """
+    key = ["stage", "scale"]
+    cols = key + ["wall_s", "peak_rss_mb"]
+    merged = pd.DataFrame(base["results"])[cols].merge(
+        pd.DataFrame(new["results"])[cols], on=key, suffixes=("_base", "_new")
+    )
+    merged["ratio"] = merged["wall_s_new"] / merged["wall_s_base"]
+    merged["rss_ratio"] = merged["peak_rss_mb_new"] / merged["peak_rss_mb_base"]
+    merged["regression"] = (merged["ratio"] > 1 + threshold) & (merged["wall_s_new"] - merged["wall_s_base"] > min_seconds)
+    return merged.sort_values(key, kind="stable").reset_index(drop=True)
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Pipeline benchmark suite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_p = subparsers.add_parser("run", help="Run the benchmarks and write a JSON report")
+    run_p.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_SCALES), help="Multiples of the shipped CSV")
+    run_p.add_argument("--stages", nargs="+", default=ALL_STAGES, choices=ALL_STAGES, metavar="STAGE")
+    run_p.add_argument("--data", default=DATA_PATH, help="Raw CSV to scale up")
+    run_p.add_argument("--repeats", type=int, default=1, help="Timed repetitions per stage (best is kept)")
+    run_p.add_argument("--n-jobs", type=int, default=None, help="Core budget for models and CV (-1 = all cores)")
+    run_p.add_argument("--output", default=DEFAULT_OUTPUT)
+    run_p.add_argument("--work-dir", default=None, help="Where scaled datasets are written (default: system temp)")
+
+    cmp_p = subparsers.add_parser("compare", help="Flag regressions between two JSON reports")
+    cmp_p.add_argument("base")
+    cmp_p.add_argument("new")
+    cmp_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative slowdown (0.10 = 10%%)")
+    cmp_p.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS, help="Ignore smaller absolute slowdowns")
+
+    models_p = subparsers.add_parser("models", help="Compare model families: time, accuracy, size")
+    models_p.add_argument("--models", nargs="+", default=list(DEFAULT_COMPARE_MODELS), choices=list(MODEL_BUILDERS), metavar="MODEL")
+    models_p.add_argument("--scales", type=int, nargs="+", default=list(DEFAULT_COMPARE_SCALES), help="Multiples of the data CSV")
+    models_p.add_argument("--data", default=DATA_PATH, help="Raw CSV to scale up")
+    models_p.add_argument("--test-size", type=float, default=0.2, help="Time-ordered holdout fraction (last rows)")
+    models_p.add_argument("--n-jobs", type=int, default=None, help="Core budget for the models (-1 = all cores)")
+    models_p.add_argument("--output", default=DEFAULT_MODELS_OUTPUT)
+    models_p.add_argument("--work-dir", default=None, help="Where scaled datasets are written (default: system temp)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run_benchmarks(
+            scales=args.scales,
+            stages=args.stages,
+            data_path=args.data,
+            repeats=args.repeats,
+            n_jobs=args.n_jobs,
+            work_dir=args.work_dir,
+        )
+        _write_report(report, args.output)
+
+    elif args.command == "models":
+        report = compare_models(
+            models=args.models,
+            scales=args.scales,
+            data_path=args.data,
+            test_size=args.test_size,
+            n_jobs=args.n_jobs,
+            work_dir=args.work_dir,
+        )
+        _write_report(report, args.output)
+
+    else:
+        with open(args.base, "r", encoding="utf-8") as fh:
+            base = json.load(fh)
+        with open(args.new, "r", encoding="utf-8") as fh:
+            new = json.load(fh)
+
+        table = compare_runs(base, new, threshold=args.threshold, min_seconds=args.min_seconds)
+        with pd.option_context("display.width", 160, "display.max_columns", 20):
+            print(table.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+        regressions = table[table["regression"]]
+        if len(regressions):
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+            for _, row in regressions.iterrows():
+                print(f"  {row['stage']} @ {row['scale']}x: {row['wall_s_base']:.4f} s -> {row['wall_s_new']:.4f} s ({row['ratio']:.2f}x)")
+            raise SystemExit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Bootstrap confidence intervals for holdout metrics.
+
+All resamples are drawn up front as one (n_resamples, n) index matrix
+(processed in chunks of CHUNK_RESAMPLES rows to bound memory). Every
+resample is then scored at once with the stacked confusion-matrix kernel in
+metrics.py: one offset np.bincount per chunk, no Python loop per resample.
+
+- iid bootstrap:   rows are drawn with replacement
+- block bootstrap: contiguous blocks of `block_size` rows (moving block
+                   bootstrap) are drawn from the time-ordered holdout, so
+                   autocorrelated minutes stay together
+
+paired_difference scores two models on the same resamples, which gives a
+CI and a bootstrap p-value for "A is better than B" on every metric.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from metrics import confusion_counts, metrics_from_counts
+
+DEFAULT_METRICS = ("accuracy", "precision_1", "recall_1", "f1_1")
+
+# Resamples per chunk; bounds the (chunk, n) index matrix.
+CHUNK_RESAMPLES = 1000
+
+
+def bootstrap_indices(
+    n: int,
+    n_resamples: int,
+    seed: int = 42,
+    block_size: int | None = None,
+) -> np.ndarray:
+    """
+    Resample index matrix of shape (n_resamples, n).
+
+    With block_size, each row is made of ceil(n / block_size) contiguous
+    blocks starting at uniformly drawn positions, truncated to n rows.
+    """
+    rng = np.random.default_rng(seed)
+    if not block_size or block_size <= 1:
+        return rng.integers(0, n, size=(n_resamples, n), dtype=np.intp)
+
+    if block_size > n:
+        raise ValueError(f"block_size ({block_size}) is larger than the sample ({n}).")
+
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n - block_size + 1, size=(n_resamples, n_blocks, 1), dtype=np.intp)
+    idx = starts + np.arange(block_size, dtype=np.intp)
+    return idx.reshape(n_resamples, n_blocks * block_size)[:, :n]
+
+
+def _time_ordered(y_true, preds: Sequence, order) -> tuple[np.ndarray, list[np.ndarray]]:
+    y_true = np.asarray(y_true)
+    preds = [np.asarray(p) for p in preds]
+    if order is None:
+        return y_true, preds
+    perm = np.argsort(np.asarray(order), kind="stable")
+    return y_true[perm], [p[perm] for p in preds]
+
+
+def _resampled_metrics(
+    y_true: np.ndarray,
+    preds: Sequence[np.ndarray],
+    n_resamples: int,
+    seed: int,
+    block_size: int | None,
+    metrics: Sequence[str],
+) -> list[Dict[str, np.ndarray]]:
+    """
+    Metric samples of shape (n_resamples,) for every prediction vector, all
+    scored on the same resamples.
+    """
+    n = len(y_true)
+    out = [{m: np.empty(n_resamples) for m in metrics} for _ in preds]
+
+    # One child seed per chunk: raising n_resamples keeps the earlier resamples.
+    seeds = np.random.SeedSequence(seed).spawn(-(-n_resamples // CHUNK_RESAMPLES))
+    for chunk, chunk_seed in enumerate(seeds):
+        lo = chunk * CHUNK_RESAMPLES
+        hi = min(lo + CHUNK_RESAMPLES, n_resamples)
+        idx = bootstrap_indices(n, hi - lo, seed=chunk_seed, block_size=block_size)
+        y_res = y_true[idx]
+
+        for samples, y_pred in zip(out, preds):
+            values = metrics_from_counts(confusion_counts(y_res, y_pred[idx]))
+            for m in metrics:
+                samples[m][lo:hi] = values[m]
+
+    return out
+
+
+def _interval_row(samples: np.ndarray, point: float, alpha: float) -> Dict[str, float]:
+    low, high = np.quantile(samples, [alpha / 2, 1 - alpha / 2])
+    return {"estimate": point, "ci_low": float(low), "ci_high": float(high), "std": float(samples.std(ddof=1))}
+
+
+def bootstrap_ci(
+    y_true,
+    y_pred,
+    n_resamples: int = 10_000,
+    alpha: float = 0.05,
+    seed: int = 42,
+    block_size: int | None = None,
+    order=None,
+    metrics: Sequence[str] = DEFAULT_METRICS,
+) -> pd.DataFrame:
+    """
+    Percentile bootstrap CIs for one model's holdout metrics.
+
+    Args:
+        order: time position of every row (e.g. y_true.index); rows are
+               sorted by it before drawing blocks. Required for a meaningful
+               block bootstrap on a shuffled holdout split.
+
+    Returns:
+        DataFrame with metric, estimate, ci_low, ci_high, std
+    """
+    y_true, (y_pred,) = _time_ordered(y_true, [y_pred], order)
+    point = metrics_from_counts(confusion_counts(y_true, y_pred))
+    (samples,) = _resampled_metrics(y_true, [y_pred], n_resamples, seed, block_size, metrics)
+
+    return pd.DataFrame([
+        {"metric": m, **_interval_row(samples[m], float(point[m]), alpha)} for m in metrics
+    ])
+
+
+def paired_difference(
+    y_true,
+    pred_a,
+    pred_b,
+    n_resamples: int = 10_000,
+    alpha: float = 0.05,
+    seed: int = 42,
+    block_size: int | None = None,
+    order=None,
+    metrics: Sequence[str] = DEFAULT_METRICS,
+) -> pd.DataFrame:
+    """
+    Paired bootstrap of metric(A) - metric(B) on the same resamples.
+
+    p_value is the two-sided bootstrap p-value for "no difference":
+    2 * min(P(diff <= 0), P(diff >= 0)), capped at 1.
+
+    Returns:
+        DataFrame with metric, estimate, ci_low, ci_high, std, p_value
+    """
+    y_true, (pred_a, pred_b) = _time_ordered(y_true, [pred_a, pred_b], order)
+    point_a = metrics_from_counts(confusion_counts(y_true, pred_a))
+    point_b = metrics_from_counts(confusion_counts(y_true, pred_b))
+    samples_a, samples_b = _resampled_metrics(y_true, [pred_a, pred_b], n_resamples, seed, block_size, metrics)
+
+    rows = []
+    for m in metrics:
+        diff = samples_a[m] - samples_b[m]
+        p_value = min(1.0, 2 * min(np.mean(diff <= 0), np.mean(diff >= 0)))
+        rows.append({
+            "metric": m,
+            **_interval_row(diff, float(point_a[m] - point_b[m]), alpha),
+            "p_value": float(p_value),
+        })
+    return pd.DataFrame(rows)
+
+
+def compare_with_bootstrap(
+    y_true,
+    preds: Dict[str, np.ndarray],
+    n_resamples: int = 10_000,
+    alpha: float = 0.05,
+    seed: int = 42,
+    block_size: int | None = None,
+    order=None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    CIs for every model plus paired differences of every model pair.
+
+    Returns:
+        (ci, paired): ci has a model column, paired has model_a/model_b
+    """
+    kwargs = dict(n_resamples=n_resamples, alpha=alpha, seed=seed, block_size=block_size, order=order)
+
+    ci = pd.concat(
+        [bootstrap_ci(y_true, pred, **kwargs).assign(model=name) for name, pred in preds.items()],
+        ignore_index=True,
+    )
+    ci = ci[["model"] + [c for c in ci.columns if c != "model"]]
+
+    names = list(preds)
+    frames = [
+        paired_difference(y_true, preds[a], preds[b], **kwargs).assign(model_a=a, model_b=b)
+        for i, a in enumerate(names)
+        for b in names[i + 1 :]
+    ]
+    paired = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["model_a", "model_b"])
+    paired = paired[["model_a", "model_b"] + [c for c in paired.columns if c not in ("model_a", "model_b")]]
+
+    return ci, paired
+
+
+def print_bootstrap(ci: pd.DataFrame, paired: pd.DataFrame, alpha: float = 0.05) -> None:
+    level = int(round((1 - alpha) * 100))
+    print(f"\nBootstrap {level}% confidence intervals:")
+    for _, row in ci.iterrows():
+        print(f"{row['model']:>20} {row['metric']:>12}: {row['estimate']:.4f} [{row['ci_low']:.4f}, {row['ci_high']:.4f}]")
+
+    if len(paired):
+        print("\nPaired differences (A - B):")
+        for _, row in paired.iterrows():
+            print(
+                f"{row['model_a'] + ' - ' + row['model_b']:>32} {row['metric']:>12}: "
+                f"{row['estimate']:+.4f} [{row['ci_low']:+.4f}, {row['ci_high']:+.4f}] p={row['p_value']:.4f}"
+            )
@@ -1,6 +1,30 @@
+"""
+Data cleaning and optional time-based feature engineering.
+
+The cleaner streams the raw CSV in fixed-size chunks (CHUNK_ROWS) and appends
+every cleaned chunk to the output, so peak memory does not grow with the
+input size. The schema is detected once, from the header and the first
+chunk (see detect_schema), and every chunk is then parsed with explicit
+column names and an explicit timestamp format.
+
+Usage:
+    python src/clean_data.py [--input data/occupancy.csv] [--output data/occupancy_clean.csv]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
 import pandas as pd
 import numpy as np
 
+from dataset_cache import cached_read_csv
+
 # --------------------------------------------------
 # Paths
 # --------------------------------------------------
@@ -19,46 +43,149 @@ EXPECTED_COLS = [
     "Occupancy",
 ]
 
+# Columns converted to numbers (unparseable values become NaN)
+NUMERIC_COLS = [
+    "id",
+    "Temperature",
+    "Humidity",
+    "Light",
+    "CO2",
+    "HumidityRatio",
+    "Occupancy",
+]
+
+# Derived calendar features added by add_time_features
+TIME_FEATURES = ["hour", "dayofweek", "is_weekend", "hour_sin", "hour_cos"]
 
-def load_raw(path: str) -> pd.DataFrame:
+# Timestamp layout of the raw exports; other layouts fall back to inference.
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Rows per chunk in the streaming cleaner
+CHUNK_ROWS = 100_000
+
+
+@dataclass(frozen=True)
+class RawSchema:
     """
-    Load raw occupancy dataset and fix column misalignment issues.
+    Column layout of a raw CSV.
+
+    names:     one name per field of a data row
+    id_in_gap: data rows have one more field than the header (the unnamed
+               first field is the row id; pandas turns it into the index)
+    missing:   expected columns absent from the file (filled with NaN)
+    """
+
+    names: List[str]
+    id_in_gap: bool = False
+    missing: tuple = ()
+
+
+def _read_head(path: Path | str) -> tuple[List[str], List[str]]:
+    with open(path, "r", newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        first = next(reader, [])
+    return header, first
 
-    IMPORTANT:
-    The original dataset sometimes comes with a shifted schema:
-    - First column named 'date' actually contains an ID (1, 2, 3, ...)
-    - Second column 'Temperature' actually contains timestamp strings
 
-    This function detects that case and realigns columns correctly.
+def detect_schema(path: Path | str, sample_rows: int = CHUNK_ROWS) -> RawSchema:
     """
-    df = pd.read_csv(path)
-    cols = list(df.columns)
+    Detect the column layout from the header and the first chunk only.
+
+    IMPORTANT:
+    The original dataset comes in several layouts:
+    - header without the id column, rows with it (8 fields, 7 names)
+    - shifted schema: first column named 'date' actually contains an ID
+      (1, 2, 3, ...) and 'Temperature' actually contains timestamp strings;
+      the last column holds Occupancy if it contains only {0,1}
+    - 8 columns with wrong headers: the expected schema is forced
+    """
+    header, first = _read_head(path)
+
+    if len(first) == len(header) + 1:
+        return RawSchema(names=["id"] + header, id_in_gap=True)
 
     # Case: misaligned columns (ID is incorrectly named 'date')
-    if cols[:2] == ["date", "Temperature"]:
-        # Rename first two columns to their real meaning
-        df = df.rename(columns={"date": "id", "Temperature": "date"})
-
-        # Shift remaining sensor columns to correct names
-        df = df.rename(
-            columns={
-                "Humidity": "Temperature",
-                "Light": "Humidity",
-                "CO2": "Light",
-                "HumidityRatio": "CO2",
-                "Occupancy": "HumidityRatio",
-            }
-        )
-
-        # In this layout, Occupancy is stored in the last column
-        # If HumidityRatio contains only {0,1}, it is actually Occupancy
-        if "HumidityRatio" in df.columns and df["HumidityRatio"].isin([0, 1]).all():
-            df = df.rename(columns={"HumidityRatio": "Occupancy"})
-            df["HumidityRatio"] = np.nan
+    if header[:2] == ["date", "Temperature"]:
+        sample = pd.read_csv(path, nrows=sample_rows, usecols=[0, 1, len(header) - 1], header=0, names=["a", "b", "last"])
+        ids = pd.to_numeric(sample["a"], errors="coerce")
+        stamps = parse_dates(sample["b"].astype(str))
+        if ids.notna().all() and stamps.notna().any():
+            names = ["id", "date", "Temperature", "Humidity", "Light", "CO2"]
+
+            # In this layout, Occupancy is stored in the last column
+            # If it contains only {0,1}, it is actually Occupancy
+            if sample["last"].isin([0, 1]).all():
+                return RawSchema(names=names + ["Occupancy"], missing=("HumidityRatio",))
+            return RawSchema(names=names + ["HumidityRatio"])
 
     # Fallback: if CSV has 8 columns but wrong headers, force expected schema
-    if df.shape[1] == 8 and "Occupancy" not in df.columns:
-        df.columns = EXPECTED_COLS
+    if len(header) == 8 and "Occupancy" not in header:
+        return RawSchema(names=list(EXPECTED_COLS))
+
+    return RawSchema(names=list(header))
+
+
+def load_raw(path: str) -> pd.DataFrame:
+    """
+    Load raw occupancy dataset and fix column misalignment issues
+    (see detect_schema).
+
+    The CSV itself is parsed once and then served from the columnar cache.
+    """
+    schema = detect_schema(path)
+    df = cached_read_csv(path)
+
+    if schema.id_in_gap:
+        df = df.reset_index()
+    df.columns = schema.names
+    for col in schema.missing:
+        df[col] = np.nan
+
+    return df
+
+
+def parse_dates(values: pd.Series, date_format: str = DATE_FORMAT) -> pd.Series:
+    """
+    Parse timestamps with an explicit format; only values that do not match
+    it go through pandas' (much slower) format inference.
+    """
+    parsed = pd.to_datetime(values, format=date_format, errors="coerce")
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], format="mixed", errors="coerce")
+    return parsed
+
+
+def time_feature_columns(dates: pd.Series) -> Dict[str, np.ndarray]:
+    """
+    TIME_FEATURES of parsed timestamps (no missing values).
+
+    Returns:
+        dict column name -> array (uint8 for hour/dayofweek/is_weekend, see
+        dtype_schema.COMPACT_SCHEMA; float64 for the cyclical encoding)
+    """
+    hour = dates.dt.hour.to_numpy().astype(np.uint8)
+    dayofweek = dates.dt.dayofweek.to_numpy().astype(np.uint8)
+    return {
+        "hour": hour,
+        "dayofweek": dayofweek,
+        "is_weekend": (dayofweek >= 5).astype(np.uint8),
+        # Cyclical encoding for hour (important for ML models)
+        "hour_sin": np.sin(2 * np.pi * hour / 24),
+        "hour_cos": np.cos(2 * np.pi * hour / 24),
+    }
+
+
+def _add_time_features_inplace(df: pd.DataFrame, date_format: str = DATE_FORMAT) -> pd.DataFrame:
+    # Parse timestamp
+    df["date"] = parse_dates(df["date"], date_format)
+
+    # Drop rows where timestamp could not be parsed
+    df.dropna(subset=["date"], inplace=True)
+
+    for name, values in time_feature_columns(df["date"]).items():
+        df[name] = values
 
     return df
 
@@ -73,74 +200,101 @@ def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
     - is_weekend: binary weekend flag
     - hour_sin / hour_cos: cyclical encoding of hour
     """
-    df = df.copy()
+    return _add_time_features_inplace(df.copy())
 
-    # Parse timestamp
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
 
-    # Drop rows where timestamp could not be parsed
-    df = df.dropna(subset=["date"])
+def clean_chunk(df: pd.DataFrame, schema: RawSchema) -> pd.DataFrame:
+    """
+    Clean one chunk in place: numeric conversion, time features, final
+    column order, drop incomplete rows.
+    """
+    for col in schema.missing:
+        df[col] = np.nan
 
-    # Basic time features
-    df["hour"] = df["date"].dt.hour
-    df["dayofweek"] = df["date"].dt.dayofweek
-    df["is_weekend"] = (df["dayofweek"] >= 5).astype(int)
+    # Convert sensor columns to numeric (columns already parsed as numbers are kept as is)
+    for col in NUMERIC_COLS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    # Cyclical encoding for hour (important for ML models)
-    df["hour_sin"] = np.sin(2 * np.pi * df["hour"] / 24)
-    df["hour_cos"] = np.cos(2 * np.pi * df["hour"] / 24)
+    # Add time-based features
+    _add_time_features_inplace(df)
 
-    return df
+    # Define final column order
+    final_cols = [c for c in EXPECTED_COLS if c in df.columns] + TIME_FEATURES
 
+    # Columns absent from the file are all-NaN; they must not drop every row.
+    return df[final_cols].dropna(subset=[c for c in final_cols if c not in schema.missing])
 
-def main():
+
+def clean_csv(
+    in_path: Path | str = DATA_PATH,
+    out_path: Path | str = OUT_PATH,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Dict[str, int]:
     """
-    Main cleaning pipeline:
-    1. Load raw CSV
-    2. Fix schema issues
-    3. Convert numeric columns
-    4. Add time-based features
-    5. Save cleaned dataset
+    Stream-clean a raw CSV into out_path, one chunk at a time.
+
+    The output is written to a temporary file and moved into place at the
+    end, so a failed run never leaves a half-written dataset behind.
+
+    Returns:
+        dict with rows_in, rows_out, chunks
     """
-    df = load_raw(DATA_PATH)
+    schema = detect_schema(in_path, sample_rows=chunk_rows)
 
     # Ensure target column exists
-    if "Occupancy" not in df.columns:
-        raise ValueError(f"Target column 'Occupancy' not found. Columns: {list(df.columns)}")
-
-    # Convert sensor columns to numeric
-    numeric_cols = [
-        "id",
-        "Temperature",
-        "Humidity",
-        "Light",
-        "CO2",
-        "HumidityRatio",
-        "Occupancy",
-    ]
-
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+    if "Occupancy" not in schema.names:
+        raise ValueError(f"Target column 'Occupancy' not found. Columns: {schema.names}")
 
-    # Add time-based features
-    df = add_time_features(df)
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(f"{out_path.name}.{os.getpid()}.tmp")
 
-    # Define final column order
-    base_cols = [
-        "id",
-        "date",
-        "Temperature",
-        "Humidity",
-        "Light",
-        "CO2",
-        "HumidityRatio",
-        "Occupancy",
-    ]
-    time_cols = ["hour", "dayofweek", "is_weekend", "hour_sin", "hour_cos"]
-
-    final_cols = [c for c in base_cols if c in df.columns] + time_cols
-    df = df[final_cols].dropna()
+    rows_in = rows_out = chunks = 0
+    reader = pd.read_csv(
+        in_path,
+        header=0,
+        names=schema.names,
+        index_col=False,
+        dtype={"date": str},
+        chunksize=chunk_rows,
+    )
+    try:
+        with reader, open(tmp_path, "w", newline="", encoding="utf-8") as fh:
+            for chunk in reader:
+                rows_in += len(chunk)
+                cleaned = clean_chunk(chunk, schema)
+                cleaned.to_csv(fh, index=False, header=chunks == 0)
+                rows_out += len(cleaned)
+                chunks += 1
+        os.replace(tmp_path, out_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    return {"rows_in": rows_in, "rows_out": rows_out, "chunks": chunks}
+
+
+def main(argv: List[str] | None = None) -> None:
+    """
+    Main cleaning pipeline:
+    1. Detect the raw schema (header + first chunk)
+    2. Stream the CSV in chunks: fix schema, convert numeric columns,
+       add time-based features
+    3. Append each cleaned chunk to the output
+    """
+    parser = argparse.ArgumentParser(description="Clean the raw occupancy CSV (streaming)")
+    parser.add_argument("--input", default=DATA_PATH)
+    parser.add_argument("--output", default=OUT_PATH)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows per chunk (bounds peak memory)")
+    args = parser.parse_args(argv)
+
+    stats = clean_csv(args.input, args.output, chunk_rows=args.chunk_rows)
 
     # Save cleaned dataset
-    df.to_c_
\ No newline at end of file
+    print(f"Rows in: {stats['rows_in']}, rows out: {stats['rows_out']} ({stats['chunks']} chunks)")
+    print(f"Saved: {Path(args.output).as_posix()}")
+
+
+if __name__ == "__main__":
+    main()
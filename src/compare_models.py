@@ -1,47 +1,86 @@
 """
 Unified model comparison on the same holdout split.
 
+Point estimates come with bootstrap confidence intervals and paired
+model-difference tests (see bootstrap.py); --block-size switches to a block
+bootstrap over the time-ordered holdout rows.
+
 Output:
 results/model_comparison.csv
+results/model_comparison_ci.csv
+results/model_comparison_paired.csv
 """
 
 from __future__ import annotations
 
+import argparse
 from pathlib import Path
+from typing import List
+
 import pandas as pd
 
 from metrics import pretty_print
+from dataset_context import get_context
+from bootstrap import compare_with_bootstrap, print_bootstrap
 
 RESULTS_DIR = Path("results")
-RESULTS_DIR.mkdir(exist_ok=True)
 OUT_PATH = RESULTS_DIR / "model_comparison.csv"
+CI_PATH = RESULTS_DIR / "model_comparison_ci.csv"
+PAIRED_PATH = RESULTS_DIR / "model_comparison_paired.csv"
+
 
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare all models on the same holdout split")
+    parser.add_argument("--resamples", type=int, default=10_000, help="Bootstrap resamples (0 = point estimates only)")
+    parser.add_argument("--block-size", type=int, default=None, help="Block bootstrap over time-ordered rows")
+    parser.add_argument("--alpha", type=float, default=0.05, help="1 - confidence level")
+    args = parser.parse_args(argv)
+    RESULTS_DIR.mkdir(exist_ok=True)
 
-def main() -> None:
     from train_random_forest import train_holdout as rf_train
     from train_logistic import train_holdout as logreg_train
     from train_dummy import train_holdout as dummy_train
 
+    # Load and split once; all three models share it.
+    ctx = get_context()
+
     rows = []
 
     print("\n=== RandomForest ===")
-    rf_m, rf_y_true, rf_y_pred = rf_train(return_preds=True)
+    rf_m, rf_y_true, rf_y_pred = rf_train(return_preds=True, context=ctx)
     pretty_print(rf_y_true, rf_y_pred)
     rows.append(rf_m.to_row("RandomForest"))
 
     print("\n=== LogisticRegression ===")
-    lr_m, lr_y_true, lr_y_pred = logreg_train(return_preds=True)
+    lr_m, lr_y_true, lr_y_pred = logreg_train(return_preds=True, context=ctx)
     pretty_print(lr_y_true, lr_y_pred)
     rows.append(lr_m.to_row("LogisticRegression"))
 
     print("\n=== DummyMostFrequent ===")
-    dm_m, dm_y_true, dm_y_pred = dummy_train(return_preds=True)
+    dm_m, dm_y_true, dm_y_pred = dummy_train(return_preds=True, context=ctx)
     pretty_print(dm_y_true, dm_y_pred)
     rows.append(dm_m.to_row("DummyMostFrequent"))
 
     pd.DataFrame(rows).to_csv(OUT_PATH, index=False)
     print(f"\nSaved results to: {OUT_PATH.as_posix()}")
 
+    if args.resamples > 0:
+        # Same split for all models, so the predictions are paired row by row.
+        ci, paired = compare_with_bootstrap(
+            rf_y_true,
+            {"RandomForest": rf_y_pred, "LogisticRegression": lr_y_pred, "DummyMostFrequent": dm_y_pred},
+            n_resamples=args.resamples,
+            alpha=args.alpha,
+            block_size=args.block_size,
+            order=rf_y_true.index,
+        )
+        print_bootstrap(ci, paired, alpha=args.alpha)
+
+        ci.to_csv(CI_PATH, index=False)
+        paired.to_csv(PAIRED_PATH, index=False)
+        print(f"\nSaved: {CI_PATH.as_posix()}")
+        print(f"Saved: {PAIRED_PATH.as_posix()}")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
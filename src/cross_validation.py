@@ -1,29 +1,32 @@
 """
 Time-series aware cross-validation for occupancy prediction.
+
+Every (model, fold) pair is an independent job. With n_jobs set, jobs run in
+a process pool and the core budget is split between worker processes and
+the RandomForest's own n_jobs, so the machine is never oversubscribed.
 """
 
 from __future__ import annotations
 
 import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from typing import List, Dict, Any
 
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import TimeSeriesSplit
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
-from preprocess import prepare_dataset
-from train_random_forest import build_model as build_rf
-from train_logistic import build_model as build_logreg
-from train_dummy import build_model as build_dummy
+from metrics import confusion_counts, metrics_from_counts
+from dataset_context import DatasetContext, get_context
+from parallel import build_with_n_jobs, split_core_budget
+from profiling import span
+from walk_forward import INCREMENTAL_MODELS, walk_forward
+from model_registry import MODEL_REGISTRY
 
 
-MODEL_BUILDERS = {
-    "rf": build_rf,
-    "logreg": build_logreg,
-    "dummy": build_dummy,
-}
+# Builders are imported on first use (see model_registry.py).
+MODEL_BUILDERS = MODEL_REGISTRY
 
 
 def _evaluate_fold(y_true, y_pred) -> Dict[str, float]:
@@ -31,24 +34,87 @@ def _evaluate_fold(y_true, y_pred) -> Dict[str, float]:
     Compute fold metrics. Uses class=1 as the positive class (occupied=1).
     zero_division=0 prevents warnings when a model predicts no positives.
     """
+    m = metrics_from_counts(confusion_counts(y_true, y_pred))
     return {
-        "accuracy": float(accuracy_score(y_true, y_pred)),
-        "precision_1": float(precision_score(y_true, y_pred, pos_label=1, zero_division=0)),
-        "recall_1": float(recall_score(y_true, y_pred, pos_label=1, zero_division=0)),
-        "f1_1": float(f1_score(y_true, y_pred, pos_label=1, zero_division=0)),
+        "accuracy": float(m["accuracy"]),
+        "precision_1": float(m["precision_1"]),
+        "recall_1": float(m["recall_1"]),
+        "f1_1": float(m["f1_1"]),
         "support": int(len(y_true)),
     }
 
 
+# Worker-side dataset, set once per process by _init_worker.
+_WORKER_DATA: Dict[str, Any] = {}
+
+
+def _init_worker(X, y) -> None:
+    _WORKER_DATA["X"] = X
+    _WORKER_DATA["y"] = y
+
+
+def _run_fold(model_key: str, fold: int, train_idx, test_idx, n_jobs: int | None) -> Dict[str, Any]:
+    """
+    Fit and evaluate one model on one fold (runs in a worker or in-process).
+    """
+    X, y = _WORKER_DATA["X"], _WORKER_DATA["y"]
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+
+    model = build_with_n_jobs(MODEL_BUILDERS[model_key], n_jobs)
+    with span(f"fit:{model_key}", rows=len(train_idx)):
+        model.fit(X_train, y_train)
+    with span(f"predict:{model_key}", rows=len(test_idx)):
+        y_pred = model.predict(X_test)
+
+    return {
+        "model": model_key,
+        "fold": fold,
+        **_evaluate_fold(y_test, y_pred),
+    }
+
+
+def _run_walk_forward(model_key: str, folds, n_jobs: int | None) -> List[Dict[str, Any]]:
+    """
+    Incremental backtest of one model over all folds (see walk_forward.py).
+    """
+    X, y = _WORKER_DATA["X"], _WORKER_DATA["y"]
+    return walk_forward(
+        model_key,
+        X.to_numpy(dtype=np.float64),
+        y.to_numpy(),
+        folds,
+        evaluate=_evaluate_fold,
+        n_jobs=n_jobs,
+    )
+
+
 def run_cross_validation(
     models: List[str] | None = None,
     n_splits: int = 5,
     out_folds_path: str = "results/metrics_cv_folds.csv",
     out_summary_path: str = "results/metrics_cv.csv",
+    windows: List[int] | None = None,
+    context: DatasetContext | None = None,
+    n_jobs: int | None = None,
+    incremental: bool = False,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Run TimeSeriesSplit cross-validation for selected models and save results.
 
+    Data comes from `context` (default: the shared context for `windows`).
+    If windows is given, models are trained on sliding-window features
+    (window_features.py) instead of raw sensor readings.
+
+    n_jobs is a global core budget for all (model, fold) jobs (-1 = all cores).
+    None keeps the serial behaviour where only RandomForest uses all cores.
+
+    incremental=True runs a walk-forward backtest instead: each fold extends
+    the previous fold's model with the new rows (warm start / partial_fit)
+    rather than refitting from scratch (models in
+    walk_forward.INCREMENTAL_MODELS). Folds of one model are then
+    sequential; models still run in parallel.
+
     Returns:
         folds_df: per-fold metrics
         summary_df: mean/std aggregated per model
@@ -60,34 +126,46 @@ def run_cross_validation(
     unknown = [m for m in models if m not in MODEL_BUILDERS]
     if unknown:
         raise ValueError(f"Unknown model(s): {unknown}. Available: {list(MODEL_BUILDERS.keys())}")
+    if incremental:
+        unsupported = [m for m in models if m not in INCREMENTAL_MODELS]
+        if unsupported:
+            raise ValueError(f"No incremental mode for model(s): {unsupported}. Available: {list(INCREMENTAL_MODELS)}")
 
     # Load full dataset (already in chronological order in the CSV).
-    X, y = prepare_dataset()
+    ctx = context or get_context(windows=windows)
+    X, y = ctx.X, ctx.y
 
     # TimeSeriesSplit expects order preserved. We do NOT shuffle.
     tscv = TimeSeriesSplit(n_splits=n_splits)
-
-    records: List[Dict[str, Any]] = []
-
-    for model_key in models:
-        build_fn = MODEL_BUILDERS[model_key]
-
-        for fold, (train_idx, test_idx) in enumerate(tscv.split(X), start=1):
-            # Works for both pandas and numpy containers.
-            X_train, X_test = X.iloc[train_idx], X.iloc[test_idx] if hasattr(X, "iloc") else (X[train_idx], X[test_idx])
-            y_train, y_test = y.iloc[train_idx], y.iloc[test_idx] if hasattr(y, "iloc") else (y[train_idx], y[test_idx])
-
-            model = build_fn()
-            model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
-
-            metrics = _evaluate_fold(y_test, y_pred)
-
-            records.append({
-                "model": model_key,
-                "fold": fold,
-                **metrics,
-            })
+    folds = list(enumerate(tscv.split(X), start=1))
+
+    if incremental:
+        jobs = [(model_key, folds) for model_key in models]
+        run_job = _run_walk_forward
+    else:
+        jobs = [(model_key, fold, train_idx, test_idx) for model_key in models for fold, (train_idx, test_idx) in folds]
+        run_job = _run_fold
+
+    results: List[Any]
+    if n_jobs is None:
+        # Serial, models keep their own n_jobs defaults.
+        _init_worker(X, y)
+        results = [run_job(*job, n_jobs=None) for job in jobs]
+    else:
+        workers, inner = split_core_budget(n_jobs, len(jobs))
+        if workers == 1:
+            _init_worker(X, y)
+            results = [run_job(*job, n_jobs=inner) for job in jobs]
+        else:
+            # Spans of the jobs themselves are recorded in the workers' processes.
+            with span("cv_pool", rows=len(jobs)), ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(X, y)
+            ) as pool:
+                futures = [pool.submit(run_job, *job, n_jobs=inner) for job in jobs]
+                # Collect in submission order so output matches the serial run.
+                results = [f.result() for f in futures]
+
+    records: List[Dict[str, Any]] = [r for res in results for r in res] if incremental else results
 
     folds_df = pd.DataFrame(records)
 
@@ -107,6 +185,12 @@ def run_cross_validation(
     print("\nCross-validation summary (TimeSeriesSplit):")
     print(summary_df)
 
+    if incremental:
+        deferred = folds_df[folds_df["pending_rows"] > 0]
+        for model_key, group in deferred.groupby("model"):
+            print(f"{model_key}: {len(group)} fold(s) evaluated with single-class new rows not learned yet "
+                  f"(carried over to the next fold; folds {group['fold'].tolist()})")
+
     return folds_df, summary_df
 
 
@@ -0,0 +1,138 @@
+"""
+In-process dataset and split sharing.
+
+Every training entry point used to call prepare_dataset() and
+train_test_split() on its own, so one `compare` run parsed the data and
+computed the same stratified split three times. A DatasetContext loads X/y
+once per (path, windows) and caches holdout splits per (test_size, seed) as
+index arrays; callers slice with .iloc only when they actually need frames.
+
+Usage:
+    ctx = get_context()
+    split = ctx.split(test_size=0.2, seed=42)        # index arrays
+    X_train, X_test, y_train, y_test = ctx.train_test(0.2, 42)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from preprocess import DATA_PATH, prepare_dataset
+from profiling import span
+from window_features import prepare_window_dataset
+
+
+@dataclass(frozen=True)
+class HoldoutSplit:
+    """
+    Stratified holdout split expressed as positional row indices.
+    """
+    train_idx: np.ndarray
+    test_idx: np.ndarray
+
+
+class DatasetContext:
+    """
+    Lazily loaded X/y plus a cache of holdout splits.
+    """
+
+    def __init__(
+        self,
+        path: Path | str = DATA_PATH,
+        windows: Sequence[int] | None = None,
+        compact: bool = False,
+    ) -> None:
+        self.path = Path(path)
+        self.windows = tuple(windows) if windows else None
+        self.compact = compact
+        self._X: pd.DataFrame | None = None
+        self._y: pd.Series | None = None
+        self._splits: Dict[Tuple[float, int], HoldoutSplit] = {}
+
+    def _load(self) -> None:
+        if self.windows:
+            self._X, self._y = prepare_window_dataset(self.path, windows=self.windows, compact=self.compact)
+        else:
+            self._X, self._y = prepare_dataset(self.path, compact=self.compact)
+
+    @property
+    def X(self) -> pd.DataFrame:
+        if self._X is None:
+            self._load()
+        return self._X
+
+    @property
+    def y(self) -> pd.Series:
+        if self._y is None:
+            self._load()
+        return self._y
+
+    def split(self, test_size: float, seed: int) -> HoldoutSplit:
+        """
+        Stratified holdout split, computed once per (test_size, seed).
+
+        Splitting positions gives exactly the same rows as splitting X/y
+        directly with the same arguments.
+        """
+        key = (float(test_size), int(seed))
+        split = self._splits.get(key)
+        if split is None:
+            with span("train_test_split", rows=len(self.y)):
+                train_idx, test_idx = train_test_split(
+                    np.arange(len(self.y)),
+                    test_size=test_size,
+                    random_state=seed,
+                    stratify=self.y,
+                )
+            split = HoldoutSplit(train_idx=train_idx, test_idx=test_idx)
+            self._splits[key] = split
+        return split
+
+    def train_test(
+        self, test_size: float, seed: int
+    ) -> tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+        """
+        Materialize the holdout split as (X_train, X_test, y_train, y_test).
+        """
+        split = self.split(test_size, seed)
+        X, y = self.X, self.y
+        return (
+            X.iloc[split.train_idx],
+            X.iloc[split.test_idx],
+            y.iloc[split.train_idx],
+            y.iloc[split.test_idx],
+        )
+
+
+_CONTEXTS: Dict[Tuple[str, Tuple[int, ...] | None, bool], DatasetContext] = {}
+
+
+def get_context(
+    path: Path | str = DATA_PATH,
+    windows: Sequence[int] | None = None,
+    compact: bool = False,
+) -> DatasetContext:
+    """
+    Process-wide DatasetContext for (path, windows, compact).
+
+    compact=True stores X/y with the compact dtype schema (dtype_schema.py).
+    """
+    key = (Path(path).resolve().as_posix(), tuple(windows) if windows else None, bool(compact))
+    ctx = _CONTEXTS.get(key)
+    if ctx is None:
+        ctx = DatasetContext(path, windows, compact=compact)
+        _CONTEXTS[key] = ctx
+    return ctx
+
+
+def clear_contexts() -> None:
+    """
+    Drop all cached datasets and splits (e.g. after the data file changed).
+    """
+    _CONTEXTS.clear()
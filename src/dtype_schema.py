@@ -0,0 +1,200 @@
+"""
+Compact in-memory dtype schema.
+
+pandas parses every sensor column as float64 and every integer column as
+int64, which makes the modelling matrix several times larger than the data
+needs. COMPACT_SCHEMA declares the dtype of every known column:
+
+- sensor readings and cyclical encodings: float32
+- target and calendar columns:            uint8
+- date:                                   int64 epoch seconds
+
+apply_schema converts a frame at load time (see preprocess.prepare_dataset,
+DatasetContext(compact=True) and run.py --compact). Conversions are checked:
+an integer column whose values do not fit, or a timestamp that cannot be
+parsed, raises instead of silently wrapping or dropping rows.
+
+RandomForest already compares features as float32 internally, so its
+predictions do not change; LogisticRegression sees float32-rounded inputs.
+`python src/dtype_schema.py` reports memory before/after and checks that
+holdout metrics of every model stay within a tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from preprocess import DATA_PATH, FEATURES, TARGET, load_data
+from clean_data import TIME_FEATURES, add_time_features, parse_dates
+
+EPOCH = "epoch_s"
+
+COMPACT_SCHEMA: Dict[str, str] = {
+    **{col: "float32" for col in FEATURES},
+    TARGET: "uint8",
+    "hour": "uint8",
+    "dayofweek": "uint8",
+    "is_weekend": "uint8",
+    "hour_sin": "float32",
+    "hour_cos": "float32",
+    "date": EPOCH,
+}
+
+# Largest allowed absolute change of any holdout metric in the check.
+DEFAULT_TOLERANCE = 0.005
+
+
+def to_epoch_seconds(values: pd.Series) -> pd.Series:
+    """
+    Timestamps (strings or datetime64) as int64 seconds since 1970-01-01.
+    """
+    stamps = values if pd.api.types.is_datetime64_any_dtype(values) else parse_dates(values.astype(str))
+    if stamps.isna().any():
+        raise ValueError(f"Column '{values.name}': {int(stamps.isna().sum())} timestamps could not be parsed.")
+    return pd.Series(stamps.to_numpy("datetime64[s]").astype(np.int64), index=values.index, name=values.name)
+
+
+def _to_int(values: pd.Series, dtype: str) -> pd.Series:
+    info = np.iinfo(dtype)
+    arr = values.to_numpy()
+    if np.issubdtype(arr.dtype, np.floating) and (np.isnan(arr).any() or not np.array_equal(arr, np.round(arr))):
+        raise ValueError(f"Column '{values.name}' has missing or non-integer values; cannot store as {dtype}.")
+    if arr.size and (arr.min() < info.min or arr.max() > info.max):
+        raise ValueError(f"Column '{values.name}' has values outside the {dtype} range [{info.min}, {info.max}].")
+    return values.astype(dtype)
+
+
+def apply_schema(
+    df: pd.DataFrame,
+    schema: Dict[str, str] = COMPACT_SCHEMA,
+    default_float: str | None = "float32",
+) -> pd.DataFrame:
+    """
+    Return df with every column in `schema` converted to its declared dtype.
+
+    Float columns not in the schema (e.g. window features) are converted to
+    `default_float`; other columns are kept as they are.
+    """
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        dtype = schema.get(col)
+        if dtype is None and default_float and pd.api.types.is_float_dtype(values):
+            dtype = default_float
+
+        if dtype is None or str(values.dtype) == dtype:
+            out[col] = values
+        elif dtype == EPOCH:
+            out[col] = to_epoch_seconds(values)
+        elif np.issubdtype(np.dtype(dtype), np.integer):
+            out[col] = _to_int(values, dtype)
+        else:
+            out[col] = values.astype(dtype)
+
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_bytes(obj: pd.DataFrame | pd.Series) -> int:
+    """
+    Deep memory usage of a frame or series, index included.
+    """
+    usage = obj.memory_usage(index=True, deep=True)
+    return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-column dtype and bytes before/after a schema conversion.
+
+    Returns:
+        DataFrame with column, dtype_before, dtype_after, bytes_before,
+        bytes_after, plus a TOTAL row
+    """
+    rows = [{
+        "column": col,
+        "dtype_before": str(before[col].dtype),
+        "dtype_after": str(after[col].dtype),
+        "bytes_before": int(before[col].memory_usage(index=False, deep=True)),
+        "bytes_after": int(after[col].memory_usage(index=False, deep=True)),
+    } for col in before.columns]
+    rows.append({
+        "column": "TOTAL",
+        "dtype_before": "",
+        "dtype_after": "",
+        "bytes_before": memory_bytes(before),
+        "bytes_after": memory_bytes(after),
+    })
+    return pd.DataFrame(rows)
+
+
+def metrics_check(tolerance: float = DEFAULT_TOLERANCE, test_size: float = 0.2, seed: int = 42) -> pd.DataFrame:
+    """
+    Holdout metrics of every model on float64 vs compact features.
+
+    Returns:
+        DataFrame with model, metric, full, compact, abs_diff, ok
+    """
+    from dataset_context import DatasetContext
+    from cross_validation import MODEL_BUILDERS
+    from metrics import compute_metrics
+
+    results = {}
+    for compact in (False, True):
+        ctx = DatasetContext(DATA_PATH, compact=compact)
+        X_train, X_test, y_train, y_test = ctx.train_test(test_size, seed)
+        for model_key, build_fn in MODEL_BUILDERS.items():
+            model = build_fn(random_state=seed)
+            model.fit(X_train, y_train)
+            results[(model_key, compact)] = compute_metrics(y_test, model.predict(X_test)).to_row(model_key)
+
+    rows = []
+    for model_key in MODEL_BUILDERS:
+        full, compact = results[(model_key, False)], results[(model_key, True)]
+        for metric in ("accuracy", "precision_1", "recall_1", "f1_1"):
+            diff = abs(compact[metric] - full[metric])
+            rows.append({
+                "model": model_key,
+                "metric": metric,
+                "full": full[metric],
+                "compact": compact[metric],
+                "abs_diff": diff,
+                "ok": diff <= tolerance,
+            })
+    return pd.DataFrame(rows)
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Memory report and metric check for the compact dtype schema")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Max abs change of any holdout metric")
+    parser.add_argument("--skip-metrics", action="store_true", help="Only print the memory report")
+    args = parser.parse_args(argv)
+
+    # As loaded: date as text, sensors as parsed by pandas, calendar columns added.
+    raw = load_data(DATA_PATH)
+    df = pd.concat([raw[["date"] + FEATURES + [TARGET]], add_time_features(raw)[TIME_FEATURES]], axis=1)
+    report = memory_report(df, apply_schema(df))
+
+    print("Memory (bytes, deep):\n")
+    print(report.to_string(index=False))
+    total = report.iloc[-1]
+    print(f"\nTotal: {total['bytes_before'] / 1e6:.2f} MB -> {total['bytes_after'] / 1e6:.2f} MB "
+          f"({total['bytes_before'] / total['bytes_after']:.1f}x smaller)")
+
+    if args.skip_metrics:
+        return
+
+    check = metrics_check(tolerance=args.tolerance)
+    print(f"\nHoldout metrics, float64 vs compact (tolerance {args.tolerance}):\n")
+    print(check.to_string(index=False))
+
+    if not check["ok"].all():
+        raise SystemExit(f"Metrics changed by more than {args.tolerance} with the compact schema.")
+    print("\nOK: all metrics within tolerance.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,164 @@
 """
-Random Forest feature importance visualization.
+Feature importance analysis.
+
+Methods:
+- impurity (default): RandomForest feature_importances_
+- permutation: model-agnostic drop in holdout accuracy when one column is
+  shuffled. Each registry model is fitted once; shuffled copies are scored
+  in batches (all repeats of one feature in a single predict call) from one
+  preallocated buffer per worker, and features run in parallel.
 
 Output:
 results/feature_importance.png
+results/permutation_importance.csv / .png (permutation method)
 """
 
 from __future__ import annotations
 
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
-from sklearn.model_selection import train_test_split
-
-from preprocess import prepare_dataset, FEATURES
+from preprocess import FEATURES
+from dataset_context import DatasetContext, get_context
 from train_random_forest import build_model
+from cross_validation import MODEL_BUILDERS
+from parallel import build_with_n_jobs, split_core_budget
 
 RESULTS_DIR = Path("results")
-RESULTS_DIR.mkdir(exist_ok=True)
 OUT_PATH = RESULTS_DIR / "feature_importance.png"
+PERM_CSV_PATH = RESULTS_DIR / "permutation_importance.csv"
+PERM_PNG_PATH = RESULTS_DIR / "permutation_importance.png"
 
+# Upper bound on rows in the permutation buffer (repeats are batched up to this).
+MAX_BATCH_ROWS = 1_000_000
 
-def main() -> None:
-    X, y = prepare_dataset()
+# Worker-side state, set once per process by _init_worker.
+_WORKER: Dict[str, Any] = {}
 
-    # Holdout split only for fitting a representative model
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+
+def _init_worker(model, X: np.ndarray, y: np.ndarray, n_repeats: int, seed: int) -> None:
+    n = len(X)
+    batch = max(1, min(n_repeats, MAX_BATCH_ROWS // max(n, 1)))
+    _WORKER.update(
+        model=model,
+        X=X,
+        y=y,
+        n_repeats=n_repeats,
+        seed=seed,
+        batch=batch,
+        # One buffer per worker: `batch` stacked copies of X, reused for every feature.
+        buffer=np.tile(X, (batch, 1)),
     )
 
+
+def _permuted_scores(j: int) -> np.ndarray:
+    """
+    Accuracy for every repeat with column j shuffled.
+    """
+    model, X, y = _WORKER["model"], _WORKER["X"], _WORKER["y"]
+    n_repeats, batch, buffer = _WORKER["n_repeats"], _WORKER["batch"], _WORKER["buffer"]
+    n = len(X)
+
+    # Seeded per feature, so results do not depend on worker scheduling.
+    rng = np.random.default_rng([_WORKER["seed"], j])
+    scores = np.empty(n_repeats)
+
+    for start in range(0, n_repeats, batch):
+        k = min(batch, n_repeats - start)
+        view = buffer[: k * n]
+        for r in range(k):
+            view[r * n : (r + 1) * n, j] = X[rng.permutation(n), j]
+
+        y_pred = model.predict(view).reshape(k, n)
+        scores[start : start + k] = (y_pred == y).mean(axis=1)
+
+        # Restore the column for the next feature.
+        view[:, j] = np.tile(X[:, j], k)
+
+    return scores
+
+
+def permutation_importance(
+    model,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    n_repeats: int = 10,
+    seed: int = 42,
+    n_jobs: int | None = None,
+) -> pd.DataFrame:
+    """
+    Permutation importance of every column of X_test for a fitted model.
+
+    n_jobs=None runs the features serially; otherwise the core budget is
+    split between feature workers and the model's own n_jobs.
+
+    Returns:
+        DataFrame with feature index, importance_mean, importance_std
+        (importance = baseline accuracy - shuffled accuracy)
+    """
+    X_test = np.ascontiguousarray(X_test, dtype=np.float64)
+    y_test = np.asarray(y_test)
+    n_features = X_test.shape[1]
+
+    baseline = float((model.predict(X_test) == y_test).mean())
+
+    if n_jobs is None:
+        # Serial, the model keeps its own n_jobs default.
+        workers = 1
+    else:
+        workers, inner = split_core_budget(n_jobs, n_features)
+        if hasattr(model, "n_jobs"):
+            # Every worker gets its share of the budget, not all cores.
+            model.set_params(n_jobs=inner)
+
+    initargs = (model, X_test, y_test, n_repeats, seed)
+    if workers == 1:
+        _init_worker(*initargs)
+        scores = [_permuted_scores(j) for j in range(n_features)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            scores = list(pool.map(_permuted_scores, range(n_features)))
+
+    drops = baseline - np.vstack(scores)
+    return pd.DataFrame({
+        "feature_idx": np.arange(n_features),
+        "baseline_accuracy": baseline,
+        "importance_mean": drops.mean(axis=1),
+        "importance_std": drops.std(axis=1),
+    })
+
+
+def run_permutation(
+    ctx: DatasetContext,
+    models: List[str],
+    n_repeats: int,
+    n_jobs: int | None,
+) -> pd.DataFrame:
+    X_train, X_test, y_train, y_test = ctx.train_test(test_size=0.2, seed=42)
+
+    frames = []
+    for model_key in models:
+        model = build_with_n_jobs(MODEL_BUILDERS[model_key], n_jobs, random_state=42)
+        model.fit(X_train.to_numpy(), y_train.to_numpy())
+
+        fi = permutation_importance(model, X_test.to_numpy(), y_test.to_numpy(), n_repeats=n_repeats, n_jobs=n_jobs)
+        fi.insert(0, "model", model_key)
+        fi.insert(1, "feature", [X_test.columns[i] for i in fi["feature_idx"]])
+        frames.append(fi.drop(columns=["feature_idx"]))
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def main_impurity(ctx: DatasetContext) -> None:
+    # Holdout split only for fitting a representative model
+    X_train, X_test, y_train, y_test = ctx.train_test(test_size=0.2, seed=42)
+
     model = build_model(random_state=42)
     model.fit(X_train, y_train)
 
@@ -48,5 +178,42 @@ def main() -> None:
     print(f"\nSaved: {OUT_PATH.as_posix()}")
 
 
+def main_permutation(ctx: DatasetContext, models: List[str], n_repeats: int, n_jobs: int | None) -> None:
+    fi = run_permutation(ctx, models, n_repeats, n_jobs)
+    fi.to_csv(PERM_CSV_PATH, index=False)
+
+    print(f"\nPermutation importance (holdout accuracy drop, {n_repeats} repeats):")
+    for model_key, group in fi.groupby("model", sort=False):
+        print(f"\n{model_key}:")
+        for _, row in group.sort_values("importance_mean", ascending=False).iterrows():
+            print(f"{row['feature']:>14}: {row['importance_mean']:.6f} +/- {row['importance_std']:.6f}")
+
+    table = fi.pivot(index="feature", columns="model", values="importance_mean").reindex(columns=models)
+    table.plot.bar(rot=45)
+    plt.title("Permutation Importance (accuracy drop)")
+    plt.tight_layout()
+    plt.savefig(PERM_PNG_PATH)
+
+    print(f"\nSaved: {PERM_CSV_PATH.as_posix()}")
+    print(f"Saved: {PERM_PNG_PATH.as_posix()}")
+
+
+def main(context: DatasetContext | None = None, argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Feature importance analysis")
+    parser.add_argument("--method", choices=["impurity", "permutation"], default="impurity")
+    parser.add_argument("--models", nargs="+", default=["rf", "logreg"], choices=MODEL_BUILDERS.keys())
+    parser.add_argument("--repeats", type=int, default=10, help="Shuffles per feature (permutation)")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Core budget for parallel features (-1 = all cores)")
+    args = parser.parse_args(argv)
+    RESULTS_DIR.mkdir(exist_ok=True)
+
+    ctx = context or get_context()
+
+    if args.method == "impurity":
+        main_impurity(ctx)
+    else:
+        main_permutation(ctx, args.models, args.repeats, args.n_jobs)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
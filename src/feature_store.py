@@ -0,0 +1,280 @@
+"""
+Incremental feature store for derived time and window features.
+
+The derived features of a raw CSV (clean_data.TIME_FEATURES and the trailing
+window statistics of window_features.py) are persisted next to the data, so
+training and scoring jobs read them ready-made instead of recomputing the
+whole history on every run:
+
+    <csv dir>/.cache/features/<stem>-<path hash>-w<windows>/
+        meta.json               columns, windows, watermark, parts
+        p00000/c000.npy, ...    one file per column, one directory per update
+        p00001/...
+
+The watermark records how far the raw file has been processed: raw rows
+consumed, the first and last row id and the last timestamp. An update
+compares the raw file against it:
+
+- same rows                 -> nothing to do
+- rows appended             -> features of the new rows only; the window
+                               statistics re-read the last max(windows) - 1
+                               rows before the watermark (the boundary
+                               overlap), so they match a full recompute
+- watermark rows changed    -> full rebuild (file rewritten or truncated)
+
+Only the rows at the watermark are compared (a rewrite that keeps the
+first/last id and timestamp in place is not detected).
+
+Store rows follow clean_data: rows whose timestamp, features or target are
+missing are dropped, after the window statistics have been computed over
+the raw row sequence (as in window_features.prepare_window_dataset). Rows
+whose windows are not complete yet (the first max(windows) - 1) have no
+store row.
+
+Usage:
+    python src/feature_store.py [--input data/occupancy.csv] [--windows 5 15]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from preprocess import DATA_PATH, FEATURES, TARGET
+from clean_data import TIME_FEATURES, load_raw, parse_dates, time_feature_columns
+from dataset_cache import CACHE_DIRNAME
+from window_features import DEFAULT_WINDOWS, build_window_features, window_feature_names
+from profiling import span
+
+STORE_DIRNAME = "features"
+
+# Bump when the store layout changes.
+STORE_VERSION = 1
+
+# Updates append one part each; past this many parts they are merged into one.
+MAX_PARTS = 64
+
+
+def store_dir(
+    path: Path | str,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    cache_dir: Path | str | None = None,
+) -> Path:
+    """
+    Store directory of a raw CSV and a set of window lengths.
+    """
+    path = Path(path)
+    root = path.parent / CACHE_DIRNAME if cache_dir is None else Path(cache_dir)
+    path_hash = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:8]
+    suffix = "-".join(str(int(w)) for w in windows)
+    return root / STORE_DIRNAME / f"{path.stem}-{path_hash}-w{suffix}"
+
+
+def _read_meta(root: Path) -> Dict[str, Any] | None:
+    try:
+        with open(root / "meta.json", "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == STORE_VERSION else None
+
+
+def _write_meta(root: Path, meta: Dict[str, Any]) -> None:
+    # The meta file is the commit point of an update: write it atomically.
+    tmp = root / f"meta.json.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, indent=2)
+    os.replace(tmp, root / "meta.json")
+
+
+def _watermark(raw: pd.DataFrame) -> Dict[str, Any]:
+    return {
+        "rows": int(len(raw)),
+        "first_id": str(raw["id"].iloc[0]) if len(raw) else None,
+        "last_id": str(raw["id"].iloc[-1]) if len(raw) else None,
+        "last_date": str(raw["date"].iloc[-1]) if len(raw) else None,
+    }
+
+
+def _appended_from(raw: pd.DataFrame, watermark: Dict[str, Any]) -> int | None:
+    """
+    First new raw row if raw only grew past the watermark, else None.
+    """
+    n = watermark["rows"]
+    if n == 0 or len(raw) < n:
+        return None
+    if _watermark(raw.iloc[:n]) != watermark:
+        return None
+    return n
+
+
+def _derive(raw: pd.DataFrame, start: int, windows: List[int]) -> pd.DataFrame:
+    """
+    Store rows for raw rows [start, len(raw)), reading the window overlap
+    before start.
+    """
+    first_out = max(start, max(windows) - 1)
+    lo = first_out - (max(windows) - 1)
+    segment = raw.iloc[lo:]
+
+    values = segment[FEATURES].apply(pd.to_numeric, errors="coerce")
+    win = build_window_features(values, FEATURES, windows)
+
+    rows = segment.iloc[len(segment) - len(win):]
+    out = pd.DataFrame({"row": np.arange(first_out, first_out + len(win), dtype=np.int64)}, index=win.index)
+    out["id"] = pd.to_numeric(rows["id"], errors="coerce")
+    out["date"] = parse_dates(rows["date"].astype(str))
+    out[FEATURES] = values.iloc[len(segment) - len(win):]
+    out[TARGET] = pd.to_numeric(rows[TARGET], errors="coerce")
+    out = out.dropna(subset=["id", "date"] + FEATURES + [TARGET])
+
+    for name, col in time_feature_columns(out["date"]).items():
+        out[name] = col
+    if pd.api.types.is_float_dtype(out[TARGET]):
+        out[TARGET] = out[TARGET].astype(np.uint8)
+    if pd.api.types.is_float_dtype(out["id"]):
+        out["id"] = out["id"].astype(np.int64)
+
+    return pd.concat([out, win.loc[out.index]], axis=1).reset_index(drop=True)
+
+
+def _write_part(root: Path, name: str, frame: pd.DataFrame) -> Dict[str, Any]:
+    tmp = root / f".{name}-{uuid.uuid4().hex}.tmp"
+    tmp.mkdir(parents=True)
+    for i, col in enumerate(frame.columns):
+        np.save(tmp / f"c{i:03d}.npy", frame[col].to_numpy(), allow_pickle=False)
+    os.replace(tmp, root / name)
+    return {"dir": name, "rows": int(len(frame))}
+
+
+def _read_parts(root: Path, meta: Dict[str, Any]) -> pd.DataFrame:
+    columns = meta["columns"]
+    data = {}
+    for i, col in enumerate(columns):
+        arrays = [np.load(root / part["dir"] / f"c{i:03d}.npy", allow_pickle=False) for part in meta["parts"]]
+        data[col] = np.concatenate(arrays) if len(arrays) != 1 else arrays[0]
+    return pd.DataFrame(data, columns=columns)
+
+
+def _remove_unlisted(root: Path, meta: Dict[str, Any]) -> None:
+    keep = {part["dir"] for part in meta["parts"]}
+    for entry in root.iterdir():
+        if entry.is_dir() and entry.name not in keep:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def update_store(
+    path: Path | str = DATA_PATH,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    cache_dir: Path | str | None = None,
+) -> Dict[str, Any]:
+    """
+    Bring the store of `path` up to date with the raw file.
+
+    Returns:
+        dict with rows (store rows), new_rows (store rows added by this
+        call), raw_rows, parts and mode ("current", "append" or "rebuild")
+    """
+    windows = [int(w) for w in windows]
+    window_feature_names(FEATURES, windows)  # validates the window lengths
+    root = store_dir(path, windows, cache_dir)
+    root.mkdir(parents=True, exist_ok=True)
+
+    with span("feature_store:load_raw") as sp:
+        raw = load_raw(str(path))
+        sp.rows = len(raw)
+    missing = [c for c in ["id", "date"] + FEATURES + [TARGET] if c not in raw.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}. Found: {list(raw.columns)}")
+
+    meta = _read_meta(root)
+    start = None
+    if meta is not None and meta["windows"] == windows and meta["features"] == FEATURES:
+        if _watermark(raw) == meta["watermark"]:
+            return {"rows": sum(p["rows"] for p in meta["parts"]), "new_rows": 0,
+                    "raw_rows": len(raw), "parts": len(meta["parts"]), "mode": "current"}
+        start = _appended_from(raw, meta["watermark"])
+
+    mode = "append" if start is not None else "rebuild"
+    with span(f"feature_store:{mode}", rows=len(raw) - (start or 0)):
+        new = _derive(raw, start or 0, windows)
+
+    if start is None:
+        meta = {
+            "version": STORE_VERSION,
+            "source": Path(path).as_posix(),
+            "features": FEATURES,
+            "windows": windows,
+            "columns": list(new.columns),
+            "parts": [],
+        }
+    # Number after every part on disk: a rebuild must not overwrite parts still listed in the old meta.
+    next_id = 1 + max((int(d.name[1:]) for d in root.iterdir() if d.is_dir() and d.name[1:].isdigit()), default=-1)
+    parts = list(meta["parts"])
+    if len(new) or not parts:
+        parts.append(_write_part(root, f"p{next_id:05d}", new))
+
+    if len(parts) > MAX_PARTS:
+        merged = _read_parts(root, {**meta, "parts": parts})
+        parts = [_write_part(root, f"p{next_id + 1:05d}", merged)]
+
+    meta.update(parts=parts, watermark=_watermark(raw))
+    _write_meta(root, meta)
+    _remove_unlisted(root, meta)
+
+    return {"rows": sum(p["rows"] for p in parts), "new_rows": int(len(new)),
+            "raw_rows": len(raw), "parts": len(parts), "mode": mode}
+
+
+def load_features(
+    path: Path | str = DATA_PATH,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    cache_dir: Path | str | None = None,
+    update: bool = True,
+) -> pd.DataFrame:
+    """
+    All store rows of `path` (updated first unless update=False).
+
+    Returns:
+        DataFrame with row (raw row position), id, date, FEATURES, TARGET,
+        TIME_FEATURES and the window feature columns, in raw row order
+    """
+    if update:
+        update_store(path, windows, cache_dir)
+    root = store_dir(path, windows, cache_dir)
+    meta = _read_meta(root)
+    if meta is None:
+        raise FileNotFoundError(f"No feature store for {Path(path).as_posix()} (windows {list(windows)}).")
+    with span("feature_store:load") as sp:
+        df = _read_parts(root, meta)
+        sp.rows = len(df)
+    return df
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Update the feature store of a raw CSV")
+    parser.add_argument("--input", default=DATA_PATH)
+    parser.add_argument("--windows", type=int, nargs="+", default=list(DEFAULT_WINDOWS), help="Sliding-window lengths")
+    args = parser.parse_args(argv)
+
+    stats = update_store(args.input, args.windows)
+    print(
+        f"{stats['mode']}: {stats['new_rows']} new feature rows, {stats['rows']} total "
+        f"({stats['raw_rows']} raw rows, {stats['parts']} part(s))"
+    )
+    print(f"Store: {store_dir(args.input, args.windows).as_posix()}")
+    print(f"Columns: id, date, {', '.join(FEATURES + [TARGET] + TIME_FEATURES)}, "
+          f"{len(window_feature_names(FEATURES, args.windows))} window features")
+
+
+if __name__ == "__main__":
+    main()
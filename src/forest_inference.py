@@ -0,0 +1,189 @@
+"""
+Array-based RandomForest inference.
+
+sklearn scores a forest by dispatching to every tree separately, which costs
+milliseconds of Python/threading overhead per call regardless of batch size.
+FlatForest exports all trees of a fitted RandomForestClassifier into a few
+contiguous numpy arrays and walks every (sample, tree) pair in lockstep:
+
+    feature[node], threshold[node]    split of every node (all trees)
+    children[node, 0/1]               left/right child; leaves point to
+                                      themselves, so extra steps are no-ops
+    proba[node, class]                normalized leaf class distribution
+    roots[tree]                       root node of every tree
+
+Results match RandomForestClassifier.predict_proba/predict exactly: inputs
+are compared as float32 (like sklearn's trees), leaf distributions are
+normalized the same way and tree outputs are summed in tree order.
+(sklearn itself may sum in a different order when n_jobs > 1, which can
+differ in the last bit.)
+
+Arrays can be saved as .npy files and memory-mapped back (see save/load).
+
+Performance profile: a single row or a small batch is scored in well under
+a millisecond (vs. ~20-35 ms of per-call overhead in sklearn), which is what
+per-minute, per-room scoring needs. The cost per row, though, is that of
+numpy gathers per (row, tree, depth) step, while sklearn's traversal is
+compiled: on the shipped rf artifacts the two break even at about 1,000
+rows (1,024 rows: ~40 ms each) and sklearn is ~4x faster on the full
+8,143-row dataset. Callers of the flat engine therefore score batches above
+FLAT_MAX_ROWS with the sklearn estimator (run.py predict, replay.py).
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Rows per chunk; bounds the (rows x trees) temporaries.
+CHUNK_ROWS = 4096
+
+# Largest batch the flat engine scores; bigger batches are faster in sklearn
+# (measured break-even ~1,000 rows for 300 fully grown trees, see above).
+FLAT_MAX_ROWS = 1024
+
+_ARRAYS = ("feature", "threshold", "children", "proba", "roots", "classes")
+
+
+class FlatForest:
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        proba: np.ndarray,
+        roots: np.ndarray,
+        classes: np.ndarray,
+        max_depth: int,
+        n_features: int,
+    ) -> None:
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.proba = proba
+        self.roots = roots
+        self.classes = classes
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self._is_leaf = children[:, 0] == np.arange(len(children))
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "FlatForest":
+        """
+        Export a fitted RandomForestClassifier (binary or multiclass, single output).
+        """
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests are supported.")
+
+        features, thresholds, children, probas, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for est in forest.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            node_ids = np.arange(n)
+            is_leaf = tree.children_left == -1
+
+            # Leaves: dummy split on feature 0 that always loops back to itself.
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            left = np.where(is_leaf, node_ids, tree.children_left) + offset
+            right = np.where(is_leaf, node_ids, tree.children_right) + offset
+            children.append(np.stack([left, right], axis=1).astype(np.intp))
+
+            # Same normalization as DecisionTreeClassifier.predict_proba.
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            probas.append(value / normalizer)
+
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            children=np.ascontiguousarray(np.concatenate(children)),
+            proba=np.ascontiguousarray(np.concatenate(probas)),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=np.asarray(forest.classes_),
+            max_depth=max_depth,
+            n_features=forest.n_features_in_,
+        )
+
+    def _leaves(self, X32: np.ndarray) -> np.ndarray:
+        """
+        Leaf node of every (tree, sample) pair, shape (n_trees, n_samples).
+        """
+        n = len(X32)
+        x_flat = X32.ravel()
+        children = self.children.ravel()
+
+        # Tree-major layout: position t * n + i is sample i in tree t.
+        leaves = np.repeat(self.roots, n)
+        active = np.arange(len(leaves))
+        nodes = leaves.copy()
+        row_offset = np.tile(np.arange(n, dtype=np.intp) * self.n_features, self.n_trees)
+
+        for _ in range(self.max_depth):
+            # go right when x > threshold (sklearn sends x <= threshold left)
+            go_right = x_flat[row_offset + self.feature[nodes]] > self.threshold[nodes]
+            nodes = children[2 * nodes + go_right]
+
+            # Drop finished paths so deep trees do not drag shallow ones along.
+            done = self._is_leaf[nodes]
+            if done.any():
+                leaves[active[done]] = nodes[done]
+                keep = ~done
+                active, nodes, row_offset = active[keep], nodes[keep], row_offset[keep]
+                if len(active) == 0:
+                    break
+
+        return leaves.reshape(self.n_trees, n)
+
+    def predict_proba(self, X) -> np.ndarray:
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        if X32.ndim != 2 or X32.shape[1] != self.n_features:
+            raise ValueError(f"Expected X with {self.n_features} features, got shape {X32.shape}")
+
+        out = np.empty((len(X32), self.proba.shape[1]), dtype=np.float64)
+        for lo in range(0, len(X32), CHUNK_ROWS):
+            hi = min(lo + CHUNK_ROWS, len(X32))
+            leaf_proba = self.proba[self._leaves(X32[lo:hi])]  # (trees, rows, classes)
+
+            # Reducing the outer axis adds tree after tree, in sklearn's order.
+            np.sum(leaf_proba, axis=0, out=out[lo:hi])
+
+        out /= self.n_trees
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def save(self, path: Path | str) -> None:
+        """
+        Write one .npy per array plus meta.json into `path`.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(path / f"{name}.npy", getattr(self, name), allow_pickle=False)
+        with open(path / "meta.json", "w", encoding="utf-8") as fh:
+            json.dump({"max_depth": self.max_depth, "n_features": self.n_features}, fh)
+
+    @classmethod
+    def load(cls, path: Path | str, mmap: bool = True) -> "FlatForest":
+        path = Path(path)
+        with open(path / "meta.json", "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        mode = "r" if mmap else None
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mode, allow_pickle=False) for name in _ARRAYS}
+        return cls(**arrays, max_depth=meta["max_depth"], n_features=meta["n_features"])
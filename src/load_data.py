@@ -1,11 +1,14 @@
 import pandas as pd
 
+from dataset_cache import cached_read_csv
+
 DATA_PATH = "data/occupancy.csv"
 
 
 def load_data() -> pd.DataFrame:
     """
     Load raw occupancy dataset from disk.
-    Returns a pandas DataFrame without any preprocessing.
+    Returns a pandas DataFrame without any preprocessing
+    (served from the columnar cache after the first read).
     """
-    return pd.read_csv(DATA_PATH)
+    return cached_read_csv(DATA_PATH)
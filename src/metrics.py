@@ -1,3 +1,12 @@
+"""
+Binary classification metrics (class 1 = occupied).
+
+Every metric is derived from the 2x2 confusion matrix, which is built in a
+single np.bincount pass over the labels. batch_metrics scores a stack of
+prediction vectors (folds, models, thresholds) with one bincount call.
+Values match sklearn's accuracy/precision/recall/f1 with zero_division=0.
+"""
+
 from __future__ import annotations
 
 from dataclasses import dataclass
@@ -5,14 +14,12 @@ from typing import Dict, Any
 
 import numpy as np
 from sklearn.metrics import (
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
     confusion_matrix,
     classification_report,
 )
 
+from profiling import profiled
+
 
 @dataclass
 class Metrics:
@@ -49,49 +56,132 @@ class Metrics:
         }
 
 
-def compute_metrics(y_true, y_pred) -> Metrics:
+def _as_binary(y, name: str) -> np.ndarray:
+    y = np.asarray(y)
+    if y.dtype == bool:
+        return y.astype(np.intp)
+    y_int = y.astype(np.intp, copy=False)
+    if y.size and (y_int.min() < 0 or y_int.max() > 1 or not np.array_equal(y_int, y)):
+        raise ValueError(f"{name} must contain only 0/1 labels.")
+    return y_int
+
+
+def confusion_counts(y_true, y_pred) -> np.ndarray:
     """
-    Compute metrics for binary classification.
+    Confusion matrix counts [tn, fp, fn, tp] in one bincount pass.
 
-    zero_division=0 prevents sklearn warnings when a model predicts
-    no samples for a given class (common for DummyClassifier baseline).
+    y_pred may be a single vector of shape (n,) or a stack of shape (k, n);
+    y_true is (n,) (shared by all rows) or (k, n).
+
+    Returns:
+        int array of shape (4,) or (k, 4)
     """
-    y_true = np.asarray(y_true)
-    y_pred = np.asarray(y_pred)
+    y_true = _as_binary(y_true, "y_true")
+    y_pred = _as_binary(y_pred, "y_pred")
+    if y_pred.ndim == 1:
+        return np.bincount(2 * y_true + y_pred, minlength=4)
 
-    acc = float(accuracy_score(y_true, y_pred))
+    k, n = y_pred.shape
+    if y_true.shape[-1] != n:
+        raise ValueError(f"y_true has {y_true.shape[-1]} labels, y_pred rows have {n}.")
 
-    p0 = float(precision_score(y_true, y_pred, pos_label=0, zero_division=0))
-    r0 = float(recall_score(y_true, y_pred, pos_label=0, zero_division=0))
-    f0 = float(f1_score(y_true, y_pred, pos_label=0, zero_division=0))
+    # Cell code 0..3 offset by 4 * row, so one bincount covers the whole stack.
+    codes = 2 * y_true + y_pred
+    codes += 4 * np.arange(k, dtype=np.intp)[:, None]
+    return np.bincount(codes.ravel(), minlength=4 * k).reshape(k, 4)
 
-    p1 = float(precision_score(y_true, y_pred, pos_label=1, zero_division=0))
-    r1 = float(recall_score(y_true, y_pred, pos_label=1, zero_division=0))
-    f1 = float(f1_score(y_true, y_pred, pos_label=1, zero_division=0))
 
-    cm = confusion_matrix(y_true, y_pred, labels=[0, 1])
-    tn, fp, fn, tp = [int(x) for x in cm.ravel()]
-
-    support_0 = int(np.sum(y_true == 0))
-    support_1 = int(np.sum(y_true == 1))
-
-    return Metrics(
-        accuracy=acc,
-        precision_0=p0,
-        recall_0=r0,
-        f1_0=f0,
-        precision_1=p1,
-        recall_1=r1,
-        f1_1=f1,
-        support_0=support_0,
-        support_1=support_1,
-        tn=tn,
-        fp=fp,
-        fn=fn,
-        tp=tp,
-    )
+def _safe_div(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    # zero_division=0, as in the sklearn calls this replaces
+    num = np.asarray(num, dtype=np.float64)
+    den = np.asarray(den, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den > 0)
+
+
+def metrics_from_counts(counts) -> Dict[str, np.ndarray]:
+    """
+    Every Metrics field from confusion counts of shape (4,) or (k, 4).
+
+    Returns:
+        dict of field name -> array of shape () or (k,)
+    """
+    counts = np.asarray(counts)
+    tn, fp, fn, tp = (counts[..., i] for i in range(4))
+
+    support_0 = tn + fp
+    support_1 = fn + tp
+    pred_0 = tn + fn
+    pred_1 = fp + tp
+
+    return {
+        "accuracy": _safe_div(tn + tp, support_0 + support_1),
+        "precision_0": _safe_div(tn, pred_0),
+        "recall_0": _safe_div(tn, support_0),
+        "f1_0": _safe_div(2 * tn, support_0 + pred_0),
+        "precision_1": _safe_div(tp, pred_1),
+        "recall_1": _safe_div(tp, support_1),
+        "f1_1": _safe_div(2 * tp, support_1 + pred_1),
+        "support_0": support_0,
+        "support_1": support_1,
+        "tn": tn,
+        "fp": fp,
+        "fn": fn,
+        "tp": tp,
+    }
+
+
+def batch_metrics(y_true, y_preds) -> Dict[str, np.ndarray]:
+    """
+    Metrics for a stack of prediction vectors, shape (k, n).
+
+    Rows can be folds, models or thresholds, as long as they share a length
+    (use a (k, n) y_true when rows have different labels).
+
+    Returns:
+        dict of Metrics field name -> array of shape (k,)
+    """
+    y_preds = np.asarray(y_preds)
+    if y_preds.ndim != 2:
+        raise ValueError(f"Expected y_preds of shape (k, n), got {y_preds.shape}")
+    return metrics_from_counts(confusion_counts(y_true, y_preds))
+
+
+def threshold_metrics(y_true, proba_1, thresholds) -> Dict[str, np.ndarray]:
+    """
+    Metrics of the rule proba_1 >= t for every threshold t.
+
+    Returns:
+        dict of Metrics field name -> array of shape (len(thresholds),)
+    """
+    proba_1 = np.asarray(proba_1, dtype=np.float64)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    return batch_metrics(y_true, proba_1[None, :] >= thresholds[:, None])
+
+
+def counts_to_metrics(counts) -> Metrics:
+    """
+    Metrics from confusion counts [tn, fp, fn, tp] of shape (4,), e.g.
+    accumulated chunk by chunk over data that does not fit in memory.
+    """
+    values = metrics_from_counts(counts)
+    return Metrics(**{
+        name: int(v) if np.issubdtype(np.asarray(v).dtype, np.integer) else float(v)
+        for name, v in values.items()
+    })
+
+
+@profiled("compute_metrics")
+def compute_metrics(y_true, y_pred) -> Metrics:
+    """
+    Compute metrics for binary classification.
+
+    zero_division=0: a class that is never predicted (common for the
+    DummyClassifier baseline) gets precision/F1 of 0 instead of a warning.
+    """
+    return counts_to_metrics(confusion_counts(y_true, y_pred))
 
 
+@profiled("pretty_print")
 def pretty_print(y_true, y_pred) -> None:
     cm = confusion_matrix(y_true, y_pred, labels=[0, 1])
     print("Confusion matrix:\n", cm)
@@ -0,0 +1,59 @@
+"""
+Lazy registry of model builders.
+
+Maps a model key to the build_model function of its train_* module. A
+module (and with it the scikit-learn estimator it builds) is imported the
+first time its key is looked up, so listing the keys (argparse choices,
+`run.py --help`) or running one model imports nothing for the others.
+
+    MODEL_REGISTRY["rf"]        # imports train_random_forest on first use
+    list(MODEL_REGISTRY)        # keys only, no imports
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Any, Callable, Dict, Iterator, Mapping
+
+# key -> "module:function" of the builder
+MODEL_SPECS: Dict[str, str] = {
+    "rf": "train_random_forest:build_model",
+    "logreg": "train_logistic:build_model",
+    "dummy": "train_dummy:build_model",
+    "sgd": "train_sgd:build_model",
+    "hgb": "train_hist_gb:build_model",
+}
+
+
+class LazyRegistry(Mapping[str, Callable[..., Any]]):
+    """
+    Read-only mapping that imports each builder on first access.
+    """
+
+    def __init__(self, specs: Dict[str, str]) -> None:
+        self._specs = dict(specs)
+        self._loaded: Dict[str, Callable[..., Any]] = {}
+
+    def __getitem__(self, key: str) -> Callable[..., Any]:
+        builder = self._loaded.get(key)
+        if builder is None:
+            module_name, _, attr = self._specs[key].partition(":")
+            builder = getattr(importlib.import_module(module_name), attr)
+            self._loaded[key] = builder
+        return builder
+
+    def __contains__(self, key: object) -> bool:
+        # Mapping's default would look the key up (and import the builder).
+        return key in self._specs
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def __repr__(self) -> str:
+        return f"LazyRegistry({list(self._specs)}, loaded={list(self._loaded)})"
+
+
+MODEL_REGISTRY = LazyRegistry(MODEL_SPECS)
@@ -0,0 +1,53 @@
+"""
+Core-budget helpers for process-level parallelism.
+
+Several scripts run independent jobs (CV folds, ablation subsets, ...) in a
+process pool while some models (RandomForest) are themselves multi-threaded.
+To avoid oversubscription, a global budget of cores is split into
+`workers` processes x `inner` threads per model.
+"""
+
+from __future__ import annotations
+
+import inspect
+import os
+from typing import Any, Callable
+
+
+def resolve_n_jobs(n_jobs: int | None) -> int:
+    """
+    Translate an sklearn-style n_jobs value into a positive core count.
+
+    None or -1 -> all cores, -2 -> all but one, etc.
+    """
+    cpus = os.cpu_count() or 1
+    if n_jobs is None:
+        return cpus
+    if n_jobs == 0:
+        raise ValueError("n_jobs must not be 0")
+    if n_jobs < 0:
+        return max(1, cpus + 1 + n_jobs)
+    return n_jobs
+
+
+def split_core_budget(n_jobs: int | None, n_tasks: int) -> tuple[int, int]:
+    """
+    Split a core budget between outer worker processes and inner model threads.
+
+    Returns:
+        workers: number of processes to run tasks in
+        inner: n_jobs to give each model inside a worker
+    """
+    budget = resolve_n_jobs(n_jobs)
+    workers = max(1, min(budget, n_tasks))
+    inner = max(1, budget // workers)
+    return workers, inner
+
+
+def build_with_n_jobs(build_fn: Callable[..., Any], n_jobs: int | None, **kwargs: Any) -> Any:
+    """
+    Call a build_model function, passing n_jobs only if it accepts one.
+    """
+    if n_jobs is not None and "n_jobs" in inspect.signature(build_fn).parameters:
+        kwargs["n_jobs"] = n_jobs
+    return build_fn(**kwargs)
@@ -0,0 +1,425 @@
+"""
+Partitioned per-room training and scoring.
+
+Multi-room inputs (a room / sensor-id column, e.g. data written by
+synthetic_data.py) need one model per room. The input is grouped once, in a
+single streaming pass, into per-room partitions:
+
+    <csv dir>/.cache/partitions/<stem>-<sha16>-<room col>/
+        meta.json            features, dtype, rooms (value, dir, rows)
+        p00000/X.bin         features, row-major (n_rows x n_features)
+        p00000/y.bin         target (uint8), if the input has one
+        p00000/row.bin       position of every row in the input (int64)
+
+Partitions are reused while the input is unchanged. Every room is then an
+independent job in a process pool (core budget split as in parallel.py,
+largest rooms first). A worker memory-maps only its own partition, so
+worker memory is bounded by the largest room, not by the input size.
+
+Outputs:
+- training: one artifact per room (models/rooms/<room>/<model>/<version>/)
+  and an aggregated metrics table (one row per room plus pooled metrics).
+  A room whose rows hold a single class gets no model; its class is
+  recorded in models/rooms/<room>/<model>/single_class.json instead
+- scoring: predictions of every room's latest artifact, in input order.
+  Single-class rooms are predicted as their recorded class; rooms with
+  neither an artifact nor a recorded class are left unscored (empty
+  prediction) and reported in the summary
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from preprocess import FEATURES, TARGET
+from clean_data import detect_schema
+from dataset_cache import CACHE_DIRNAME, file_sha256
+from artifacts import ARTIFACTS_DIR, save_artifact, resolve_artifact, load_artifact
+from metrics import compute_metrics, confusion_counts, metrics_from_counts
+from parallel import build_with_n_jobs, split_core_budget
+
+ROOM_COL = "room"
+PARTITIONS_DIRNAME = "partitions"
+
+# Rows read per chunk while partitioning (bounds memory of the grouping pass).
+CHUNK_ROWS = 500_000
+
+# Bump when the partition layout changes.
+PARTITION_VERSION = 1
+
+# Written instead of an artifact when a room's training rows hold one class.
+SINGLE_CLASS_FILE = "single_class.json"
+
+
+def rooms_root(artifacts_dir: Path | str = ARTIFACTS_DIR) -> Path:
+    return Path(artifacts_dir) / "rooms"
+
+
+def room_artifacts_dir(room: Any, artifacts_dir: Path | str = ARTIFACTS_DIR) -> Path:
+    """
+    Artifact root of one room (safe directory name for any room value).
+    """
+    return rooms_root(artifacts_dir) / re.sub(r"[^A-Za-z0-9_.-]", "_", str(room))
+
+
+def _partition_root(path: Path, room_col: str, sha: str, dtype: str) -> Path:
+    return path.parent / CACHE_DIRNAME / PARTITIONS_DIRNAME / f"{path.stem}-{sha[:16]}-{room_col}-{dtype}"
+
+
+def partition_dataset(
+    path: Path | str,
+    room_col: str = ROOM_COL,
+    features: List[str] = FEATURES,
+    dtype: str = "float64",
+    chunk_rows: int = CHUNK_ROWS,
+) -> Path:
+    """
+    Group a CSV by room into memory-mappable partitions (one streaming pass).
+
+    Returns:
+        partition directory (contains meta.json)
+    """
+    path = Path(path)
+    sha = file_sha256(path)
+    root = _partition_root(path, room_col, sha, dtype)
+    if (root / "meta.json").exists():
+        return root
+
+    schema = detect_schema(path, sample_rows=chunk_rows)
+    missing = [c for c in [room_col] + list(features) if c not in schema.names]
+    if missing:
+        raise ValueError(f"Missing column(s) {missing} in {path.as_posix()}. Columns: {schema.names}")
+    has_target = TARGET in schema.names
+    usecols = [room_col] + list(features) + ([TARGET] if has_target else [])
+
+    tmp = root.with_name(f".{root.name}-{uuid.uuid4().hex}.tmp")
+    tmp.mkdir(parents=True)
+
+    rooms: Dict[Any, Dict[str, Any]] = {}
+    offset = 0
+    try:
+        reader = pd.read_csv(path, header=0, names=schema.names, index_col=False, usecols=usecols, chunksize=chunk_rows)
+        with reader:
+            for chunk in reader:
+                positions = np.arange(offset, offset + len(chunk), dtype=np.int64)
+                offset += len(chunk)
+
+                # Stable grouping keeps every room's rows in input (time) order.
+                codes, uniques = pd.factorize(chunk[room_col], sort=False)
+                order = np.argsort(codes, kind="stable")
+                bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+
+                X = chunk[features].to_numpy(dtype=dtype)
+                y = chunk[TARGET].to_numpy(dtype=np.uint8) if has_target else None
+
+                for i, room in enumerate(uniques.tolist()):
+                    rows = order[bounds[i] : bounds[i + 1]]
+                    if room not in rooms:
+                        name = f"p{len(rooms):05d}"
+                        (tmp / name).mkdir()
+                        rooms[room] = {"room": room, "dir": name, "rows": 0}
+                    # One short-lived append per room and chunk: the number of open
+                    # files does not grow with the number of rooms.
+                    part = tmp / rooms[room]["dir"]
+                    with open(part / "X.bin", "ab") as fh:
+                        fh.write(np.ascontiguousarray(X[rows]).tobytes())
+                    with open(part / "row.bin", "ab") as fh:
+                        fh.write(positions[rows].tobytes())
+                    if has_target:
+                        with open(part / "y.bin", "ab") as fh:
+                            fh.write(y[rows].tobytes())
+                    rooms[room]["rows"] += len(rows)
+
+        meta = {
+            "version": PARTITION_VERSION,
+            "source": path.as_posix(),
+            "sha256": sha,
+            "room_col": room_col,
+            "features": list(features),
+            "dtype": dtype,
+            "has_target": has_target,
+            "rows": offset,
+            "rooms": list(rooms.values()),
+        }
+        with open(tmp / "meta.json", "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, indent=2, default=str)
+    except BaseException:
+        # Do not leave a half-written partition directory behind.
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    try:
+        os.rename(tmp, root)
+    except OSError:
+        # Another process finished the same partitioning first.
+        shutil.rmtree(tmp, ignore_errors=True)
+    return root
+
+
+def read_partition_meta(root: Path | str) -> Dict[str, Any]:
+    with open(Path(root) / "meta.json", "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def load_partition(root: Path | str, entry: Dict[str, Any], meta: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Memory-map one room's partition: X (rows x features), y, row.
+    """
+    part = Path(root) / entry["dir"]
+    n, f = entry["rows"], len(meta["features"])
+    out = {
+        "X": np.memmap(part / "X.bin", dtype=meta["dtype"], mode="r", shape=(n, f)),
+        "row": np.memmap(part / "row.bin", dtype=np.int64, mode="r", shape=(n,)),
+    }
+    if meta["has_target"]:
+        out["y"] = np.memmap(part / "y.bin", dtype=np.uint8, mode="r", shape=(n,))
+    return out
+
+
+def _holdout(y: np.ndarray, test_size: float, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    idx = np.arange(len(y))
+    # Stratify when every class has enough rows for both sides of the split.
+    counts = np.bincount(y, minlength=2)
+    stratify = y if (counts >= 2).sum() == 2 else None
+    return train_test_split(idx, test_size=test_size, random_state=seed, stratify=stratify)
+
+
+def _train_room(
+    root: str,
+    entry: Dict[str, Any],
+    build_fn: Callable[..., Any],
+    model_key: str,
+    test_size: float,
+    seed: int,
+    save: bool,
+    artifacts_dir: str,
+    n_jobs: int | None,
+) -> Dict[str, Any]:
+    """
+    Fit, evaluate and save one room's model (runs in a worker process).
+    """
+    start = time.perf_counter()
+    meta = read_partition_meta(root)
+    part = load_partition(root, entry, meta)
+    X, y = part["X"], np.asarray(part["y"])
+
+    record: Dict[str, Any] = {"room": entry["room"], "model": model_key, "rows": entry["rows"]}
+    marker = room_artifacts_dir(entry["room"], artifacts_dir) / model_key / SINGLE_CLASS_FILE
+    if len(np.unique(y)) < 2:
+        if save:
+            # Lets predict-rooms score the room with its only class.
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            with open(marker, "w", encoding="utf-8") as fh:
+                json.dump({"class": int(y[0]), "rows": entry["rows"], "data_sha256": meta["sha256"]}, fh, indent=2)
+        return {**record, "status": "single_class", "seconds": time.perf_counter() - start}
+
+    train_idx, test_idx = _holdout(y, test_size, seed)
+    model = build_with_n_jobs(build_fn, n_jobs, random_state=seed)
+    model.fit(X[train_idx], y[train_idx])
+    m = compute_metrics(y[test_idx], model.predict(X[test_idx]))
+
+    if save:
+        out_dir = save_artifact(
+            model,
+            model_key,
+            features=meta["features"],
+            data_sha256=meta["sha256"],
+            metrics=m,
+            extra={"room": entry["room"], "room_col": meta["room_col"], "test_size": test_size, "seed": seed},
+            root=room_artifacts_dir(entry["room"], artifacts_dir),
+        )
+        record["artifact"] = out_dir.as_posix()
+        # The room has a model again: its latest training was not single-class.
+        marker.unlink(missing_ok=True)
+
+    return {
+        **record,
+        **m.to_row(model_key),
+        "status": "ok",
+        "n_train": len(train_idx),
+        "n_test": len(test_idx),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _score_room(
+    root: str,
+    entry: Dict[str, Any],
+    model_key: str,
+    version: str,
+    artifacts_dir: str,
+    out_dir: str,
+    n_jobs: int | None,
+) -> Dict[str, Any]:
+    """
+    Score one room's partition with its saved artifact (runs in a worker
+    process). Predictions go to a part file keyed by input row position.
+
+    Returns:
+        summary dict; status is "ok", "single_class" (predicted as the
+        recorded class) or "no_model" (unscored, file is None)
+    """
+    meta = read_partition_meta(root)
+    part = load_partition(root, entry, meta)
+    path = Path(out_dir) / f"{entry['dir']}.npz"
+    summary = {"room": entry["room"], "rows": entry["rows"]}
+
+    model_root = room_artifacts_dir(entry["room"], artifacts_dir)
+    marker = model_root / model_key / SINGLE_CLASS_FILE
+    if version == "latest" and marker.exists():
+        with open(marker, "r", encoding="utf-8") as fh:
+            label = json.load(fh)["class"]
+        row = np.asarray(part["row"])
+        np.savez(path, row=row, prediction=np.full(len(row), label, dtype=np.int64),
+                 proba_1=np.full(len(row), float(label == 1)))
+        return {**summary, "status": "single_class", "version": None, "file": path.as_posix()}
+    try:
+        artifact = resolve_artifact(model_key, version, model_root)
+    except FileNotFoundError:
+        return {**summary, "status": "no_model", "version": None, "file": None}
+
+    model, model_meta = load_artifact(artifact)
+    if list(model_meta["features"]) != meta["features"]:
+        raise ValueError(f"Room {entry['room']}: artifact features {model_meta['features']} != {meta['features']}")
+    if n_jobs is not None and hasattr(model, "n_jobs"):
+        model.n_jobs = n_jobs
+
+    X = np.asarray(part["X"])
+    arrays = {"row": np.asarray(part["row"]), "prediction": model.predict(X)}
+    if hasattr(model, "predict_proba"):
+        arrays["proba_1"] = model.predict_proba(X)[:, 1]
+
+    np.savez(path, **arrays)
+    return {**summary, "status": "ok", "version": model_meta["version"], "file": path.as_posix()}
+
+
+def _run_rooms(fn: Callable[..., Dict[str, Any]], jobs: List[tuple], n_jobs: int | None) -> List[Dict[str, Any]]:
+    """
+    Run one job per room in a process pool within the core budget; the
+    per-model core count is passed as fn's last argument.
+    """
+    workers, inner = split_core_budget(n_jobs, len(jobs))
+    if workers == 1:
+        return [fn(*job, inner) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fn, *job, inner) for job in jobs]
+        return [f.result() for f in futures]
+
+
+def _largest_first(meta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Longest jobs first, so a big room does not finish alone at the end.
+    return sorted(meta["rooms"], key=lambda e: e["rows"], reverse=True)
+
+
+def _in_room_order(meta: Dict[str, Any], results: List[Dict[str, Any]], entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    rank = {entry["dir"]: i for i, entry in enumerate(meta["rooms"])}
+    return [r for _, r in sorted(zip(entries, results), key=lambda pair: rank[pair[0]["dir"]])]
+
+
+def pooled_metrics(results: pd.DataFrame) -> Dict[str, float]:
+    """
+    Micro-averaged metrics over all trained rooms (summed confusion counts).
+    """
+    ok = results[results["status"] == "ok"]
+    counts = ok[["tn", "fp", "fn", "tp"]].to_numpy().sum(axis=0)
+    return {k: float(v) for k, v in metrics_from_counts(counts).items()}
+
+
+def train_rooms(
+    path: Path | str,
+    model_key: str,
+    build_fn: Callable[..., Any],
+    room_col: str = ROOM_COL,
+    test_size: float = 0.2,
+    seed: int = 42,
+    n_jobs: int | None = None,
+    save: bool = True,
+    artifacts_dir: Path | str = ARTIFACTS_DIR,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """
+    Train and evaluate one model per room (holdout split within each room).
+
+    Returns:
+        per-room metrics table, one row per room in input order
+    """
+    root = partition_dataset(path, room_col=room_col, dtype="float32" if compact else "float64")
+    meta = read_partition_meta(root)
+    if not meta["has_target"]:
+        raise ValueError(f"Target column '{TARGET}' not found in {Path(path).as_posix()}")
+
+    entries = _largest_first(meta)
+    jobs = [(str(root), entry, build_fn, model_key, test_size, seed, save, str(artifacts_dir)) for entry in entries]
+    results = _run_rooms(_train_room, jobs, n_jobs)
+    return pd.DataFrame(_in_room_order(meta, results, entries))
+
+
+def score_rooms(
+    path: Path | str,
+    model_key: str,
+    output_path: Path | str,
+    room_col: str = ROOM_COL,
+    version: str = "latest",
+    n_jobs: int | None = None,
+    artifacts_dir: Path | str = ARTIFACTS_DIR,
+    compact: bool = False,
+) -> pd.DataFrame:
+    """
+    Score every room with its own saved model. Predictions are written to
+    output_path in input row order (row, room, prediction[, proba_1]);
+    rows of rooms without a model have an empty prediction.
+
+    Returns:
+        per-room summary (room, rows, status, artifact version)
+    """
+    root = partition_dataset(path, room_col=room_col, dtype="float32" if compact else "float64")
+    meta = read_partition_meta(root)
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    parts_dir = output_path.with_name(f".{output_path.name}.{os.getpid()}.parts")
+    parts_dir.mkdir()
+    try:
+        entries = _largest_first(meta)
+        jobs = [(str(root), entry, model_key, version, str(artifacts_dir), str(parts_dir)) for entry in entries]
+        summary = _in_room_order(meta, _run_rooms(_score_room, jobs, n_jobs), entries)
+
+        # Every input row belongs to exactly one partition.
+        n = meta["rows"]
+        room = np.empty(n, dtype=object)
+        prediction = np.zeros(n, dtype=np.int64)
+        scored = np.zeros(n, dtype=bool)
+        proba = np.full(n, np.nan)
+        for entry, item in zip(meta["rooms"], summary):
+            rows = load_partition(root, entry, meta)["row"]
+            room[rows] = item["room"]
+            if item["file"] is None:
+                continue
+            with np.load(item["file"]) as part:
+                prediction[part["row"]] = part["prediction"]
+                scored[part["row"]] = True
+                if "proba_1" in part:
+                    proba[part["row"]] = part["proba_1"]
+
+        out = pd.DataFrame({"room": room, "prediction": pd.array(prediction, dtype="Int64")})
+        out.loc[~scored, "prediction"] = pd.NA
+        if not np.isnan(proba).all():
+            out["proba_1"] = proba
+        out.index.name = "row"
+        out.to_csv(output_path)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    return pd.DataFrame(summary).drop(columns=["file"])
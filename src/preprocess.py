@@ -16,6 +16,9 @@ from __future__ import annotations
 from pathlib import Path
 import pandas as pd
 
+from dataset_cache import cached_read_csv
+from profiling import span
+
 DATA_PATH = Path("data") / "occupancy.csv"
 
 FEATURES = [
@@ -29,37 +32,56 @@ FEATURES = [
 TARGET = "Occupancy"
 
 
-def load_data(path: Path | str = DATA_PATH) -> pd.DataFrame:
+def load_data(path: Path | str = DATA_PATH, use_cache: bool = True, compact: bool = False) -> pd.DataFrame:
     """
     Load raw occupancy dataset from CSV.
+
+    By default the CSV is parsed once and served from a memory-mapped
+    columnar cache afterwards (see dataset_cache.py). Rows appended to the
+    file are parsed on their own and added to the cache; any other change
+    rebuilds it. Columns have the dtypes of pd.read_csv; compact=True keeps
+    the cache's smaller integer dtypes (e.g. a uint8 Occupancy).
     """
     path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"Dataset not found: {path.as_posix()}")
 
-    df = pd.read_csv(path)
+    with span("load_csv") as sp:
+        df = cached_read_csv(path, compact=compact) if use_cache else pd.read_csv(path)
+        sp.rows = len(df)
 
     # Optional: some versions contain a time column. We ignore it by default.
     # (Models in this repo use only sensor features listed in FEATURES.)
     return df
 
 
-def prepare_dataset(path: Path | str = DATA_PATH) -> tuple[pd.DataFrame, pd.Series]:
+def prepare_dataset(path: Path | str = DATA_PATH, compact: bool = False) -> tuple[pd.DataFrame, pd.Series]:
     """
     Prepare full dataset for modeling.
 
+    compact=True applies dtype_schema.COMPACT_SCHEMA (float32 features,
+    uint8 target) at load time.
+
     Returns:
         X: feature matrix
         y: target vector
     """
-    df = load_data(path)
+    df = load_data(path, compact=compact)
 
     required = set(FEATURES + [TARGET])
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Missing required columns: {sorted(missing)}. Found: {list(df.columns)}")
 
-    X = df[FEATURES].copy()
-    y = df[TARGET].copy()
+    with span("prepare_dataset", rows=len(df)):
+        if compact:
+            from dtype_schema import apply_schema
+
+            # apply_schema builds new columns, so no extra copy is needed.
+            df = apply_schema(df[FEATURES + [TARGET]])
+            return df[FEATURES], df[TARGET]
+
+        X = df[FEATURES].copy()
+        y = df[TARGET].copy()
 
     return X, y
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""
+Lightweight stage instrumentation.
+
+Code marks its stages with spans:
+
+    with span("load_csv") as sp:
+        df = pd.read_csv(path)
+        sp.rows = len(df)
+
+    @profiled("fit")
+    def fit(...): ...
+
+Spans are off by default: span() then returns a shared no-op object and
+@profiled calls straight through, so instrumented code pays one global
+lookup per span. profile_run() (run.py --profile) switches recording on
+for one command and writes a JSON trace with one record per span:
+
+    name, parent, depth, start_s, wall_s, cpu_s, rows, peak_rss_mb
+    [, peak_traced_mb]  (trace_memory=True: per-span peak of traced
+                         Python/numpy allocations via tracemalloc)
+
+peak_rss_mb is the process high-water mark when the span ended (monotonic).
+tracemalloc gives true per-span peaks but slows allocation-heavy code, so it
+is opt-in. Spans are recorded in the process that runs them: jobs in worker
+processes (--n-jobs) show up as the span around the pool only.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+class Span:
+    """
+    One timed stage; `rows` may be set by the code inside the span.
+    """
+
+    __slots__ = ("name", "parent", "depth", "rows", "_t0", "_c0", "_peak", "_profiler", "record")
+
+    def __init__(self, profiler: "Profiler", name: str, rows: int | None) -> None:
+        self._profiler = profiler
+        self.name = name
+        self.rows = rows
+        self.parent: int | None = None
+        self.depth = 0
+        self._peak = 0
+        self.record: Dict[str, Any] = {}
+
+    def __enter__(self) -> "Span":
+        self._profiler._push(self)
+        self._c0 = time.process_time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        wall = time.perf_counter() - self._t0
+        cpu = time.process_time() - self._c0
+        self._profiler._pop(self, wall, cpu)
+
+
+class _NullSpan:
+    """
+    Shared stand-in used while recording is off (attribute writes ignored).
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """
+    Collects finished spans of the current process.
+    """
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.records: List[Dict[str, Any]] = []
+        self._stack: List[Span] = []
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+
+    def _push(self, sp: Span) -> None:
+        if self._stack:
+            sp.parent = self._stack[-1].record["id"]
+            sp.depth = len(self._stack)
+        sp.record = {"id": len(self.records), "start_s": time.perf_counter() - self._t0}
+        self.records.append(sp.record)
+        if self.trace_memory:
+            # Fold the peak so far into every open span, then measure this one from zero.
+            peak = tracemalloc.get_traced_memory()[1]
+            for open_span in self._stack:
+                open_span._peak = max(open_span._peak, peak)
+            tracemalloc.reset_peak()
+        self._stack.append(sp)
+
+    def _pop(self, sp: Span, wall: float, cpu: float) -> None:
+        self._stack.pop()
+        sp.record.update({
+            "name": sp.name,
+            "parent": sp.parent,
+            "depth": sp.depth,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "rows": sp.rows,
+            "peak_rss_mb": _peak_rss_mb(),
+        })
+        if self.trace_memory:
+            sp._peak = max(sp._peak, tracemalloc.get_traced_memory()[1])
+            sp.record["peak_traced_mb"] = sp._peak / 1e6
+            if self._stack:
+                self._stack[-1]._peak = max(self._stack[-1]._peak, sp._peak)
+
+    def trace(self, label: str = "") -> Dict[str, Any]:
+        return {
+            "label": label,
+            "pid": os.getpid(),
+            "wall_s": time.perf_counter() - self._t0,
+            "cpu_s": time.process_time() - self._c0,
+            "peak_rss_mb": _peak_rss_mb(),
+            "trace_memory": self.trace_memory,
+            "spans": self.records,
+        }
+
+
+_ACTIVE: Profiler | None = None
+
+
+def span(name: str, rows: int | None = None) -> Span | _NullSpan:
+    """
+    Context manager timing one stage (no-op unless recording is on).
+    """
+    if _ACTIVE is None:
+        return _NULL_SPAN
+    return Span(_ACTIVE, name, rows)
+
+
+def profiled(name: str | None = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator: run the function inside span(name or function name).
+    """
+
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _ACTIVE is None:
+                return fn(*args, **kwargs)
+            with Span(_ACTIVE, label, None):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def is_enabled() -> bool:
+    return _ACTIVE is not None
+
+
+def summarize(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Per span name: calls, total/max wall and CPU seconds, rows, peak memory.
+
+    Returns:
+        DataFrame sorted by total wall time (nested spans are included in
+        their parents' totals)
+    """
+    import pandas as pd
+
+    if not records:
+        return pd.DataFrame(columns=["name", "calls", "wall_s", "cpu_s", "max_wall_s", "rows", "peak_rss_mb"])
+    df = pd.DataFrame(records)
+    agg = {
+        "calls": ("wall_s", "size"),
+        "wall_s": ("wall_s", "sum"),
+        "cpu_s": ("cpu_s", "sum"),
+        "max_wall_s": ("wall_s", "max"),
+        "peak_rss_mb": ("peak_rss_mb", "max"),
+    }
+    if "peak_traced_mb" in df.columns:
+        agg["peak_traced_mb"] = ("peak_traced_mb", "max")
+    out = df.groupby("name", sort=False).agg(**agg).reset_index()
+    rows = pd.to_numeric(df["rows"], errors="coerce").groupby(df["name"], sort=False).sum(min_count=1)
+    out.insert(5, "rows", rows.astype("Int64").array)
+    return out.sort_values("wall_s", ascending=False, kind="stable").reset_index(drop=True)
+
+
+@contextmanager
+def profile_run(
+    trace_path: Path | str,
+    label: str = "",
+    cprofile_path: Path | str | None = None,
+    trace_memory: bool = False,
+) -> Iterator[Profiler]:
+    """
+    Record spans (and optionally a cProfile dump) for the enclosed block and
+    write the JSON trace to trace_path, also when the block raises.
+    """
+    global _ACTIVE
+    if _ACTIVE is not None:
+        raise RuntimeError("A profile_run is already active in this process.")
+
+    if trace_memory:
+        tracemalloc.start()
+    profiler = Profiler(trace_memory=trace_memory)
+    cprof = cProfile.Profile() if cprofile_path else None
+
+    _ACTIVE = profiler
+    if cprof is not None:
+        cprof.enable()
+    try:
+        with Span(profiler, label or "run", None):
+            yield profiler
+    finally:
+        if cprof is not None:
+            cprof.disable()
+        _ACTIVE = None
+        if trace_memory:
+            tracemalloc.stop()
+
+        trace = profiler.trace(label)
+        trace_path = Path(trace_path)
+        trace_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_path, "w", encoding="utf-8") as fh:
+            json.dump(trace, fh, indent=2)
+        if cprof is not None:
+            Path(cprofile_path).parent.mkdir(parents=True, exist_ok=True)
+            cprof.dump_stats(str(cprofile_path))
+
+
+def print_summary(profiler: Profiler) -> None:
+    summary = summarize(profiler.records)
+    print(f"\nProfile ({len(profiler.records)} spans):\n")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
@@ -0,0 +1,392 @@
+"""
+Accelerated asyncio replay of sensor data with end-to-end latency measurement.
+
+Streams a raw CSV (data/occupancy.csv or a multi-room file from
+synthetic_data.py) as timed events and pushes every event through the
+online pipeline a gateway would run:
+
+    producer  --(bounded asyncio.Queue)-->  consumer
+    emits each reading at its               window features per room
+    timestamp / speedup                     (streaming_features, O(1) per reading)
+                                            + model scoring in micro-batches
+
+Both run on one event loop, like a single-threaded gateway process. While
+the consumer scores, the producer cannot run; when it wakes up it emits
+every event that came due in the meantime, so a slow consumer sees bursts
+(larger micro-batches), schedule lag and late events, and a full queue
+drops events (their rooms' windows then continue without them).
+
+Measured per event:
+- latency: ingest (the moment the producer hands the event over) to
+  prediction available, in milliseconds (p50/p95/p99/max)
+- schedule lag: how far behind its replay time the event was emitted
+- late: events emitted more than --late-ms behind schedule
+- dropped: queue full (backpressure)
+- warm-up: events consumed while a room's first window is still filling
+
+Scoring uses a saved artifact (see run.py train). Artifacts trained with
+--windows get the same window features online; others score raw readings.
+
+Usage:
+    python src/run.py train --model rf --windows 5
+    python src/replay.py --model rf --speedup 600 [--input data/occupancy.csv] [--output results/replay.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from preprocess import DATA_PATH, FEATURES, TARGET
+from artifacts import ARTIFACTS_DIR
+from streaming_features import RoomStreams
+from window_features import window_feature_names
+
+DEFAULT_OUTPUT = Path("results") / "replay.json"
+ROOM_COL = "room"
+
+# Replay speed: data seconds per wall-clock second (60 = one minute of data per second).
+DEFAULT_SPEEDUP = 60.0
+# Events the queue holds before the producer starts dropping.
+QUEUE_SIZE = 10_000
+# Events scored per model call (at most; smaller when the queue holds fewer).
+BATCH_SIZE = 256
+# Emitted later than this behind schedule counts as late.
+LATE_MS = 100.0
+
+PERCENTILES = (50, 95, 99)
+
+
+class WindowStreams:
+    """
+    Online window features for several window lengths, one state per room
+    and window; columns ordered like window_features.window_feature_names.
+    """
+
+    def __init__(self, windows: Sequence[int], features: Sequence[str] = FEATURES) -> None:
+        self.windows = list(windows)
+        self._streams = [RoomStreams(w, features) for w in self.windows]
+        self.feature_names = window_feature_names(features, self.windows)
+
+    def update(self, room: Any, reading: Sequence[float]) -> np.ndarray | None:
+        rows = [streams.update(room, reading) for streams in self._streams]
+        if any(row is None for row in rows):
+            return None
+        return np.concatenate(rows) if len(rows) > 1 else rows[0].copy()
+
+
+def load_events(path: Path | str, room_col: str = ROOM_COL, limit: int | None = None) -> Dict[str, np.ndarray]:
+    """
+    Readings of a raw CSV as replay events, in timestamp order.
+
+    Returns:
+        dict with offset_s (seconds since the first event), values
+        (n x len(FEATURES)), room, target (or None)
+    """
+    from clean_data import load_raw, parse_dates
+
+    df = load_raw(str(path))
+    missing = [c for c in ["date"] + FEATURES if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}. Found: {list(df.columns)}")
+    if limit is not None:
+        df = df.iloc[:limit]
+
+    stamps = parse_dates(df["date"].astype(str))
+    keep = stamps.notna().to_numpy()
+    df, stamps = df[keep], stamps[keep]
+    ns = stamps.to_numpy().astype("datetime64[ns]").astype(np.int64)
+    order = np.argsort(ns, kind="stable")
+
+    return {
+        "offset_s": (ns[order] - ns[order][0]) / 1e9 if len(ns) else np.empty(0),
+        "values": df[FEATURES].to_numpy(dtype=np.float64)[order],
+        "room": (df[room_col].to_numpy() if room_col in df.columns else np.zeros(len(df), dtype=np.int64))[order],
+        "target": df[TARGET].to_numpy()[order] if TARGET in df.columns else None,
+    }
+
+
+def _load_scorer(model_key: str, version: str, artifacts_dir: Path | str, engine: str, batch_size: int = BATCH_SIZE):
+    """
+    (predict function on a 2D float array, windows or None, artifact meta).
+
+    The flat engine scores batches of up to FLAT_MAX_ROWS rows; if batch_size
+    allows larger ones, those go to the sklearn estimator (faster in bulk).
+    """
+    from artifacts import resolve_artifact, load_artifact, load_meta, load_flat_forest
+    from forest_inference import FLAT_MAX_ROWS
+
+    path = resolve_artifact(model_key, version, artifacts_dir)
+    meta = load_meta(path)
+
+    windows = meta.get("windows")
+    names = window_feature_names(FEATURES, windows) if windows else list(FEATURES)
+    missing = set(meta["features"]) - set(names)
+    if missing:
+        raise ValueError(f"Artifact features not available online: {sorted(missing)}")
+    order = [names.index(f) for f in meta["features"]]
+
+    flat = None
+    if engine == "flat":
+        flat = load_flat_forest(path)
+        if batch_size <= FLAT_MAX_ROWS:
+            return (lambda X: flat.predict(X[:, order])), windows, meta
+
+    import pandas as pd
+
+    model, meta = load_artifact(path)
+    # Estimators fitted on DataFrames expect the same column names.
+    columns = list(meta["features"])
+
+    def predict(X: np.ndarray) -> np.ndarray:
+        if flat is not None and len(X) <= FLAT_MAX_ROWS:
+            return flat.predict(X[:, order])
+        return model.predict(pd.DataFrame(X[:, order], columns=columns))
+
+    return predict, windows, meta
+
+
+class _Stats:
+    __slots__ = ("latency", "lag", "late", "dropped_full", "warmup", "scored", "correct", "batches")
+
+    def __init__(self) -> None:
+        self.latency: List[float] = []
+        self.lag: List[float] = []
+        self.late = 0
+        self.dropped_full = 0
+        self.warmup = 0
+        self.scored = 0
+        self.correct = 0
+        self.batches = 0
+
+
+async def _produce(
+    events: Dict[str, np.ndarray],
+    queue: asyncio.Queue,
+    stats: _Stats,
+    speedup: float,
+    late_s: float,
+    batch_size: int,
+) -> None:
+    loop = asyncio.get_running_loop()
+    offsets = events["offset_s"]
+    t0 = loop.time()
+    i, n = 0, len(offsets)
+    while i < n:
+        if speedup > 0:
+            delay = t0 + offsets[i] / speedup - loop.time()
+            # Always yield: at full speed the consumer must still get turns.
+            await asyncio.sleep(max(delay, 0.0))
+            # Emit everything due by now: sensors keep sending while the
+            # consumer is busy, so a slow consumer sees bursts, not a slower feed.
+            now = loop.time()
+            j = int(np.searchsorted(offsets, (now - t0) * speedup, side="right"))
+        else:
+            await asyncio.sleep(0)
+            now = loop.time()
+            # As fast as possible: fill the queue up to one micro-batch per turn,
+            # so the consumer scores full batches instead of single events.
+            # A full queue waits for the consumer instead of dropping.
+            free = queue.maxsize - queue.qsize() if queue.maxsize > 0 else batch_size
+            j = i + min(batch_size, free)
+            if j == i:
+                continue
+
+        t_in = time.perf_counter()
+        for k in range(i, min(max(j, i + 1), n)):
+            lag = now - t0 - offsets[k] / speedup if speedup > 0 else 0.0
+            stats.lag.append(max(lag, 0.0))
+            if lag > late_s:
+                stats.late += 1
+            try:
+                queue.put_nowait((k, t_in))
+            except asyncio.QueueFull:
+                stats.dropped_full += 1
+        i = min(max(j, i + 1), n)
+    await queue.put(None)
+
+
+async def _consume(
+    events: Dict[str, np.ndarray],
+    queue: asyncio.Queue,
+    stats: _Stats,
+    predict,
+    windows: Sequence[int] | None,
+    batch_size: int,
+) -> None:
+    values, rooms, target = events["values"], events["room"], events["target"]
+    streams = WindowStreams(windows) if windows else None
+
+    done = False
+    while not done:
+        batch = [await queue.get()]
+        while len(batch) < batch_size and not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch[-1] is None:
+            batch.pop()
+            done = True
+
+        rows, index, ingest = [], [], []
+        for k, t_in in batch:
+            row = streams.update(rooms[k], values[k]) if streams is not None else values[k]
+            if row is None:
+                stats.warmup += 1
+                continue
+            rows.append(row)
+            index.append(k)
+            ingest.append(t_in)
+
+        if rows:
+            pred = predict(np.vstack(rows))
+            t_out = time.perf_counter()
+            stats.latency.extend(t_out - t for t in ingest)
+            stats.scored += len(rows)
+            stats.batches += 1
+            if target is not None:
+                stats.correct += int((np.asarray(pred) == target[index]).sum())
+
+        # Hand the loop back to the producer between batches.
+        await asyncio.sleep(0)
+
+
+async def _replay(events, predict, windows, speedup, queue_size, batch_size, late_s) -> _Stats:
+    stats = _Stats()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    await asyncio.gather(
+        _produce(events, queue, stats, speedup, late_s, batch_size),
+        _consume(events, queue, stats, predict, windows, batch_size),
+    )
+    return stats
+
+
+def _percentiles_ms(values: List[float]) -> Dict[str, float | None]:
+    if not values:
+        return {**{f"p{p}": None for p in PERCENTILES}, "max": None}
+    arr = np.asarray(values) * 1000
+    return {**{f"p{p}": float(np.percentile(arr, p)) for p in PERCENTILES}, "max": float(arr.max())}
+
+
+def run_replay(
+    model_key: str = "rf",
+    input_path: Path | str = DATA_PATH,
+    speedup: float = DEFAULT_SPEEDUP,
+    version: str = "latest",
+    artifacts_dir: Path | str = ARTIFACTS_DIR,
+    engine: str = "sklearn",
+    room_col: str = ROOM_COL,
+    queue_size: int = QUEUE_SIZE,
+    batch_size: int = BATCH_SIZE,
+    late_ms: float = LATE_MS,
+    limit: int | None = None,
+) -> Dict[str, Any]:
+    """
+    Replay `input_path` through window features + model scoring.
+
+    speedup: data seconds per wall second (0 = as fast as possible).
+
+    Returns:
+        report dict (counts, throughput, latency and lag percentiles in ms)
+    """
+    if speedup < 0:
+        raise ValueError(f"speedup must be >= 0 (0 = as fast as possible). Got: {speedup}")
+
+    predict, windows, meta = _load_scorer(model_key, version, artifacts_dir, engine, batch_size)
+    events = load_events(input_path, room_col=room_col, limit=limit)
+    n = len(events["offset_s"])
+    if n == 0:
+        raise ValueError(f"No events with a valid timestamp in {Path(input_path).as_posix()}")
+
+    # Warm up the model outside the timed replay (first calls allocate).
+    predict(np.zeros((1, len(window_feature_names(FEATURES, windows)) if windows else len(FEATURES))))
+
+    start = time.perf_counter()
+    stats = asyncio.run(_replay(events, predict, windows, speedup, queue_size, batch_size, late_ms / 1000))
+    wall = time.perf_counter() - start
+
+    data_span = float(events["offset_s"][-1])
+    return {
+        "model": model_key,
+        "version": meta["version"],
+        "engine": engine,
+        "windows": windows,
+        "input": Path(input_path).as_posix(),
+        "rooms": int(len(np.unique(events["room"]))),
+        "speedup": speedup,
+        "achieved_speedup": data_span / wall if wall > 0 else None,
+        "events": n,
+        "scored": stats.scored,
+        "warmup": stats.warmup,
+        "dropped_queue_full": stats.dropped_full,
+        "late": stats.late,
+        "batches": stats.batches,
+        "mean_batch": stats.scored / stats.batches if stats.batches else None,
+        "wall_s": wall,
+        "throughput_eps": stats.scored / wall if wall > 0 else None,
+        "latency_ms": _percentiles_ms(stats.latency),
+        "schedule_lag_ms": _percentiles_ms(stats.lag),
+        "accuracy": stats.correct / stats.scored if stats.scored and events["target"] is not None else None,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    lat, lag = report["latency_ms"], report["schedule_lag_ms"]
+    fmt = lambda v: "n/a" if v is None else f"{v:.2f}"
+    print(f"\nReplay: {report['input']} ({report['events']} events, {report['rooms']} room(s)) "
+          f"-> {report['model']} {report['version']} (engine={report['engine']}, windows={report['windows']})")
+    print(f"Speed-up: requested {report['speedup']:g}x, achieved {fmt(report['achieved_speedup'])}x "
+          f"in {report['wall_s']:.2f} s")
+    print(f"Scored {report['scored']} events ({fmt(report['throughput_eps'])} events/s, "
+          f"mean batch {fmt(report['mean_batch'])}); warm-up {report['warmup']}")
+    print(f"Dropped (queue full): {report['dropped_queue_full']}; late: {report['late']}")
+    print("Latency ingest->prediction (ms): " + ", ".join(f"{k} {fmt(v)}" for k, v in lat.items()))
+    print("Schedule lag (ms):               " + ", ".join(f"{k} {fmt(v)}" for k, v in lag.items()))
+    if report["accuracy"] is not None:
+        print(f"Accuracy of streamed predictions: {report['accuracy']:.4f}")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay sensor data through window features + scoring (asyncio)")
+    parser.add_argument("--model", default="rf", help="Model key of a saved artifact (train it first with run.py train)")
+    parser.add_argument("--version", default="latest")
+    parser.add_argument("--artifacts-dir", default=ARTIFACTS_DIR)
+    parser.add_argument("--engine", choices=["sklearn", "flat"], default="sklearn", help="flat: array-based RandomForest scoring (batches above 1024 rows use sklearn)")
+    parser.add_argument("--input", default=DATA_PATH, help="Raw CSV (single room or with a room column)")
+    parser.add_argument("--room-col", default=ROOM_COL)
+    parser.add_argument("--speedup", type=float, default=DEFAULT_SPEEDUP, help="Data seconds per wall second (0 = max speed)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="Events buffered before dropping")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Max events per model call")
+    parser.add_argument("--late-ms", type=float, default=LATE_MS, help="Schedule lag that counts as late")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N rows")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    report = run_replay(
+        model_key=args.model,
+        input_path=args.input,
+        speedup=args.speedup,
+        version=args.version,
+        artifacts_dir=args.artifacts_dir,
+        engine=args.engine,
+        room_col=args.room_col,
+        queue_size=args.queue_size,
+        batch_size=args.batch_size,
+        late_ms=args.late_ms,
+        limit=args.limit,
+    )
+    print_report(report)
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\nSaved: {out.as_posix()}")
+
+
+if __name__ == "__main__":
+    main()
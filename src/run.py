@@ -2,92 +2,337 @@
 Main entrypoint for running experiments.
 
 Commands:
-- train:   train one model on a holdout split
+- train:   train one model on a holdout split and save it as a versioned artifact
+           (--stream: out-of-core from a CSV, for models that support it, e.g. sgd)
+- predict: score a CSV with a saved artifact (no retraining)
 - compare: train all models on the same holdout split
 - cross-validate: time-series aware cross-validation (TimeSeriesSplit)
-"""
+                  (--incremental: walk-forward, each fold extends the previous model)
+- tune:    successive-halving hyperparameter search on the cross-validation folds
+- train-rooms:   multi-room input: one model per room, fitted in parallel
+- predict-rooms: score a multi-room CSV with every room's own model
 
-import argparse
-from sklearn.model_selection import train_test_split
+Use --windows on any command to train on sliding-window features
+(see window_features.py) instead of the raw sensor readings, and --compact
+to hold the data in the compact dtype schema (see dtype_schema.py).
 
-from preprocess import prepare_dataset
-from train_random_forest import build_model as build_rf
-from train_logistic import build_model as build_logreg
-from train_dummy import build_model as build_dummy
-from metrics import pretty_print
-from cross_validation import run_cross_validation
+Startup is kept cheap: the model registry imports a builder only when its
+model is selected, and every command imports its own dependencies (pandas,
+scikit-learn, ...) when it runs, so `--help` or scoring with the flat
+engine never loads estimators it does not use (see benchmark.py startup).
+"""
 
+import argparse
+import time
+from pathlib import Path
 
-# Registry of available models
-MODEL_REGISTRY = {
-    "rf": build_rf,
-    "logreg": build_logreg,
-    "dummy": build_dummy,
-}
+from artifacts import ARTIFACTS_DIR
+from model_registry import MODEL_REGISTRY
+from profiling import span, profile_run, print_summary
 
 
-def train_holdout(model_key: str, test_size: float, seed: int):
-    """Train and evaluate a single model using a holdout split."""
+def train_holdout(
+    model_key: str,
+    test_size: float,
+    seed: int,
+    windows: list[int] | None = None,
+    save: bool = True,
+    artifacts_dir: Path | str = ARTIFACTS_DIR,
+    compact: bool = False,
+):
+    """Train and evaluate a single model using a holdout split, then save it."""
     if model_key not in MODEL_REGISTRY:
         raise ValueError(f"Unknown model: {model_key}")
 
-    X, y = prepare_dataset()
+    from dataset_context import get_context
+    from dataset_cache import dataset_sha256
+    from artifacts import save_artifact
+    from metrics import pretty_print, compute_metrics
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=test_size,
-        random_state=seed,
-        stratify=y,
-    )
+    ctx = get_context(windows=windows, compact=compact)
+    X_train, X_test, y_train, y_test = ctx.train_test(test_size, seed)
 
     model = MODEL_REGISTRY[model_key]()
-    model.fit(X_train, y_train)
+    with span(f"fit:{model_key}", rows=len(X_train)):
+        model.fit(X_train, y_train)
 
-    y_pred = model.predict(X_test)
+    with span(f"predict:{model_key}", rows=len(X_test)):
+        y_pred = model.predict(X_test)
 
     print(f"\n=== {model_key.upper()} (holdout) ===")
     pretty_print(y_test, y_pred)
 
+    if save:
+        with span("save_artifact"):
+            out_dir = save_artifact(
+                model,
+                model_key,
+                features=list(X_train.columns),
+                data_sha256=dataset_sha256(ctx.path),
+                metrics=compute_metrics(y_test, y_pred),
+                extra={"windows": list(windows) if windows else None, "test_size": test_size, "seed": seed},
+                root=artifacts_dir,
+            )
+        print(f"\nSaved artifact: {out_dir.as_posix()}")
 
-def compare_models(test_size: float, seed: int):
-    """Train and compare all models on the same holdout split."""
-    X, y = prepare_dataset()
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=test_size,
-        random_state=seed,
-        stratify=y,
-    )
+def train_streaming(
+    model_key: str,
+    input_path: Path | str,
+    test_size: float,
+    seed: int,
+    chunk_rows: int | None = None,
+    save: bool = True,
+    artifacts_dir: Path | str = ARTIFACTS_DIR,
+):
+    """
+    Train out of core, streaming the CSV in chunks (models with fit_csv,
+    see train_sgd.py). The holdout is the last test_size of the rows.
+    """
+    from dataset_cache import file_sha256
+    from artifacts import save_artifact
+    from preprocess import FEATURES
+    from train_sgd import CHUNK_ROWS, train_csv
+
+    build_fn = MODEL_REGISTRY[model_key]
+    if not hasattr(build_fn(), "fit_csv"):
+        raise ValueError(f"Model '{model_key}' cannot be trained out of core (no fit_csv).")
+
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    model, metrics, n_train = train_csv(input_path, test_size, seed, chunk_rows=chunk_rows, build_fn=build_fn)
+
+    print(f"\n=== {model_key.upper()} (streaming, time-tail holdout) ===")
+    print(f"Trained on {n_train} rows in chunks of {chunk_rows}; evaluated on {metrics.support_0 + metrics.support_1} rows")
+    print(f"Confusion: tn={metrics.tn} fp={metrics.fp} fn={metrics.fn} tp={metrics.tp}")
+    print(f"Accuracy {metrics.accuracy:.4f}  precision_1 {metrics.precision_1:.4f}  "
+          f"recall_1 {metrics.recall_1:.4f}  f1_1 {metrics.f1_1:.4f}")
+
+    if save:
+        with span("save_artifact"):
+            out_dir = save_artifact(
+                model,
+                model_key,
+                features=FEATURES,
+                data_sha256=file_sha256(input_path),
+                metrics=metrics,
+                extra={"stream": True, "chunk_rows": chunk_rows, "holdout": "time_tail", "test_size": test_size, "seed": seed},
+                root=artifacts_dir,
+            )
+        print(f"\nSaved artifact: {out_dir.as_posix()}")
+
+
+def compare_models(
+    test_size: float,
+    seed: int,
+    windows: list[int] | None = None,
+    resamples: int = 0,
+    block_size: int | None = None,
+    compact: bool = False,
+):
+    """
+    Train and compare all models on the same holdout split.
+
+    With resamples > 0, also print bootstrap CIs and paired differences.
+    """
+    from dataset_context import get_context
+    from metrics import pretty_print
+    from bootstrap import compare_with_bootstrap, print_bootstrap
 
+    ctx = get_context(windows=windows, compact=compact)
+    X_train, X_test, y_train, y_test = ctx.train_test(test_size, seed)
+
+    preds = {}
     for name, builder in MODEL_REGISTRY.items():
         model = builder()
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
+        with span(f"fit:{name}", rows=len(X_train)):
+            model.fit(X_train, y_train)
+        with span(f"predict:{name}", rows=len(X_test)):
+            y_pred = model.predict(X_test)
+        preds[name] = y_pred
 
         print(f"\n=== {name.upper()} ===")
         pretty_print(y_test, y_pred)
 
+    if resamples > 0:
+        with span("bootstrap", rows=len(y_test)):
+            ci, paired = compare_with_bootstrap(
+                y_test, preds, n_resamples=resamples, seed=seed, block_size=block_size, order=y_test.index
+            )
+        print_bootstrap(ci, paired)
+
+
+def predict_csv(
+    model_key: str,
+    input_path: Path | str,
+    output_path: Path | str,
+    version: str = "latest",
+    artifacts_dir: Path | str = ARTIFACTS_DIR,
+    engine: str = "sklearn",
+):
+    """
+    Score a CSV with a saved model artifact.
+
+    engine="flat" scores RandomForest artifacts with the array-based
+    FlatForest export (forest_inference.py) instead of sklearn, for inputs
+    of up to FLAT_MAX_ROWS rows; larger inputs are scored by sklearn, whose
+    compiled traversal is faster for bulk batches.
+    """
+    import pandas as pd
+
+    from artifacts import resolve_artifact, load_artifact, load_meta, load_flat_forest
+    from forest_inference import FLAT_MAX_ROWS
+    from preprocess import load_data
+
+    path = resolve_artifact(model_key, version, artifacts_dir)
+    meta = load_meta(path)
+
+    df = load_data(input_path)
+    if meta.get("windows"):
+        from window_features import build_window_features
+
+        X = build_window_features(df, windows=meta["windows"])
+    else:
+        missing = set(meta["features"]) - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing required columns: {sorted(missing)}. Found: {list(df.columns)}")
+        X = df[meta["features"]]
+    X = X[meta["features"]]
+
+    if engine == "flat" and len(X) > FLAT_MAX_ROWS:
+        print(f"{len(X)} rows > {FLAT_MAX_ROWS}: scoring with sklearn (faster than the flat engine for bulk batches)")
+        engine = "sklearn"
+
+    start = time.perf_counter()
+    with span("load_artifact"):
+        if engine == "flat":
+            model = load_flat_forest(path)
+        else:
+            model, meta = load_artifact(path)
+    loaded = time.perf_counter()
+
+    X_values = X.to_numpy() if engine == "flat" else X
+    with span(f"predict:{model_key}", rows=len(X)):
+        out = pd.DataFrame({"prediction": model.predict(X_values)}, index=X.index)
+        if hasattr(model, "predict_proba"):
+            out["proba_1"] = model.predict_proba(X_values)[:, 1]
+    scored = time.perf_counter()
+
+    with span("write_csv", rows=len(out)):
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        out.to_csv(output_path, index_label="row")
+
+    print(f"Model: {model_key} ({meta['version']}, engine={engine})")
+    print(f"Load: {(loaded - start) * 1000:.1f} ms, predict {len(X)} rows: {(scored - loaded) * 1000:.1f} ms")
+    print(f"Saved predictions: {Path(output_path).as_posix()}")
+
+
+def train_partitioned(
+    model_key: str,
+    input_path: Path | str,
+    room_col: str = "room",
+    test_size: float = 0.3,
+    seed: int = 42,
+    n_jobs: int | None = None,
+    save: bool = True,
+    artifacts_dir: Path | str = ARTIFACTS_DIR,
+    compact: bool = False,
+    out_path: Path | str = "results/metrics_rooms.csv",
+):
+    """
+    Train one model per room (see partitioned.py) and write the aggregated
+    per-room metrics table.
+    """
+    if model_key not in MODEL_REGISTRY:
+        raise ValueError(f"Unknown model: {model_key}")
+
+    from partitioned import train_rooms, pooled_metrics
+
+    start = time.perf_counter()
+    results = train_rooms(
+        input_path,
+        model_key,
+        MODEL_REGISTRY[model_key],
+        room_col=room_col,
+        test_size=test_size,
+        seed=seed,
+        n_jobs=n_jobs,
+        save=save,
+        artifacts_dir=artifacts_dir,
+        compact=compact,
+    )
+    elapsed = time.perf_counter() - start
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(out_path, index=False)
+
+    cols = [c for c in ["room", "rows", "status", "accuracy", "f1_1", "seconds"] if c in results.columns]
+    print(f"\n=== {model_key.upper()} per room ({len(results)} rooms, {elapsed:.1f} s) ===\n")
+    print(results[cols].to_string(index=False))
+
+    skipped = int((results["status"] != "ok").sum())
+    if skipped < len(results):
+        pooled = pooled_metrics(results)
+        print(f"\nPooled over rooms: accuracy {pooled['accuracy']:.4f}, f1_1 {pooled['f1_1']:.4f}")
+    if skipped:
+        print(f"Skipped {skipped} room(s) with a single class (no model; predict-rooms uses the recorded class).")
+    print(f"Saved: {Path(out_path).as_posix()}")
+
 
 def main():
     parser = argparse.ArgumentParser(description="ML experiment runner")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
+    # Options shared by every command (see profiling.py)
+    profile_opts = argparse.ArgumentParser(add_help=False)
+    profile_opts.add_argument(
+        "--profile",
+        nargs="?",
+        const=True,
+        default=None,
+        metavar="PATH",
+        help="Write a JSON trace of stage spans (default: results/profile_<command>.json)",
+    )
+    profile_opts.add_argument("--cprofile", metavar="PATH", help="Also write a cProfile dump (implies --profile)")
+    profile_opts.add_argument("--trace-memory", action="store_true", help="Per-span peak memory via tracemalloc (slower)")
+
     # ---- train ----
-    train_p = subparsers.add_parser("train", help="Train one model (holdout split)")
+    train_p = subparsers.add_parser("train", parents=[profile_opts], help="Train one model (holdout split)")
     train_p.add_argument("--model", required=True, choices=MODEL_REGISTRY.keys())
     train_p.add_argument("--test-size", type=float, default=0.3)
     train_p.add_argument("--seed", type=int, default=42)
+    train_p.add_argument("--windows", type=int, nargs="+", help="Sliding-window lengths (e.g. 5 15 60)")
+    train_p.add_argument("--compact", action="store_true", help="float32/uint8 dtype schema (see dtype_schema.py)")
+    train_p.add_argument("--no-save", action="store_true", help="Do not write a model artifact")
+    train_p.add_argument("--artifacts-dir", default=ARTIFACTS_DIR, help="Where model artifacts are stored")
+    train_p.add_argument("--stream", action="store_true", help="Train out of core from --input in chunks (sgd)")
+    train_p.add_argument("--input", default="data/occupancy.csv", help="CSV to stream (with --stream)")
+    train_p.add_argument("--chunk-rows", type=int, default=None, help="Rows per chunk (with --stream)")
+
+    # ---- predict ----
+    predict_p = subparsers.add_parser("predict", parents=[profile_opts], help="Score a CSV with a saved model (no retraining)")
+    predict_p.add_argument("--model", required=True, choices=MODEL_REGISTRY.keys())
+    predict_p.add_argument("--input", required=True, help="CSV with sensor columns")
+    predict_p.add_argument("--output", default="results/predictions.csv")
+    predict_p.add_argument("--version", default="latest", help="Artifact version (default: latest)")
+    predict_p.add_argument("--artifacts-dir", default=ARTIFACTS_DIR, help="Where model artifacts are stored")
+    predict_p.add_argument(
+        "--engine",
+        choices=["sklearn", "flat"],
+        default="sklearn",
+        help="flat: array-based RandomForest inference (low per-call latency; inputs above 1024 rows use sklearn)",
+    )
 
     # ---- compare ----
-    compare_p = subparsers.add_parser("compare", help="Compare all models (same holdout split)")
+    compare_p = subparsers.add_parser("compare", parents=[profile_opts], help="Compare all models (same holdout split)")
     compare_p.add_argument("--test-size", type=float, default=0.3)
     compare_p.add_argument("--seed", type=int, default=42)
+    compare_p.add_argument("--windows", type=int, nargs="+", help="Sliding-window lengths (e.g. 5 15 60)")
+    compare_p.add_argument("--compact", action="store_true", help="float32/uint8 dtype schema (see dtype_schema.py)")
+    compare_p.add_argument("--bootstrap", type=int, default=0, help="Bootstrap resamples for CIs (e.g. 10000)")
+    compare_p.add_argument("--block-size", type=int, default=None, help="Block bootstrap over time-ordered rows")
 
     # ---- cross-validate ----
-    cv_p = subparsers.add_parser("cross-validate", help="Time-series cross-validation (TimeSeriesSplit)")
+    cv_p = subparsers.add_parser("cross-validate", parents=[profile_opts], help="Time-series cross-validation (TimeSeriesSplit)")
     cv_p.add_argument("--splits", type=int, default=5, help="Number of CV splits (TimeSeriesSplit)")
     cv_p.add_argument(
         "--models",
@@ -96,17 +341,191 @@ def main():
         choices=MODEL_REGISTRY.keys(),
         help="Which models to evaluate",
     )
+    cv_p.add_argument("--windows", type=int, nargs="+", help="Sliding-window lengths (e.g. 5 15 60)")
+    cv_p.add_argument("--compact", action="store_true", help="float32/uint8 dtype schema (see dtype_schema.py)")
+    cv_p.add_argument(
+        "--n-jobs",
+        type=int,
+        default=None,
+        help="Core budget for parallel (model, fold) jobs (-1 = all cores)",
+    )
+    cv_p.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Walk-forward mode: extend each fold's model with the new rows instead of refitting "
+        "(rf, logreg/sgd via SGD partial_fit, dummy)",
+    )
+
+    # ---- tune ----
+    tune_p = subparsers.add_parser("tune", parents=[profile_opts], help="Successive-halving search over time-series CV folds")
+    tune_p.add_argument("--models", nargs="+", default=["rf", "logreg"], choices=MODEL_REGISTRY.keys())
+    tune_p.add_argument("--splits", type=int, default=5, help="Number of CV splits (TimeSeriesSplit)")
+    tune_p.add_argument("--candidates", type=int, default=None, help="Parameter sets sampled per model (default: 32)")
+    tune_p.add_argument("--factor", type=int, default=None, help="Keep 1/factor per rung, factor x more rows (default: 3)")
+    tune_p.add_argument("--scoring", default="f1_1", choices=["accuracy", "precision_1", "recall_1", "f1_1"])
+    tune_p.add_argument("--seed", type=int, default=42)
+    tune_p.add_argument("--windows", type=int, nargs="+", help="Sliding-window lengths (e.g. 5 15 60)")
+    tune_p.add_argument("--compact", action="store_true", help="float32/uint8 dtype schema (see dtype_schema.py)")
+    tune_p.add_argument("--n-jobs", type=int, default=None, help="Core budget for parallel fits (-1 = all cores)")
+
+    # ---- train-rooms ----
+    rooms_p = subparsers.add_parser("train-rooms", parents=[profile_opts], help="Train one model per room (multi-room input)")
+    rooms_p.add_argument("--model", required=True, choices=MODEL_REGISTRY.keys())
+    rooms_p.add_argument("--input", required=True, help="CSV with sensor columns and a room column")
+    rooms_p.add_argument("--room-col", default="room", help="Column identifying the room / sensor")
+    rooms_p.add_argument("--test-size", type=float, default=0.3)
+    rooms_p.add_argument("--seed", type=int, default=42)
+    rooms_p.add_argument("--compact", action="store_true", help="Store partitions as float32")
+    rooms_p.add_argument("--n-jobs", type=int, default=None, help="Core budget for parallel rooms (-1 = all cores)")
+    rooms_p.add_argument("--no-save", action="store_true", help="Do not write model artifacts")
+    rooms_p.add_argument("--artifacts-dir", default=ARTIFACTS_DIR, help="Where model artifacts are stored")
+    rooms_p.add_argument("--output", default="results/metrics_rooms.csv", help="Per-room metrics table")
+
+    # ---- predict-rooms ----
+    score_p = subparsers.add_parser("predict-rooms", parents=[profile_opts], help="Score a multi-room CSV with per-room models")
+    score_p.add_argument("--model", required=True, choices=MODEL_REGISTRY.keys())
+    score_p.add_argument("--input", required=True, help="CSV with sensor columns and a room column")
+    score_p.add_argument("--room-col", default="room", help="Column identifying the room / sensor")
+    score_p.add_argument("--output", default="results/predictions_rooms.csv")
+    score_p.add_argument("--version", default="latest", help="Artifact version (default: latest)")
+    score_p.add_argument("--compact", action="store_true", help="Store partitions as float32")
+    score_p.add_argument("--n-jobs", type=int, default=None, help="Core budget for parallel rooms (-1 = all cores)")
+    score_p.add_argument("--artifacts-dir", default=ARTIFACTS_DIR, help="Where model artifacts are stored")
 
     args = parser.parse_args()
 
-    if args.command == "train":
-        train_holdout(model_key=args.model, test_size=args.test_size, seed=args.seed)
+    if args.command == "cross-validate" and args.incremental:
+        from walk_forward import INCREMENTAL_MODELS
+
+        unsupported = [m for m in args.models if m not in INCREMENTAL_MODELS]
+        if unsupported:
+            cv_p.error(f"--incremental does not support model(s) {unsupported} (choose from {', '.join(INCREMENTAL_MODELS)})")
+
+    if args.profile or args.cprofile:
+        trace_path = args.profile if isinstance(args.profile, str) else f"results/profile_{args.command}.json"
+        with profile_run(trace_path, label=args.command, cprofile_path=args.cprofile, trace_memory=args.trace_memory) as profiler:
+            run_command(args)
+        print_summary(profiler)
+        print(f"\nSaved profile: {Path(trace_path).as_posix()}")
+        if args.cprofile:
+            print(f"Saved cProfile dump: {Path(args.cprofile).as_posix()} (python -m pstats {args.cprofile})")
+    else:
+        run_command(args)
+
+
+def run_command(args: argparse.Namespace):
+    """Dispatch a parsed command line to its implementation."""
+    if args.command == "train" and args.stream:
+        train_streaming(
+            model_key=args.model,
+            input_path=args.input,
+            test_size=args.test_size,
+            seed=args.seed,
+            chunk_rows=args.chunk_rows,
+            save=not args.no_save,
+            artifacts_dir=args.artifacts_dir,
+        )
+
+    elif args.command == "train":
+        train_holdout(
+            model_key=args.model,
+            test_size=args.test_size,
+            seed=args.seed,
+            windows=args.windows,
+            save=not args.no_save,
+            artifacts_dir=args.artifacts_dir,
+            compact=args.compact,
+        )
+
+    elif args.command == "predict":
+        predict_csv(
+            model_key=args.model,
+            input_path=args.input,
+            output_path=args.output,
+            version=args.version,
+            artifacts_dir=args.artifacts_dir,
+            engine=args.engine,
+        )
 
     elif args.command == "compare":
-        compare_models(test_size=args.test_size, seed=args.seed)
+        compare_models(
+            test_size=args.test_size,
+            seed=args.seed,
+            windows=args.windows,
+            resamples=args.bootstrap,
+            block_size=args.block_size,
+            compact=args.compact,
+        )
 
     elif args.command == "cross-validate":
-        run_cross_validation(models=args.models, n_splits=args.splits)
+        from dataset_context import get_context
+        from cross_validation import run_cross_validation
+
+        run_cross_validation(
+            models=args.models,
+            n_splits=args.splits,
+            context=get_context(windows=args.windows, compact=args.compact),
+            n_jobs=args.n_jobs,
+            incremental=args.incremental,
+            out_folds_path="results/metrics_cv_incremental_folds.csv" if args.incremental else "results/metrics_cv_folds.csv",
+            out_summary_path="results/metrics_cv_incremental.csv" if args.incremental else "results/metrics_cv.csv",
+        )
+
+    elif args.command == "tune":
+        from dataset_context import get_context
+        from tuning import FACTOR, N_CANDIDATES, run_tuning, print_tuning
+
+        history, best = run_tuning(
+            models=args.models,
+            n_splits=args.splits,
+            n_candidates=args.candidates or N_CANDIDATES,
+            factor=args.factor or FACTOR,
+            scoring=args.scoring,
+            seed=args.seed,
+            context=get_context(windows=args.windows, compact=args.compact),
+            n_jobs=args.n_jobs,
+        )
+        print_tuning(history, best)
+        print("\nSaved: results/tuning.csv, results/tuning_best.json")
+
+    elif args.command == "train-rooms":
+        train_partitioned(
+            model_key=args.model,
+            input_path=args.input,
+            room_col=args.room_col,
+            test_size=args.test_size,
+            seed=args.seed,
+            n_jobs=args.n_jobs,
+            save=not args.no_save,
+            artifacts_dir=args.artifacts_dir,
+            compact=args.compact,
+            out_path=args.output,
+        )
+
+    elif args.command == "predict-rooms":
+        from partitioned import score_rooms
+
+        start = time.perf_counter()
+        summary = score_rooms(
+            args.input,
+            args.model,
+            args.output,
+            room_col=args.room_col,
+            version=args.version,
+            n_jobs=args.n_jobs,
+            artifacts_dir=args.artifacts_dir,
+            compact=args.compact,
+        )
+        print(summary.to_string(index=False))
+        scored = summary[summary["status"] != "no_model"]
+        print(f"\nScored {int(scored['rows'].sum())} rows in {time.perf_counter() - start:.1f} s")
+        constant = int((summary["status"] == "single_class").sum())
+        if constant:
+            print(f"{constant} single-class room(s) predicted as their only training class.")
+        if len(scored) < len(summary):
+            unscored = summary.loc[summary["status"] == "no_model", "room"].tolist()
+            print(f"Unscored (no saved model): room(s) {unscored}")
+        print(f"Saved predictions: {Path(args.output).as_posix()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,248 @@
+"""
+Streaming (online) sliding-window features.
+
+window_features.py needs the whole history in a DataFrame. This module keeps
+a small fixed-size state per sensor instead, so features can be emitted for
+every incoming reading in constant time:
+
+- ring buffer of the last `window` readings
+- running sum and sum of squares (mean / std)
+- monotonic deques of buffer positions (min / max)
+
+The emitted values are the same `<feature>_mean/_std/_min/_max/_delta`
+columns as window_features.build_window_features (up to float rounding
+in the running sums).
+
+All state is allocated once in __init__; update() only overwrites slots.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Dict, Hashable, Sequence
+
+import numpy as np
+
+from preprocess import FEATURES, load_data
+from window_features import STATS, build_window_features, window_feature_names
+
+WINDOW = 5  # minutes
+
+
+class _SensorWindow:
+    """
+    Window state for a single sensor.
+
+    The ring buffer holds raw readings (min/max/delta are exact). The running
+    sums are kept relative to a reference value `ref` so the sum of squares
+    does not lose precision for large offsets (e.g. CO2 around 700 ppm).
+    Once per `window` updates the sums are rebuilt from the buffer around
+    the latest reading, which bounds rounding drift at amortized O(1) cost.
+    Constant windows (min == max) report a std of exactly 0.
+    """
+
+    __slots__ = (
+        "window", "buf", "ref", "sum", "sumsq",
+        "minq", "min_head", "min_len",
+        "maxq", "max_head", "max_len",
+    )
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.buf = [0.0] * window
+        self.ref = None
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+        # Monotonic deques stored as fixed-size circular arrays of sequence numbers.
+        self.minq = [0] * window
+        self.min_head = 0
+        self.min_len = 0
+        self.maxq = [0] * window
+        self.max_head = 0
+        self.max_len = 0
+
+    def push(self, seq: int, x: float, out: np.ndarray, col: int) -> None:
+        """
+        Add reading number `seq` and write STATS into out[col : col + 5]
+        (only meaningful once seq >= window - 1).
+        """
+        w = self.window
+        buf = self.buf
+        slot = seq % w
+
+        if self.ref is None:
+            self.ref = x
+        ref = self.ref
+
+        if seq >= w:
+            old = buf[slot] - ref
+            self.sum -= old
+            self.sumsq -= old * old
+        buf[slot] = x
+        d = x - ref
+        self.sum += d
+        self.sumsq += d * d
+
+        if slot == w - 1:
+            # Periodic exact resync of the running sums around the newest reading.
+            ref = self.ref = x
+            self.sum = math.fsum(b - ref for b in buf)
+            self.sumsq = math.fsum((b - ref) * (b - ref) for b in buf)
+
+        expired = seq - w
+
+        # min deque: increasing values from head to tail
+        q, head, n = self.minq, self.min_head, self.min_len
+        if n and q[head] <= expired:
+            head = (head + 1) % w
+            n -= 1
+        while n and buf[q[(head + n - 1) % w] % w] >= x:
+            n -= 1
+        q[(head + n) % w] = seq
+        self.min_head, self.min_len = head, n + 1
+        vmin = buf[q[head] % w]
+
+        # max deque: decreasing values from head to tail
+        q, head, n = self.maxq, self.max_head, self.max_len
+        if n and q[head] <= expired:
+            head = (head + 1) % w
+            n -= 1
+        while n and buf[q[(head + n - 1) % w] % w] <= x:
+            n -= 1
+        q[(head + n) % w] = seq
+        self.max_head, self.max_len = head, n + 1
+        vmax = buf[q[head] % w]
+
+        count = min(seq + 1, w)
+        shift = self.sum / count
+        if count == 1:
+            std = math.nan
+        elif vmin == vmax:
+            std = 0.0
+        else:
+            var = (self.sumsq - self.sum * shift) / (count - 1)
+            std = math.sqrt(var) if var > 0.0 else 0.0
+
+        out[col] = ref + shift
+        out[col + 1] = std
+        out[col + 2] = vmin
+        out[col + 3] = vmax
+        out[col + 4] = x - buf[(seq + 1) % w]
+
+
+class StreamingWindowFeatures:
+    """
+    O(1)-per-reading window features for one room.
+
+    Usage:
+        extractor = StreamingWindowFeatures(window=5)
+        for reading in readings:            # one value per FEATURES entry
+            row = extractor.update(reading)
+            if row is not None:
+                model.predict(row[None, :])
+    """
+
+    def __init__(self, window: int = WINDOW, features: Sequence[str] = FEATURES) -> None:
+        if window < 1:
+            raise ValueError(f"Window length must be >= 1. Got: {window}")
+
+        self.window = window
+        self.features = list(features)
+        self.feature_names = window_feature_names(self.features, [window])
+        self.seq = 0
+        self._sensors = [_SensorWindow(window) for _ in self.features]
+        self._out = np.empty(len(self.feature_names), dtype=np.float64)
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window has been observed."""
+        return self.seq >= self.window
+
+    def update(self, reading: Sequence[float]) -> np.ndarray | None:
+        """
+        Consume one reading (values ordered like self.features).
+
+        Returns:
+            feature vector (a view of an internal buffer that is overwritten
+            on the next call; copy it if you need to keep it), or None while
+            the first window is still filling up.
+        """
+        if len(reading) != len(self._sensors):
+            raise ValueError(f"Expected {len(self._sensors)} values ({self.features}), got {len(reading)}")
+
+        seq = self.seq
+        out = self._out
+        col = 0
+        for sensor, x in zip(self._sensors, reading):
+            sensor.push(seq, float(x), out, col)
+            col += len(STATS)
+        self.seq = seq + 1
+
+        if self.seq < self.window:
+            return None
+        return out
+
+    def update_dict(self, reading: Dict[str, float]) -> Dict[str, float] | None:
+        """
+        Convenience wrapper for readings keyed by sensor name.
+        """
+        row = self.update([reading[f] for f in self.features])
+        if row is None:
+            return None
+        return dict(zip(self.feature_names, row.tolist()))
+
+
+class RoomStreams:
+    """
+    One StreamingWindowFeatures per room, created on first reading.
+    """
+
+    def __init__(self, window: int = WINDOW, features: Sequence[str] = FEATURES) -> None:
+        self.window = window
+        self.features = list(features)
+        self.feature_names = window_feature_names(self.features, [window])
+        self._rooms: Dict[Hashable, StreamingWindowFeatures] = {}
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def update(self, room_id: Hashable, reading: Sequence[float]) -> np.ndarray | None:
+        extractor = self._rooms.get(room_id)
+        if extractor is None:
+            extractor = StreamingWindowFeatures(self.window, self.features)
+            self._rooms[room_id] = extractor
+        return extractor.update(reading)
+
+
+def main() -> None:
+    """
+    Replay data/occupancy.csv through the streaming extractor and compare
+    with the batch window features.
+    """
+    df = load_data()
+    values = df[FEATURES].to_numpy(dtype=np.float64)
+
+    extractor = StreamingWindowFeatures(window=WINDOW)
+    rows = np.empty((len(df) - WINDOW + 1, len(extractor.feature_names)))
+
+    start = time.perf_counter()
+    k = 0
+    for reading in values.tolist():
+        row = extractor.update(reading)
+        if row is not None:
+            rows[k] = row
+            k += 1
+    elapsed = time.perf_counter() - start
+
+    batch = build_window_features(df, FEATURES, [WINDOW]).to_numpy()
+    max_diff = float(np.nanmax(np.abs(rows - batch)))
+
+    print(f"Streamed {len(df)} readings (window={WINDOW}) in {elapsed:.3f}s "
+          f"({elapsed / len(df) * 1e6:.1f} us/reading)")
+    print(f"Max abs difference vs batch features: {max_diff:.3e}")
+
+
+if __name__ == "__main__":
+    main()
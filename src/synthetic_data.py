@@ -0,0 +1,370 @@
+"""
+Synthetic multi-room occupancy data for load testing.
+
+A SensorModel is learned from data/occupancy.csv:
+
+- occupancy schedule: weekday arrival/departure times, short breaks while
+  occupied (Poisson count per occupied hour, exponential length) and the
+  probability that a weekend day is occupied at all
+- sensors (Temperature, Humidity, Light, CO2): a diurnal profile by hour of
+  day (as in clean_data.add_time_features) from unoccupied rows, plus an
+  occupancy effect. The target level follows occupancy through a first-order
+  lag fitted per sensor, so Light jumps immediately while CO2 builds up and
+  decays over tens of minutes. Residual noise is AR(1).
+- HumidityRatio is derived from Temperature and Humidity with the
+  psychrometric formula, which reproduces the shipped values to ~1e-6.
+
+Generation runs over N rooms x M days at one row per minute. Every room gets
+its own offsets (temperature, humidity, light/CO2 scale, arrival time).
+Rows are written time-major (every room for minute t, then minute t+1) in
+chunks of about --chunk-rows rows, with the filter states carried across
+days. A day is simulated for all rooms at once (its random draws are shaped
+by the room count), so the working set is one day x n_rooms rows of float
+arrays (~100 bytes per row) plus one written chunk; memory does not grow
+with --days. Randomness is drawn per day from the seed, so the output does
+not depend on the chunk size.
+
+Output layout matches data/occupancy.csv (header without the id column,
+rows starting with the id) plus a trailing `room` column, so every loader
+in this repo reads it unchanged.
+
+Usage:
+    python src/synthetic_data.py --rooms 20 --days 30 --seed 42
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from preprocess import TARGET
+from clean_data import DATA_PATH, DATE_FORMAT, load_raw, parse_dates
+
+OUT_DIR = Path("data") / "synthetic"
+
+# Sensors simulated directly; HumidityRatio is derived from Temperature/Humidity.
+SENSORS = ["Temperature", "Humidity", "Light", "CO2"]
+OUTPUT_COLS = ["date", "Temperature", "Humidity", "Light", "CO2", "HumidityRatio", TARGET, "room"]
+
+# Decimals written per column (the shipped CSV uses similar precision).
+DECIMALS = {"Temperature": 3, "Humidity": 4, "Light": 1, "CO2": 2, "HumidityRatio": 7}
+
+MINUTES_PER_DAY = 24 * 60
+
+# Rows per written chunk (rounded to whole days).
+CHUNK_ROWS = 1_000_000
+
+# Candidate lag coefficients (fraction of the gap to the target closed per minute).
+LAG_GRID = (1.0, 0.5, 0.3, 0.2, 0.1, 0.05, 0.03, 0.02, 0.01, 0.005)
+
+# Spread of per-room offsets.
+ROOM_TEMPERATURE_SD = 0.7
+ROOM_HUMIDITY_SD = 2.0
+ROOM_SCALE_RANGE = (0.8, 1.2)
+ROOM_ARRIVAL_SD_MIN = 20.0
+
+
+@dataclass
+class SensorModel:
+    """
+    Learned generator parameters (JSON-serialisable).
+
+    Per-sensor lists follow SENSORS; diurnal is [hour][sensor].
+    """
+
+    diurnal: List[List[float]]
+    occupied_effect: List[float]
+    lag: List[float]
+    phi: List[float]
+    sigma: List[float]
+    lower: List[float]
+    upper: List[float]
+    arrival_mean: float
+    arrival_sd: float
+    departure_mean: float
+    departure_sd: float
+    breaks_per_hour: float
+    break_mean_min: float
+    weekend_occupied: float
+
+    def save(self, path: Path | str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(asdict(self), fh, indent=2)
+
+    @classmethod
+    def load(cls, path: Path | str) -> "SensorModel":
+        with open(path, "r", encoding="utf-8") as fh:
+            return cls(**json.load(fh))
+
+
+def humidity_ratio(temperature: np.ndarray, humidity: np.ndarray, pressure_hpa: float = 1013.25) -> np.ndarray:
+    """
+    kg water / kg dry air from temperature (C) and relative humidity (%).
+    """
+    saturation = 6.112 * np.exp(17.67 * temperature / (temperature + 243.5))
+    vapour = humidity / 100.0 * saturation
+    return 0.622 * vapour / (pressure_hpa - vapour)
+
+
+def _lagged(target: np.ndarray, k: float, state: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    y_t = y_{t-1} + k * (target_t - y_{t-1}) along axis 0.
+
+    state is lfilter's carried state (None: start at the first target).
+    """
+    if state is None:
+        state = (1.0 - k) * target[:1]
+    return lfilter([k], [1.0, -(1.0 - k)], target, axis=0, zi=state)
+
+
+def _schedule_stats(df: pd.DataFrame) -> Dict[str, float]:
+    minutes = df["date"].dt.hour * 60 + df["date"].dt.minute
+    day = df["date"].dt.normalize()
+
+    arrivals, departures, breaks, gaps, hours = [], [], [], [], 0.0
+    weekend_days = weekend_occupied = 0
+
+    for _, idx in df.groupby(day).groups.items():
+        # Full days only; partial first/last days would bias arrival/departure.
+        if len(idx) < 0.95 * MINUTES_PER_DAY:
+            continue
+        occ = df.loc[idx, TARGET].to_numpy()
+        mins = minutes.loc[idx].to_numpy()
+
+        if df.loc[idx[0], "date"].dayofweek >= 5:
+            weekend_days += 1
+            weekend_occupied += int(occ.any())
+        if not occ.any():
+            continue
+
+        on = np.flatnonzero(occ)
+        arrivals.append(mins[on[0]])
+        departures.append(mins[on[-1]] + 1)
+        hours += (departures[-1] - arrivals[-1]) / 60
+
+        # Unoccupied runs strictly inside the occupied span are breaks.
+        inside = occ[on[0] : on[-1] + 1]
+        edges = np.flatnonzero(np.diff(inside.astype(np.int8)))
+        starts, ends = edges[::2] + 1, edges[1::2] + 1
+        breaks.append(len(starts))
+        gaps.extend(ends - starts)
+
+    if not arrivals:
+        raise ValueError("No full occupied day found to learn the occupancy schedule from.")
+
+    return {
+        "arrival_mean": float(np.mean(arrivals)),
+        "arrival_sd": float(np.std(arrivals)),
+        "departure_mean": float(np.mean(departures)),
+        "departure_sd": float(np.std(departures)),
+        "breaks_per_hour": float(np.sum(breaks) / hours),
+        "break_mean_min": float(np.mean(gaps)) if gaps else 5.0,
+        "weekend_occupied": weekend_occupied / weekend_days if weekend_days else 0.0,
+    }
+
+
+def fit_model(df: pd.DataFrame) -> SensorModel:
+    """
+    Learn a SensorModel from a cleaned, time-ordered single-room frame
+    (columns date, SENSORS and Occupancy; see clean_data.load_raw).
+    """
+    df = df.copy()
+    df["date"] = parse_dates(df["date"])
+    df = df.dropna(subset=["date"] + SENSORS + [TARGET]).sort_values("date").reset_index(drop=True)
+
+    hour = df["date"].dt.hour.to_numpy()
+    occ = df[TARGET].to_numpy().astype(bool)
+    X = df[SENSORS].to_numpy(dtype=np.float64)
+
+    # Diurnal profile from unoccupied rows; hours never seen fall back to the mean.
+    diurnal = np.tile(X[~occ].mean(axis=0), (24, 1))
+    for h in range(24):
+        rows = ~occ & (hour == h)
+        if rows.any():
+            diurnal[h] = X[rows].mean(axis=0)
+    effect = (X[occ] - diurnal[hour[occ]]).mean(axis=0) if occ.any() else np.zeros(len(SENSORS))
+
+    target = diurnal[hour] + occ[:, None] * effect
+
+    lag, phi, sigma = [], [], []
+    for j in range(len(SENSORS)):
+        errors = [np.mean((_lagged(target[:, j], k)[0] - X[:, j]) ** 2) for k in LAG_GRID]
+        k = LAG_GRID[int(np.argmin(errors))]
+        resid = X[:, j] - _lagged(target[:, j], k)[0]
+
+        p = float(np.clip(np.corrcoef(resid[:-1], resid[1:])[0, 1], 0.0, 0.999))
+        lag.append(k)
+        phi.append(p)
+        sigma.append(float(np.std(resid[1:] - p * resid[:-1])))
+
+    return SensorModel(
+        diurnal=diurnal.tolist(),
+        occupied_effect=effect.tolist(),
+        lag=lag,
+        phi=phi,
+        sigma=sigma,
+        lower=X.min(axis=0).tolist(),
+        upper=X.max(axis=0).tolist(),
+        **_schedule_stats(df),
+    )
+
+
+def _rooms(model: SensorModel, n_rooms: int, seed: int) -> Dict[str, np.ndarray]:
+    rng = np.random.default_rng([seed, 0])
+    return {
+        "temperature": rng.normal(0.0, ROOM_TEMPERATURE_SD, n_rooms),
+        "humidity": rng.normal(0.0, ROOM_HUMIDITY_SD, n_rooms),
+        "light": rng.uniform(*ROOM_SCALE_RANGE, n_rooms),
+        "co2": rng.uniform(*ROOM_SCALE_RANGE, n_rooms),
+        "arrival": rng.normal(0.0, ROOM_ARRIVAL_SD_MIN, n_rooms),
+    }
+
+
+def _day_occupancy(model: SensorModel, rooms: Dict[str, np.ndarray], weekend: bool, rng: np.random.Generator) -> np.ndarray:
+    """
+    Occupancy (minutes, rooms) for one day, built from event counts.
+    """
+    n = len(rooms["arrival"])
+    occupied_day = rng.random(n) < (model.weekend_occupied if weekend else 1.0)
+
+    arrival = rng.normal(model.arrival_mean, model.arrival_sd, n) + rooms["arrival"]
+    departure = rng.normal(model.departure_mean, model.departure_sd, n) + rooms["arrival"]
+    arrival = np.clip(np.round(arrival), 0, MINUTES_PER_DAY - 1).astype(np.intp)
+    departure = np.clip(np.round(departure), arrival + 1, MINUTES_PER_DAY).astype(np.intp)
+
+    n_breaks = rng.poisson(model.breaks_per_hour * (departure - arrival) / 60)
+    k_max = int(n_breaks.max()) if n else 0
+    break_start = arrival[:, None] + (rng.random((n, k_max)) * (departure - arrival)[:, None]).astype(np.intp)
+    break_end = np.minimum(break_start + 1 + rng.exponential(model.break_mean_min, (n, k_max)).astype(np.intp), departure[:, None])
+    active = (np.arange(k_max) < n_breaks[:, None]) & occupied_day[:, None]
+
+    # +1/-1 at span and break edges, cumulative sum over the day's minutes.
+    span = np.zeros((MINUTES_PER_DAY + 1, n), dtype=np.int32)
+    cols = np.flatnonzero(occupied_day)
+    np.add.at(span, (arrival[cols], cols), 1)
+    np.add.at(span, (departure[cols], cols), -1)
+
+    pause = np.zeros((MINUTES_PER_DAY + 1, n), dtype=np.int32)
+    r, k = np.nonzero(active)
+    np.add.at(pause, (break_start[r, k], r), 1)
+    np.add.at(pause, (break_end[r, k], r), -1)
+
+    return (np.cumsum(span[:-1], axis=0) > 0) & (np.cumsum(pause[:-1], axis=0) == 0)
+
+
+def generate(
+    model: SensorModel,
+    out_path: Path | str,
+    n_rooms: int,
+    n_days: int,
+    seed: int = 42,
+    start: str = "2015-02-02",
+    chunk_rows: int = CHUNK_ROWS,
+) -> int:
+    """
+    Write n_rooms x n_days of minute data to out_path, chunk by chunk.
+
+    Returns:
+        number of rows written
+    """
+    rooms = _rooms(model, n_rooms, seed)
+    diurnal = np.asarray(model.diurnal)
+    effect = np.asarray(model.occupied_effect)
+    phi, sigma = np.asarray(model.phi), np.asarray(model.sigma)
+    lower, upper = np.asarray(model.lower), np.asarray(model.upper)
+
+    # Room-specific offsets/scales of (Temperature, Humidity, Light, CO2).
+    offset = np.stack([rooms["temperature"], rooms["humidity"], np.zeros(n_rooms), np.zeros(n_rooms)], axis=1)
+    scale = np.stack([np.ones(n_rooms), np.ones(n_rooms), rooms["light"], rooms["co2"]], axis=1)
+
+    minutes_per_chunk = max(1, chunk_rows // n_rooms)
+    day0 = pd.Timestamp(start).normalize()
+    hours = np.arange(MINUTES_PER_DAY) // 60
+
+    lag_state: List[np.ndarray | None] = [None] * len(SENSORS)
+    resid = np.zeros((n_rooms, len(SENSORS)))
+    rows = 0
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", newline="", encoding="utf-8") as fh:
+        fh.write(",".join(f'"{c}"' for c in OUTPUT_COLS) + "\n")
+
+        frames: List[pd.DataFrame] = []
+        pending = 0
+        for d in range(n_days):
+            date = day0 + pd.Timedelta(days=d)
+            rng = np.random.default_rng([seed, 1, d])
+
+            occ = _day_occupancy(model, rooms, date.dayofweek >= 5, rng)  # (minutes, rooms)
+            noise = rng.standard_normal((MINUTES_PER_DAY, n_rooms, len(SENSORS))) * sigma
+
+            values = np.empty((MINUTES_PER_DAY, n_rooms, len(SENSORS)))
+            for j in range(len(SENSORS)):
+                target = (diurnal[hours, j][:, None] + occ * effect[j]) * scale[:, j] + offset[:, j]
+                level, lag_state[j] = _lagged(target, model.lag[j], lag_state[j])
+
+                # AR(1) residual, continued from the previous day.
+                ar, _ = lfilter([1.0], [1.0, -phi[j]], noise[:, :, j], axis=0, zi=phi[j] * resid[None, :, j])
+                resid[:, j] = ar[-1]
+                values[:, :, j] = np.clip(level + ar, lower[j] * 0.9, upper[j] * scale[:, j].max() * 1.1)
+            del noise, target, level, ar
+
+            stamps = np.asarray(pd.date_range(date, periods=MINUTES_PER_DAY, freq="min").strftime(DATE_FORMAT))
+
+            # Text columns dominate memory, so the day is formatted in minute slices.
+            for lo in range(0, MINUTES_PER_DAY, minutes_per_chunk):
+                hi = min(lo + minutes_per_chunk, MINUTES_PER_DAY)
+                flat = values[lo:hi].reshape(-1, len(SENSORS))
+                frame = pd.DataFrame({
+                    "date": np.repeat(stamps[lo:hi], n_rooms),
+                    **{name: np.round(flat[:, j], DECIMALS[name]) for j, name in enumerate(SENSORS)},
+                })
+                frame["HumidityRatio"] = np.round(humidity_ratio(flat[:, 0], flat[:, 1]), DECIMALS["HumidityRatio"])
+                frame[TARGET] = occ[lo:hi].reshape(-1).astype(np.uint8)
+                frame["room"] = np.tile(np.arange(n_rooms, dtype=np.int32), hi - lo)
+                frames.append(frame)
+                pending += len(frame)
+
+                if pending >= chunk_rows or (d == n_days - 1 and hi == MINUTES_PER_DAY):
+                    chunk = pd.concat(frames, ignore_index=True)
+                    chunk.index += rows + 1
+                    chunk[OUTPUT_COLS].to_csv(fh, header=False, index=True)
+                    rows += len(chunk)
+                    frames, pending = [], 0
+
+    return rows
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic multi-room occupancy data")
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", default="2015-02-02", help="First day (YYYY-MM-DD)")
+    parser.add_argument("--source", default=DATA_PATH, help="Dataset to learn the generator from")
+    parser.add_argument("--output", default=None, help="Default: data/synthetic/occupancy_r<rooms>_d<days>_s<seed>.csv")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows per written chunk (memory is bounded by this plus one simulated day of all rooms)")
+    parser.add_argument("--save-model", default=None, help="Also write the learned parameters as JSON")
+    args = parser.parse_args(argv)
+
+    model = fit_model(load_raw(args.source))
+    if args.save_model:
+        model.save(args.save_model)
+
+    out = Path(args.output) if args.output else OUT_DIR / f"occupancy_r{args.rooms}_d{args.days}_s{args.seed}.csv"
+    rows = generate(model, out, args.rooms, args.days, seed=args.seed, start=args.start, chunk_rows=args.chunk_rows)
+
+    print(f"Rooms: {args.rooms}, days: {args.days}, rows: {rows}")
+    print(f"Saved: {out.as_posix()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Histogram gradient boosting training + evaluation (holdout split).
+
+HistGradientBoostingClassifier bins every feature into at most 255 buckets
+once and grows shallow trees on the bins, so fit time grows roughly
+linearly with the rows and the fitted model's size depends on the number
+of trees, not on the data size (unlike the 300 fully grown trees of the
+RandomForest).
+
+Early stopping uses a time-ordered validation tail instead of the
+estimator's built-in random validation split (which would let the model
+validate on rows interleaved with its training rows):
+
+1. the last `validation_fraction` of the training rows is held out (row
+   order; DataFrames are sorted by their index first, so shuffled holdout
+   splits still validate on the latest rows)
+2. boosting grows on the head, `step` iterations per warm-started fit, until
+   the tail's log loss has not improved by more than `tol` for
+   `n_iter_no_change` iterations
+3. the model is refitted on all rows with the best number of iterations,
+   so the most recent rows are not lost for training
+
+- Can be executed standalone
+- Used by run.py and cross_validation (registry key "hgb")
+
+Outputs:
+- prints confusion matrix + classification report
+- can return Metrics + predictions for aggregation
+"""
+
+from __future__ import annotations
+
+from itertools import islice
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+from dataset_context import DatasetContext, get_context
+from metrics import pretty_print, compute_metrics, Metrics
+from profiling import span
+
+RESULTS_DIR = Path("results")
+
+
+def _log_loss(y: np.ndarray, proba_1: np.ndarray) -> float:
+    p = np.clip(proba_1, 1e-15, 1 - 1e-15)
+    return float(-np.mean(np.where(y == 1, np.log(p), np.log1p(-p))))
+
+
+class TimeTailBoosting(ClassifierMixin, BaseEstimator):
+    """
+    HistGradientBoostingClassifier with early stopping on the time-ordered
+    tail of the training rows.
+
+    Attributes after fit:
+        model_:       the refitted HistGradientBoostingClassifier
+        best_iter_:   number of boosting iterations chosen on the tail
+        val_losses_:  tail log loss after every boosting iteration
+    """
+
+    def __init__(
+        self,
+        max_iter: int = 500,
+        learning_rate: float = 0.1,
+        max_leaf_nodes: int = 31,
+        min_samples_leaf: int = 20,
+        l2_regularization: float = 0.0,
+        class_weight: str | None = "balanced",
+        validation_fraction: float = 0.1,
+        step: int = 100,
+        n_iter_no_change: int = 10,
+        tol: float = 1e-4,
+        random_state: int = 42,
+    ) -> None:
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_samples_leaf = min_samples_leaf
+        self.l2_regularization = l2_regularization
+        self.class_weight = class_weight
+        self.validation_fraction = validation_fraction
+        self.step = step
+        self.n_iter_no_change = n_iter_no_change
+        self.tol = tol
+        self.random_state = random_state
+
+    def _booster(self, max_iter: int, warm_start: bool) -> HistGradientBoostingClassifier:
+        return HistGradientBoostingClassifier(
+            max_iter=max_iter,
+            learning_rate=self.learning_rate,
+            max_leaf_nodes=self.max_leaf_nodes,
+            min_samples_leaf=self.min_samples_leaf,
+            l2_regularization=self.l2_regularization,
+            class_weight=self.class_weight,
+            early_stopping=False,
+            warm_start=warm_start,
+            random_state=self.random_state,
+        )
+
+    def _search_iterations(self, X: np.ndarray, y: np.ndarray) -> int:
+        n_val = int(np.ceil(len(y) * self.validation_fraction))
+        if n_val == 0 or len(np.unique(y[:-n_val])) < 2:
+            # Nothing to validate on (or the head is single-class): no early stopping.
+            return self.max_iter
+        X_head, y_head, X_tail, y_tail = X[:-n_val], y[:-n_val], X[-n_val:], y[-n_val:]
+
+        # Every fit() call re-bins the data, so grow `step` trees per call and
+        # read the tail loss of each single iteration from the staged output.
+        booster = self._booster(min(self.step, self.max_iter), warm_start=True)
+        losses = self.val_losses_
+        best, best_loss = 0, np.inf
+        while True:
+            booster.fit(X_head, y_head)
+            for proba in islice(booster.staged_predict_proba(X_tail), len(losses), None):
+                losses.append(_log_loss(y_tail, proba[:, 1]))
+                if losses[-1] < best_loss - self.tol:
+                    best, best_loss = len(losses) - 1, losses[-1]
+            if len(losses) - 1 - best >= self.n_iter_no_change or booster.n_iter_ >= self.max_iter:
+                return best + 1
+            booster.max_iter = min(booster.max_iter + self.step, self.max_iter)
+
+    def fit(self, X, y) -> "TimeTailBoosting":
+        if hasattr(X, "index"):
+            # Shuffled splits (holdout) come as DataFrames: restore row (time) order.
+            order = np.argsort(np.asarray(X.index), kind="stable")
+            X, y = X.iloc[order], y.iloc[order]
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y).astype(np.int64)
+        self.val_losses_ = []
+        with span("hgb:early_stopping", rows=len(y)):
+            self.best_iter_ = self._search_iterations(X, y)
+        with span("hgb:refit", rows=len(y)):
+            self.model_ = self._booster(self.best_iter_, warm_start=False).fit(X, y)
+        self.classes_ = self.model_.classes_
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def predict(self, X) -> np.ndarray:
+        return self.model_.predict(np.asarray(X, dtype=np.float64))
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.model_.predict_proba(np.asarray(X, dtype=np.float64))
+
+
+def build_model(random_state: int = 42) -> TimeTailBoosting:
+    """
+    Build the histogram gradient boosting model with practical defaults.
+
+    Notes:
+    - max_iter=500 is an upper bound; early stopping on the validation tail
+      usually stops far earlier
+    - class_weight="balanced": helps with class imbalance (as for the RF)
+    - threads: HistGradientBoosting uses OpenMP (OMP_NUM_THREADS), not n_jobs
+    """
+    return TimeTailBoosting(random_state=random_state)
+
+
+def train_holdout(
+    test_size: float = 0.2,
+    random_state: int = 42,
+    return_preds: bool = False,
+    context: DatasetContext | None = None,
+) -> Tuple[Metrics, pd.Series, pd.Series] | Metrics:
+    """
+    Train on a holdout split and evaluate.
+
+    Data and split come from `context` (default: the shared process-wide
+    context), so repeated calls do not reload or re-split the dataset.
+
+    If return_preds=True, returns:
+        (metrics, y_true, y_pred)
+    Otherwise returns:
+        metrics
+    """
+    ctx = context or get_context()
+    X_train, X_test, y_train, y_test = ctx.train_test(test_size, random_state)
+
+    model = build_model(random_state=random_state)
+    with span("fit", rows=len(X_train)):
+        model.fit(X_train, y_train)
+    with span("predict", rows=len(X_test)):
+        y_pred = pd.Series(model.predict(X_test), index=y_test.index)
+
+    print(f"\n=== HistGradientBoosting (holdout, {model.best_iter_} iterations) ===")
+    pretty_print(y_test, y_pred)
+
+    m = compute_metrics(y_test, y_pred)
+
+    if return_preds:
+        return m, y_test, y_pred
+    return m
+
+
+def main() -> None:
+    m = train_holdout()
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out_path = RESULTS_DIR / "metrics_hgb_holdout.csv"
+    pd.DataFrame([m.to_row("HistGradientBoosting")]).to_csv(out_path, index=False)
+    print(f"\nSaved: {out_path.as_posix()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,16 +15,15 @@ from pathlib import Path
 from typing import Tuple
 
 import pandas as pd
-from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 
-from preprocess import prepare_dataset
+from dataset_context import DatasetContext, get_context
 from metrics import pretty_print, compute_metrics, Metrics
+from profiling import span
 
 RESULTS_DIR = Path("results")
-RESULTS_DIR.mkdir(exist_ok=True)
 
 
 def build_model(random_state: int = 42) -> Pipeline:
@@ -54,28 +53,27 @@ def train_holdout(
     test_size: float = 0.2,
     random_state: int = 42,
     return_preds: bool = False,
+    context: DatasetContext | None = None,
 ) -> Tuple[Metrics, pd.Series, pd.Series] | Metrics:
     """
     Train on a holdout split and evaluate.
 
+    Data and split come from `context` (default: the shared process-wide
+    context), so repeated calls do not reload or re-split the dataset.
+
     If return_preds=True, returns:
         (metrics, y_true, y_pred)
     Otherwise returns:
         metrics
     """
-    X, y = prepare_dataset()
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=test_size,
-        random_state=random_state,
-        stratify=y,
-    )
+    ctx = context or get_context()
+    X_train, X_test, y_train, y_test = ctx.train_test(test_size, random_state)
 
     model = build_model(random_state=random_state)
-    model.fit(X_train, y_train)
-    y_pred = pd.Series(model.predict(X_test), index=y_test.index)
+    with span("fit", rows=len(X_train)):
+        model.fit(X_train, y_train)
+    with span("predict", rows=len(X_test)):
+        y_pred = pd.Series(model.predict(X_test), index=y_test.index)
 
     print("\n=== LogisticRegression (holdout) ===")
     pretty_print(y_test, y_pred)
@@ -89,6 +87,7 @@ def train_holdout(
 
 def main() -> None:
     m = train_holdout()
+    RESULTS_DIR.mkdir(exist_ok=True)
     out_path = RESULTS_DIR / "metrics_logreg_holdout.csv"
     pd.DataFrame([m.to_row("LogisticRegression")]).to_csv(out_path, index=False)
     print(f"\nSaved: {out_path.as_posix()}")
@@ -0,0 +1,330 @@
+"""
+Out-of-core logistic regression (SGD) training + evaluation.
+
+StreamingLogistic never needs the whole dataset in memory:
+
+1. one chunked pass computes the scaler statistics (StandardScaler.partial_fit)
+   and the class counts (for "balanced" class weights)
+2. every epoch streams the chunks again through SGDClassifier.partial_fit
+   (log loss, rows shuffled within each chunk)
+
+fit(X, y) runs the same passes over in-memory arrays, so the model works
+like every other registry entry (run.py, cross_validation, tuning).
+fit_csv() reads the chunks straight from a CSV, so memory is bounded by
+chunk_rows, not by the file size (run.py train --model sgd --stream).
+update() extends a model with new rows only (walk-forward backtests, see
+walk_forward.py).
+
+- Can be executed standalone
+- Used by run.py (registry key "sgd")
+
+Outputs:
+- prints confusion matrix + classification report
+- can return Metrics + predictions for aggregation
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from preprocess import FEATURES, TARGET
+from clean_data import detect_schema
+from dataset_context import DatasetContext, get_context
+from metrics import pretty_print, compute_metrics, confusion_counts, counts_to_metrics, Metrics
+from profiling import span
+
+RESULTS_DIR = Path("results")
+
+# Rows per chunk (bounds training memory)
+CHUNK_ROWS = 50_000
+
+CLASSES = np.array([0, 1])
+
+Chunks = Iterable[Tuple[np.ndarray, np.ndarray]]
+
+
+def count_rows(path: Path | str) -> int:
+    """
+    Data rows of a CSV (newlines minus the header), without parsing it.
+    """
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as fh:
+        while block := fh.read(1 << 20):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def iter_csv_chunks(
+    path: Path | str,
+    features: List[str] = FEATURES,
+    target: str = TARGET,
+    chunk_rows: int = CHUNK_ROWS,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield (X, y) float64/int64 chunks of rows [start, stop) of a raw CSV.
+
+    Rows with missing values are dropped.
+    """
+    schema = detect_schema(path, sample_rows=chunk_rows)
+    missing = [c for c in list(features) + [target] if c not in schema.names]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}. Found: {schema.names}")
+
+    reader = pd.read_csv(
+        path,
+        header=0,
+        names=schema.names,
+        index_col=False,
+        usecols=list(features) + [target],
+        chunksize=chunk_rows,
+    )
+    offset = 0
+    with reader:
+        for chunk in reader:
+            lo, hi = offset, offset + len(chunk)
+            offset = hi
+            if hi <= start:
+                continue
+            if stop is not None and lo >= stop:
+                break
+            part = chunk.iloc[max(start - lo, 0) : len(chunk) if stop is None else min(stop - lo, len(chunk))].dropna()
+            yield part[features].to_numpy(dtype=np.float64), part[target].to_numpy(dtype=np.int64)
+
+
+def _iter_array_chunks(X: np.ndarray, y: np.ndarray, chunk_rows: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    for i in range(0, len(X), chunk_rows):
+        yield X[i : i + chunk_rows], y[i : i + chunk_rows]
+
+
+class StreamingLogistic(ClassifierMixin, BaseEstimator):
+    """
+    Standardized logistic regression trained by SGD over chunks.
+
+    Parameters follow scikit-learn conventions (get_params / set_params), so
+    the model can be tuned and cloned like the other registry models.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 1e-4,
+        epochs: int = 5,
+        chunk_rows: int = CHUNK_ROWS,
+        class_weight: str | None = "balanced",
+        random_state: int = 42,
+    ) -> None:
+        self.alpha = alpha
+        self.epochs = epochs
+        self.chunk_rows = chunk_rows
+        self.class_weight = class_weight
+        self.random_state = random_state
+
+    def fit_chunks(self, chunks: Callable[[], Chunks]) -> "StreamingLogistic":
+        """
+        Fit from a chunk source; chunks() is called once per pass.
+        """
+        scaler = StandardScaler()
+        counts = np.zeros(len(CLASSES), dtype=np.int64)
+        with span("sgd:stats"):
+            for X, y in chunks():
+                if len(y):
+                    scaler.partial_fit(X)
+                    counts += np.bincount(y, minlength=len(CLASSES))[: len(CLASSES)]
+        if (counts == 0).any():
+            raise ValueError(f"Training data must contain both classes (class counts: {counts.tolist()}).")
+        weights = self._weights(counts)
+
+        clf = SGDClassifier(loss="log_loss", alpha=self.alpha, random_state=self.random_state)
+        rng = np.random.default_rng(self.random_state)
+        for epoch in range(self.epochs):
+            with span("sgd:epoch", rows=int(counts.sum())):
+                for X, y in chunks():
+                    if not len(y):
+                        continue
+                    # Time-ordered rows come in long single-class runs; shuffle within the chunk.
+                    order = rng.permutation(len(y))
+                    clf.partial_fit(scaler.transform(X[order]), y[order], classes=CLASSES, sample_weight=weights[y[order]])
+
+        self.scaler_ = scaler
+        self.clf_ = clf
+        self.classes_ = CLASSES
+        self.n_features_in_ = scaler.n_features_in_
+        self.class_counts_ = counts
+        return self
+
+    def _weights(self, counts: np.ndarray) -> np.ndarray:
+        if self.class_weight == "balanced":
+            if (counts == 0).any():
+                # Only one class seen so far: nothing to balance yet.
+                return np.ones(len(CLASSES))
+            return counts.sum() / (len(CLASSES) * counts)
+        if self.class_weight is None:
+            return np.ones(len(CLASSES))
+        raise ValueError(f"Unsupported class_weight: {self.class_weight!r} (use 'balanced' or None)")
+
+    def update(self, X, y) -> "StreamingLogistic":
+        """
+        Extend the model with new rows only (`epochs` partial_fit passes).
+
+        The first call fits the scaler, which then stays fixed so the
+        coefficients keep one feature space. Class weights use the class
+        counts of all rows seen so far; a batch may hold a single class.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y).astype(np.int64)
+        if not len(y):
+            return self
+        if not hasattr(self, "clf_"):
+            self.scaler_ = StandardScaler().fit(X)
+            self.clf_ = SGDClassifier(loss="log_loss", alpha=self.alpha, random_state=self.random_state)
+            self.classes_ = CLASSES
+            self.n_features_in_ = X.shape[1]
+            self.class_counts_ = np.zeros(len(CLASSES), dtype=np.int64)
+
+        # Seeded by the rows seen so far: the same sequence of updates gives the same model.
+        rng = np.random.default_rng([self.random_state, int(self.class_counts_.sum())])
+        self.class_counts_ = self.class_counts_ + np.bincount(y, minlength=len(CLASSES))[: len(CLASSES)]
+        weights = self._weights(self.class_counts_)
+
+        for epoch in range(self.epochs):
+            with span("sgd:update", rows=len(y)):
+                for X_chunk, y_chunk in _iter_array_chunks(X, y, self.chunk_rows):
+                    order = rng.permutation(len(y_chunk))
+                    self.clf_.partial_fit(
+                        self.scaler_.transform(X_chunk[order]),
+                        y_chunk[order],
+                        classes=CLASSES,
+                        sample_weight=weights[y_chunk[order]],
+                    )
+        return self
+
+    def fit(self, X, y) -> "StreamingLogistic":
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y).astype(np.int64)
+        return self.fit_chunks(lambda: _iter_array_chunks(X, y, self.chunk_rows))
+
+    def fit_csv(self, path: Path | str, start: int = 0, stop: int | None = None) -> "StreamingLogistic":
+        """
+        Fit on rows [start, stop) of a CSV, streaming it once per pass.
+        """
+        return self.fit_chunks(lambda: iter_csv_chunks(path, chunk_rows=self.chunk_rows, start=start, stop=stop))
+
+    def decision_function(self, X) -> np.ndarray:
+        return self.clf_.decision_function(self.scaler_.transform(np.asarray(X, dtype=np.float64)))
+
+    def predict(self, X) -> np.ndarray:
+        return self.clf_.predict(self.scaler_.transform(np.asarray(X, dtype=np.float64)))
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.clf_.predict_proba(self.scaler_.transform(np.asarray(X, dtype=np.float64)))
+
+
+def build_model(random_state: int = 42) -> StreamingLogistic:
+    """
+    Build the streaming logistic model.
+
+    Notes:
+    - alpha: L2 penalty (SGD counterpart of 1 / C)
+    - epochs: passes over the data after the statistics pass
+    - class_weight="balanced": weights from the class counts of the first pass
+    """
+    return StreamingLogistic(random_state=random_state)
+
+
+def evaluate_csv(model, path: Path | str, start: int = 0, stop: int | None = None, chunk_rows: int = CHUNK_ROWS) -> Metrics:
+    """
+    Metrics of model on rows [start, stop) of a CSV, one chunk at a time.
+    """
+    counts = np.zeros(4, dtype=np.int64)
+    for X, y in iter_csv_chunks(path, chunk_rows=chunk_rows, start=start, stop=stop):
+        if len(y):
+            counts += confusion_counts(y, model.predict(X))
+    return counts_to_metrics(counts)
+
+
+def train_csv(
+    path: Path | str,
+    test_size: float = 0.2,
+    random_state: int = 42,
+    chunk_rows: int = CHUNK_ROWS,
+    build_fn: Callable[..., StreamingLogistic] = build_model,
+) -> Tuple[StreamingLogistic, Metrics, int]:
+    """
+    Out-of-core holdout: train on the first (1 - test_size) of the rows and
+    evaluate on the last test_size (time order, no shuffling), streaming.
+
+    Returns:
+        (model, metrics, n_train)
+    """
+    n_rows = count_rows(path)
+    n_train = n_rows - int(np.ceil(n_rows * test_size))
+    if n_train <= 0 or n_train >= n_rows:
+        raise ValueError(f"test_size={test_size} leaves no training or test rows ({n_rows} rows).")
+
+    model = build_fn(random_state=random_state)
+    model.set_params(chunk_rows=chunk_rows)
+    with span("fit:stream", rows=n_train):
+        model.fit_csv(path, stop=n_train)
+    with span("evaluate:stream", rows=n_rows - n_train):
+        metrics = evaluate_csv(model, path, start=n_train, chunk_rows=chunk_rows)
+    return model, metrics, n_train
+
+
+def train_holdout(
+    test_size: float = 0.2,
+    random_state: int = 42,
+    return_preds: bool = False,
+    context: DatasetContext | None = None,
+) -> Tuple[Metrics, pd.Series, pd.Series] | Metrics:
+    """
+    Train on a holdout split and evaluate.
+
+    Data and split come from `context` (default: the shared process-wide
+    context), so repeated calls do not reload or re-split the dataset.
+
+    If return_preds=True, returns:
+        (metrics, y_true, y_pred)
+    Otherwise returns:
+        metrics
+    """
+    ctx = context or get_context()
+    X_train, X_test, y_train, y_test = ctx.train_test(test_size, random_state)
+
+    model = build_model(random_state=random_state)
+    with span("fit", rows=len(X_train)):
+        model.fit(X_train, y_train)
+    with span("predict", rows=len(X_test)):
+        y_pred = pd.Series(model.predict(X_test), index=y_test.index)
+
+    print("\n=== Streaming LogisticRegression (SGD, holdout) ===")
+    pretty_print(y_test, y_pred)
+
+    m = compute_metrics(y_test, y_pred)
+
+    if return_preds:
+        return m, y_test, y_pred
+    return m
+
+
+def main() -> None:
+    m = train_holdout()
+    RESULTS_DIR.mkdir(exist_ok=True)
+    out_path = RESULTS_DIR / "metrics_sgd_holdout.csv"
+    pd.DataFrame([m.to_row("StreamingLogistic")]).to_csv(out_path, index=False)
+    print(f"\nSaved: {out_path.as_posix()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Successive-halving hyperparameter search over time-series CV.
+
+Every model declares a parameter space (PARAM_SPACES, set_params names of
+its build_model pipeline). Candidates are scored on the same TimeSeriesSplit
+folds as run_cross_validation, but a full grid is never trained on full
+folds. Successive halving instead:
+
+    rung 0:   all candidates,        each fold's training rows subsampled
+    rung k:   best 1/factor of rung k-1, factor x more training rows
+    last:     the survivors,         full training folds
+
+Subsampling keeps every step-th training row (oldest to newest), so a
+cheap rung still spans the whole training window; test rows are never
+subsampled, so scores of all rungs are comparable.
+
+Data and fold indices are computed once and shared with the worker
+processes by the pool initializer; a job only carries
+(candidate, fold, step).
+
+Usage:
+    python src/run.py tune --models rf logreg --candidates 48 --factor 3
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import ParameterGrid, ParameterSampler, TimeSeriesSplit
+
+from metrics import confusion_counts, metrics_from_counts
+from dataset_context import DatasetContext, get_context
+from parallel import build_with_n_jobs, split_core_budget
+from cross_validation import MODEL_BUILDERS
+
+# Parameter spaces (set_params names of each model's build_model output).
+PARAM_SPACES: Dict[str, Dict[str, List[Any]]] = {
+    "rf": {
+        "n_estimators": [100, 300],
+        "max_depth": [None, 8, 16],
+        "min_samples_leaf": [1, 5, 20],
+        "max_features": ["sqrt", 0.5, None],
+        "class_weight": ["balanced", None],
+    },
+    "logreg": {
+        "clf__C": [0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0],
+        "clf__class_weight": [None, "balanced"],
+    },
+    "dummy": {
+        "strategy": ["most_frequent", "stratified", "uniform"],
+    },
+    "sgd": {
+        "alpha": [1e-6, 1e-5, 1e-4, 1e-3, 1e-2],
+        "epochs": [1, 3, 5, 10],
+        "class_weight": [None, "balanced"],
+    },
+    "hgb": {
+        "learning_rate": [0.03, 0.1, 0.3],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [20, 100],
+        "l2_regularization": [0.0, 1.0],
+    },
+}
+
+SCORING = ["accuracy", "precision_1", "recall_1", "f1_1"]
+
+# Defaults of the search. MIN_TRAIN_ROWS bounds the subsampling of the
+# smallest (first) training fold, and with it the number of rungs.
+N_CANDIDATES = 32
+FACTOR = 3
+MIN_TRAIN_ROWS = 100
+
+
+# Worker-side data, set once per process by _init_worker.
+_WORKER_DATA: Dict[str, Any] = {}
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, folds: List[tuple]) -> None:
+    _WORKER_DATA["X"] = X
+    _WORKER_DATA["y"] = y
+    _WORKER_DATA["folds"] = folds
+
+
+def sample_candidates(model_key: str, n_candidates: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Candidate parameter sets: the full grid if it has at most n_candidates
+    points, otherwise a seeded sample without repeats.
+    """
+    if model_key not in PARAM_SPACES:
+        raise ValueError(f"No parameter space for model: {model_key}. Available: {list(PARAM_SPACES.keys())}")
+    grid = ParameterGrid(PARAM_SPACES[model_key])
+    if len(grid) <= n_candidates:
+        return list(grid)
+    return list(ParameterSampler(PARAM_SPACES[model_key], n_iter=n_candidates, random_state=seed))
+
+
+def halving_schedule(n_candidates: int, factor: int, max_step: int) -> List[tuple[int, int]]:
+    """
+    Candidates and training subsample step of every rung.
+
+    Each rung keeps the best 1/factor of the previous one and trains on
+    factor x more rows; the last rung uses full training folds (step 1).
+    The number of rungs is ceil(log_factor(n_candidates)), fewer if the
+    smallest fold cannot be subsampled that far (max_step).
+
+    Returns:
+        list of (n_candidates, step), first rung first
+    """
+    needed = 1
+    while factor ** needed < n_candidates:
+        needed += 1
+    allowed = 1
+    while factor ** allowed <= max_step:
+        allowed += 1
+    n_rungs = min(needed, allowed)
+    return [(-(-n_candidates // factor ** i), factor ** (n_rungs - 1 - i)) for i in range(n_rungs)]
+
+
+def _run_candidate_fold(
+    model_key: str,
+    cand: int,
+    params: Dict[str, Any],
+    fold: int,
+    step: int,
+    seed: int,
+    n_jobs: int | None,
+) -> Dict[str, Any]:
+    """
+    Fit one candidate on one (subsampled) training fold, score its test fold.
+    """
+    X, y = _WORKER_DATA["X"], _WORKER_DATA["y"]
+    train_idx, test_idx = _WORKER_DATA["folds"][fold - 1]
+    # Newest row always kept: the subsample ends where the test fold starts.
+    train_idx = train_idx[::-1][::step][::-1]
+
+    start = time.perf_counter()
+    model = build_with_n_jobs(MODEL_BUILDERS[model_key], n_jobs, random_state=seed)
+    model.set_params(**params)
+    y_train = y[train_idx]
+    if len(np.unique(y_train)) < 2:
+        # A subsample with a single class can only predict that class.
+        y_pred = np.full(len(test_idx), y_train[0])
+    else:
+        model.fit(X[train_idx], y_train)
+        y_pred = model.predict(X[test_idx])
+    fit_s = time.perf_counter() - start
+
+    m = metrics_from_counts(confusion_counts(y[test_idx], y_pred))
+    return {
+        "candidate": cand,
+        "fold": fold,
+        "n_train": len(train_idx),
+        **{k: float(m[k]) for k in SCORING},
+        "seconds": fit_s,
+    }
+
+
+def _run_jobs(jobs: List[tuple], X: np.ndarray, y: np.ndarray, folds: List[tuple], n_jobs: int | None) -> List[Dict[str, Any]]:
+    if n_jobs is None:
+        # Serial, models keep their own n_jobs defaults.
+        _init_worker(X, y, folds)
+        return [_run_candidate_fold(*job, n_jobs=None) for job in jobs]
+
+    workers, inner = split_core_budget(n_jobs, len(jobs))
+    if workers == 1:
+        _init_worker(X, y, folds)
+        return [_run_candidate_fold(*job, n_jobs=inner) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, folds)) as pool:
+        futures = [pool.submit(_run_candidate_fold, *job, n_jobs=inner) for job in jobs]
+        return [f.result() for f in futures]
+
+
+def successive_halving(
+    model_key: str,
+    X: np.ndarray,
+    y: np.ndarray,
+    folds: List[tuple],
+    n_candidates: int = N_CANDIDATES,
+    factor: int = FACTOR,
+    scoring: str = "f1_1",
+    min_train_rows: int = MIN_TRAIN_ROWS,
+    seed: int = 42,
+    n_jobs: int | None = None,
+) -> pd.DataFrame:
+    """
+    Successive halving for one model over precomputed folds.
+
+    Returns:
+        one row per (rung, candidate): params, step, mean training rows,
+        mean/std of every metric over folds, fit seconds, kept
+    """
+    if scoring not in SCORING:
+        raise ValueError(f"Unknown scoring: {scoring}. Available: {SCORING}")
+    if factor < 2:
+        raise ValueError(f"factor must be >= 2, got {factor}")
+
+    candidates = sample_candidates(model_key, n_candidates, seed)
+    smallest_fold = min(len(train_idx) for train_idx, _ in folds)
+    max_step = max(1, smallest_fold // min_train_rows)
+
+    alive = list(range(len(candidates)))
+    rows: List[Dict[str, Any]] = []
+    schedule = halving_schedule(len(candidates), factor, max_step)
+    for rung, (_, step) in enumerate(schedule):
+        jobs = [
+            (model_key, cand, candidates[cand], fold, step, seed)
+            for cand in alive
+            for fold in range(1, len(folds) + 1)
+        ]
+        per_fold = pd.DataFrame(_run_jobs(jobs, X, y, folds, n_jobs))
+        scores = per_fold.groupby("candidate", sort=False).agg(
+            n_train=("n_train", "mean"),
+            seconds=("seconds", "sum"),
+            **{f"{k}_mean": (k, "mean") for k in SCORING},
+            **{f"{k}_std": (k, "std") for k in SCORING},
+        )
+
+        # Survivors for the next rung (ties broken by candidate order).
+        n_keep = schedule[rung + 1][0] if rung + 1 < len(schedule) else 1
+        ranked = scores.sort_values(f"{scoring}_mean", ascending=False, kind="stable")
+        keep = set(ranked.index[:n_keep])
+
+        for cand, rec in scores.iterrows():
+            rows.append({
+                "model": model_key,
+                "rung": rung,
+                "step": step,
+                "candidate": cand,
+                "params": json.dumps(candidates[cand], sort_keys=True),
+                **rec.to_dict(),
+                "kept": cand in keep,
+            })
+        alive = [c for c in alive if c in keep]
+
+    return pd.DataFrame(rows)
+
+
+def run_tuning(
+    models: List[str] | None = None,
+    n_splits: int = 5,
+    n_candidates: int = N_CANDIDATES,
+    factor: int = FACTOR,
+    scoring: str = "f1_1",
+    min_train_rows: int = MIN_TRAIN_ROWS,
+    seed: int = 42,
+    context: DatasetContext | None = None,
+    n_jobs: int | None = None,
+    out_path: str = "results/tuning.csv",
+    out_best_path: str = "results/tuning_best.json",
+) -> tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Successive-halving search for every model on the TimeSeriesSplit folds
+    of run_cross_validation.
+
+    Returns:
+        history: one row per (model, rung, candidate)
+        best: per model, params and final-rung scores of the winner
+    """
+    if models is None:
+        models = ["rf", "logreg", "dummy"]
+
+    unknown = [m for m in models if m not in PARAM_SPACES]
+    if unknown:
+        raise ValueError(f"Unknown model(s): {unknown}. Available: {list(PARAM_SPACES.keys())}")
+
+    # Data and folds are built once and shared by every candidate.
+    ctx = context or get_context()
+    X = ctx.X.to_numpy(dtype=np.float64)
+    y = ctx.y.to_numpy()
+    folds = [(train_idx, test_idx) for train_idx, test_idx in TimeSeriesSplit(n_splits=n_splits).split(X)]
+
+    histories = []
+    best: Dict[str, Any] = {}
+    for model_key in models:
+        start = time.perf_counter()
+        history = successive_halving(
+            model_key, X, y, folds,
+            n_candidates=n_candidates,
+            factor=factor,
+            scoring=scoring,
+            min_train_rows=min_train_rows,
+            seed=seed,
+            n_jobs=n_jobs,
+        )
+        elapsed = time.perf_counter() - start
+        histories.append(history)
+
+        final = history[history["rung"] == history["rung"].max()]
+        winner = final[final["kept"]].iloc[0]
+        best[model_key] = {
+            "params": json.loads(winner["params"]),
+            "scoring": scoring,
+            **{k: float(winner[f"{k}_mean"]) for k in SCORING},
+            "candidates": int((history["rung"] == 0).sum()),
+            "fits": len(history) * n_splits,
+            "seconds": elapsed,
+        }
+
+    history_df = pd.concat(histories, ignore_index=True)
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    history_df.to_csv(out_path, index=False)
+    with open(out_best_path, "w", encoding="utf-8") as fh:
+        json.dump(best, fh, indent=2)
+
+    return history_df, best
+
+
+def print_tuning(history: pd.DataFrame, best: Dict[str, Any]) -> None:
+    for model_key, info in best.items():
+        rungs = history[history["model"] == model_key].groupby("rung").agg(
+            candidates=("candidate", "size"),
+            step=("step", "first"),
+            n_train=("n_train", "mean"),
+            seconds=("seconds", "sum"),
+        )
+        print(f"\n=== {model_key.upper()}: successive halving ({info['candidates']} candidates, "
+              f"{info['fits']} fits, {info['seconds']:.1f} s) ===\n")
+        print(rungs.to_string())
+        print(f"\nBest ({info['scoring']} = {info[info['scoring']]:.4f}): {info['params']}")
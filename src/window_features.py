@@ -0,0 +1,194 @@
+"""
+Vectorized sliding-window features for sensor time series.
+
+Replaces the per-row `df.iloc[i - WINDOW + 1 : i + 1]` loop that used to live
+in realtime_simulation.py. For every sensor column and every window length,
+the following statistics are computed over the trailing window ending at row i:
+
+- <feature>_mean:  window mean
+- <feature>_std:   window sample standard deviation (ddof=1, same as pandas)
+- <feature>_min:   window minimum
+- <feature>_max:   window maximum
+- <feature>_delta: last value minus first value in the window
+
+When several window lengths are requested, every column gets a `_w<length>`
+suffix (e.g. `CO2_mean_w15`). With a single window the names match the old
+loop exactly.
+
+Implementation notes:
+- Windows are strided views (numpy sliding_window_view), so no window is ever
+  copied row by row.
+- Rows are processed in chunks to keep temporary arrays bounded for long
+  windows on long histories.
+- Output rows start at max(windows) - 1, i.e. only rows where every requested
+  window is complete are emitted.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from preprocess import DATA_PATH, FEATURES, TARGET, load_data
+from profiling import span
+
+STATS = ["mean", "std", "min", "max", "delta"]
+
+DEFAULT_WINDOWS = (5,)
+
+# Rows per chunk when materializing window temporaries (rows x window floats).
+CHUNK_ROWS = 65_536
+
+
+def window_feature_names(
+    features: Sequence[str] = FEATURES,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+) -> list[str]:
+    """
+    Column names produced by build_window_features, in output order.
+    """
+    windows = _validate_windows(windows)
+    suffix = len(windows) > 1
+
+    names = []
+    for w in windows:
+        for f in features:
+            for stat in STATS:
+                names.append(f"{f}_{stat}_w{w}" if suffix else f"{f}_{stat}")
+    return names
+
+
+def _validate_windows(windows: Iterable[int]) -> list[int]:
+    windows = [int(w) for w in windows]
+    if not windows:
+        raise ValueError("At least one window length is required.")
+    bad = [w for w in windows if w < 1]
+    if bad:
+        raise ValueError(f"Window lengths must be >= 1. Got: {bad}")
+    return windows
+
+
+def _column_window_stats(values: np.ndarray, window: int, start: int) -> np.ndarray:
+    """
+    Compute all STATS for one column and one window length.
+
+    Args:
+        values: 1D float64 array (full column)
+        window: window length
+        start: first output row (index into values)
+
+    Returns:
+        array of shape (len(values) - start, len(STATS))
+    """
+    n_out = len(values) - start
+    out = np.empty((n_out, len(STATS)), dtype=np.float64)
+
+    # views[k] is the window ending at row k + window - 1
+    views = sliding_window_view(values, window)
+    offset = start - (window - 1)
+
+    for lo in range(0, n_out, CHUNK_ROWS):
+        hi = min(lo + CHUNK_ROWS, n_out)
+        win = views[offset + lo : offset + hi]
+
+        mean = win.sum(axis=1) / window
+        out[lo:hi, 0] = mean
+
+        # Two-pass variance (same as pandas .std()), avoids cancellation.
+        if window > 1:
+            dev = win - mean[:, None]
+            np.square(dev, out=dev)
+            out[lo:hi, 1] = np.sqrt(dev.sum(axis=1) / (window - 1))
+        else:
+            out[lo:hi, 1] = np.nan
+
+        out[lo:hi, 2] = win.min(axis=1)
+        out[lo:hi, 3] = win.max(axis=1)
+        out[lo:hi, 4] = win[:, -1] - win[:, 0]
+
+    return out
+
+
+def build_window_features(
+    df: pd.DataFrame,
+    features: Sequence[str] = FEATURES,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+) -> pd.DataFrame:
+    """
+    Build trailing-window statistics for all features and window lengths.
+
+    Rows are expected in chronological order (as in data/occupancy.csv).
+
+    Returns:
+        DataFrame with one row per input row from max(windows) - 1 onwards,
+        indexed like the corresponding input rows.
+    """
+    windows = _validate_windows(windows)
+
+    missing = set(features) - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing required columns: {sorted(missing)}. Found: {list(df.columns)}")
+
+    start = max(windows) - 1
+    n_out = max(len(df) - start, 0)
+    names = window_feature_names(features, windows)
+
+    if n_out == 0:
+        return pd.DataFrame(columns=names, dtype=np.float64)
+
+    out = np.empty((n_out, len(names)), dtype=np.float64)
+    col = 0
+    for w in windows:
+        for f in features:
+            values = df[f].to_numpy(dtype=np.float64)
+            out[:, col : col + len(STATS)] = _column_window_stats(values, w, start)
+            col += len(STATS)
+
+    return pd.DataFrame(out, columns=names, index=df.index[start:])
+
+
+def prepare_window_dataset(
+    path: Path | str = DATA_PATH,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    compact: bool = False,
+    use_store: bool = True,
+) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Window-feature counterpart of preprocess.prepare_dataset.
+
+    Features are computed in float64; compact=True converts the result
+    (float32 features, uint8 target, see dtype_schema.py).
+
+    use_store=True reads the features from the incremental feature store
+    (feature_store.py): they are computed once and afterwards only for rows
+    appended to the file. use_store=False recomputes them from the raw rows.
+
+    Returns:
+        X: window feature matrix (RangeIndex)
+        y: target at the last row of each window
+    """
+    if use_store:
+        from feature_store import load_features
+
+        df = load_features(path, windows)
+        X, y = df[window_feature_names(FEATURES, windows)], df[TARGET]
+    else:
+        df = load_data(path)
+
+        if TARGET not in df.columns:
+            raise ValueError(f"Target column '{TARGET}' not found. Columns: {list(df.columns)}")
+
+        with span("window_features", rows=len(df)):
+            X = build_window_features(df, FEATURES, windows)
+            y = df[TARGET].iloc[len(df) - len(X):]
+
+    X, y = X.reset_index(drop=True), y.reset_index(drop=True)
+    if compact:
+        from dtype_schema import apply_schema
+
+        X, y = apply_schema(X), apply_schema(y.to_frame())[TARGET]
+    return X, y
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+import pandas as pd
+
+from dataset_cache import cached_read_csv, refresh
+
+DATA = Path(__file__).resolve().parents[1] / "data" / "occupancy.csv"
+
+
+def test_cache_keeps_read_csv_dtypes_across_appends(tmp_path):
+    lines = open(DATA, encoding="utf-8").read().splitlines(keepends=True)
+    csv = tmp_path / "occupancy.csv"
+    csv.write_text("".join(lines[:1001]), encoding="utf-8")
+
+    first = refresh(csv)
+    assert first["mode"] == "rebuild"
+    pd.testing.assert_frame_equal(cached_read_csv(csv), pd.read_csv(csv))
+    assert cached_read_csv(csv, compact=True)["Occupancy"].dtype == "uint8"
+
+    with open(csv, "a", encoding="utf-8") as fh:
+        fh.writelines(lines[1001:2001])
+    second = refresh(csv)
+    assert (second["mode"], second["new_rows"], second["dir"]) == ("append", 1000, first["dir"])
+    pd.testing.assert_frame_equal(cached_read_csv(csv), pd.read_csv(csv))
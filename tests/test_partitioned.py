@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from preprocess import FEATURES, TARGET
+from partitioned import SINGLE_CLASS_FILE, room_artifacts_dir, score_rooms, train_rooms
+from train_logistic import build_model
+
+
+def _rooms_csv(path, rows_per_room=120):
+    rng = np.random.default_rng(0)
+    frames = []
+    for room in (1, 2, 3):
+        X = rng.normal(size=(rows_per_room, len(FEATURES)))
+        y = (X[:, 0] > 0).astype(int) if room != 2 else np.zeros(rows_per_room, dtype=int)
+        frame = pd.DataFrame(X, columns=FEATURES)
+        frame[TARGET] = y
+        frame["room"] = room
+        frames.append(frame)
+    pd.concat(frames, ignore_index=True).to_csv(path, index=False)
+
+
+def test_predict_rooms_after_single_class_room(tmp_path):
+    csv = tmp_path / "rooms.csv"
+    _rooms_csv(csv)
+    artifacts = tmp_path / "models"
+
+    results = train_rooms(csv, "logreg", build_model, n_jobs=1, artifacts_dir=artifacts)
+    assert results.set_index("room")["status"].to_dict() == {1: "ok", 2: "single_class", 3: "ok"}
+    assert (room_artifacts_dir(2, artifacts) / "logreg" / SINGLE_CLASS_FILE).exists()
+
+    out = tmp_path / "predictions.csv"
+    summary = score_rooms(csv, "logreg", out, n_jobs=1, artifacts_dir=artifacts)
+    assert summary.set_index("room")["status"].to_dict() == {1: "ok", 2: "single_class", 3: "ok"}
+
+    preds = pd.read_csv(out, index_col="row")
+    assert len(preds) == 360
+    assert (preds.loc[preds["room"] == 2, "prediction"] == 0).all()
+    assert preds["prediction"].notna().all()
+
+
+def test_predict_rooms_reports_room_without_model(tmp_path):
+    csv = tmp_path / "rooms.csv"
+    _rooms_csv(csv)
+    artifacts = tmp_path / "models"
+
+    train_rooms(csv, "logreg", build_model, n_jobs=1, artifacts_dir=artifacts)
+    (room_artifacts_dir(2, artifacts) / "logreg" / SINGLE_CLASS_FILE).unlink()
+
+    out = tmp_path / "predictions.csv"
+    summary = score_rooms(csv, "logreg", out, n_jobs=1, artifacts_dir=artifacts)
+    assert summary.set_index("room").loc[2, "status"] == "no_model"
+
+    preds = pd.read_csv(out, index_col="row")
+    assert preds.loc[preds["room"] == 2, "prediction"].isna().all()
+    assert preds.loc[preds["room"] != 2, "prediction"].notna().all()